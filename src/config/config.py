@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from enum import Enum
+from typing import Optional
 from dotenv import load_dotenv
 import os
 
@@ -22,6 +23,12 @@ SYSTEM_PROMPT_GENERATE = SYSTEM_PROMPT + """
     {docs_content}
 """
 
+SUMMARY_PROMPT = """
+    You maintain a running summary of a conversation between a student and an AI assistant about data structures and algorithms.
+    Extend the current summary with the new messages. Keep the topics, questions and conclusions the student may refer back to,
+    and drop greetings and code details. Answer with the updated summary only, in at most 200 words.
+"""
+
 class LLMProvider(str, Enum):
     OPENAI = "OPENAI"
     COHERE = "COHERE"
@@ -31,12 +38,26 @@ class ChunkingStrategy(str, Enum):
     FIXED_SIZE = "FIXED_SIZE"
     SEMANTIC = "SEMANTIC"
 
+class VectorBackend(str, Enum):
+    ASTRA = "ASTRA"
+    LOCAL = "LOCAL"
+
+class LocalIndexType(str, Enum):
+    EXACT = "EXACT"
+    IVF = "IVF"
+
 class VectorDBConfig(BaseModel):
+    backend: VectorBackend = VectorBackend(os.getenv("VECTOR_DB_BACKEND", "ASTRA"))
     collection_name: str = os.getenv("ASTRA_DB_COLLECTION_NAME", "dsa_rag_vectors")
     api_endpoint: str = os.getenv("ASTRA_DB_API_ENDPOINT")
     application_token: str = os.getenv("ASTRA_DB_APPLICATION_TOKEN")
     keyspace: str = os.getenv("ASTRA_DB_KEYSPACE", "default_keyspace")
     vector_dimension: int = 1024
+    # In-process index, used when backend is LOCAL
+    local_path: str = os.getenv("LOCAL_VECTOR_DB_PATH", "data/vector_index")
+    local_index_type: LocalIndexType = LocalIndexType(os.getenv("LOCAL_VECTOR_DB_INDEX", "EXACT"))
+    ivf_lists: int = int(os.getenv("LOCAL_VECTOR_DB_IVF_LISTS", 0))  # 0 = sqrt(number of vectors)
+    ivf_probes: int = int(os.getenv("LOCAL_VECTOR_DB_IVF_PROBES", 8))
 
 class ModelConfig(BaseModel):
     llm_provider: LLMProvider = LLMProvider(os.getenv("LLM_PROVIDER", "COHERE"))
@@ -49,6 +70,113 @@ class PostgresConfig(BaseModel):
     max_pool_size: int = 20
     autocommit: bool = True
     prepare_threshold: int = 0
+    # Disable on read-only replicas so startup never issues checkpoint DDL
+    run_migrations: bool = os.getenv("POSTGRES_RUN_MIGRATIONS", "true").lower() == "true"
+
+class CheckpointRetentionConfig(BaseModel):
+    # Run the conversation history backfill before enabling; pruned checkpoints can no longer be projected
+    enabled: bool = os.getenv("CHECKPOINT_RETENTION_ENABLED", "false").lower() == "true"
+    keep_checkpoints: int = int(os.getenv("CHECKPOINT_RETENTION_KEEP", 10))  # latest checkpoints kept per thread
+    idle_ttl_days: int = int(os.getenv("CHECKPOINT_RETENTION_IDLE_TTL_DAYS", 0))  # 0 never expires idle threads
+    min_idle_seconds: int = 600  # threads with more recent activity are left alone
+    interval_seconds: int = int(os.getenv("CHECKPOINT_RETENTION_INTERVAL_SECONDS", 3600))
+    batch_size: int = 1000  # rows deleted per statement
+    threads_per_run: int = int(os.getenv("CHECKPOINT_RETENTION_THREADS_PER_RUN", 1000))  # threads expired and compacted per pass
+
+class HistoryConfig(BaseModel):
+    # Prompt budget shared by the system prompt, retrieved context and recent turns; older turns are summarized
+    max_prompt_tokens: int = int(os.getenv("HISTORY_MAX_PROMPT_TOKENS", 8000))
+    # Dropped messages that trigger a background summary refresh
+    summary_refresh_messages: int = int(os.getenv("HISTORY_SUMMARY_REFRESH_MESSAGES", 4))
+    max_summaries: int = 1000  # threads whose summary is kept in memory
+
+class ContextConfig(BaseModel):
+    # Retrieved context in the answer prompt; hits are added best first until the budget is spent
+    max_tokens: int = int(os.getenv("CONTEXT_MAX_TOKENS", 1500))
+    # Hits scoring this far below the best one are left out
+    similarity_margin: float = float(os.getenv("CONTEXT_SIMILARITY_MARGIN", 0.05))
+    duplicate_similarity: float = 0.8  # word shingle overlap above which a hit counts as a near-duplicate
+    min_merge_overlap: int = 16  # characters two chunks of a source must share to be merged
+
+class RouterConfig(BaseModel):
+    # Local retrieval routing; questions between the two thresholds fall back to the LLM router
+    enabled: bool = os.getenv("ROUTER_ENABLED", "true").lower() == "true"
+    retrieve_threshold: float = float(os.getenv("ROUTER_RETRIEVE_THRESHOLD", 0.5))  # cosine similarity to the closest source centroid
+    direct_threshold: float = float(os.getenv("ROUTER_DIRECT_THRESHOLD", 0.2))
+    shadow_sample_rate: float = float(os.getenv("ROUTER_SHADOW_SAMPLE_RATE", 0.05))  # local decisions double-checked by the LLM
+    refresh_seconds: int = int(os.getenv("ROUTER_REFRESH_SECONDS", 300))  # source centroids are read from the source catalog
+    # Search for the question while the LLM router runs; reused when the tool query is this similar to the question
+    speculative_retrieval: bool = os.getenv("SPECULATIVE_RETRIEVAL_ENABLED", "false").lower() == "true"
+    speculative_match_similarity: float = float(os.getenv("SPECULATIVE_RETRIEVAL_MATCH_SIMILARITY", 0.9))
+
+class EmbeddingCacheConfig(BaseModel):
+    max_size: int = int(os.getenv("EMBEDDING_CACHE_MAX_SIZE", 2048))
+    ttl_seconds: int = int(os.getenv("EMBEDDING_CACHE_TTL_SECONDS", 86400))  # 1 day
+    # Share entries between workers through Postgres
+    shared: bool = os.getenv("EMBEDDING_CACHE_SHARED", "false").lower() == "true"
+
+class ResponseCacheConfig(BaseModel):
+    enabled: bool = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+    similarity_threshold: float = float(os.getenv("RESPONSE_CACHE_SIMILARITY_THRESHOLD", 0.95))
+    max_entries: int = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", 1000))
+    ttl_seconds: int = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", 3600))  # 1 hour
+    # How often each worker checks whether another worker invalidated the cache
+    sync_seconds: float = float(os.getenv("RESPONSE_CACHE_SYNC_SECONDS", 5))
+
+class IngestionConfig(BaseModel):
+    workers: int = int(os.getenv("INGESTION_WORKERS", 2))
+    max_pending_jobs: int = int(os.getenv("INGESTION_MAX_PENDING_JOBS", 100))
+    max_finished_jobs: int = 500  # finished jobs kept for status polling
+    batch_chunks: int = int(os.getenv("INGESTION_BATCH_CHUNKS", 500))  # chunks embedded and inserted per batch
+    # Processes for PDF extraction, cleaning and splitting; 0 runs these stages in the job thread
+    cpu_workers: int = int(os.getenv("INGESTION_CPU_WORKERS", os.cpu_count() or 1))
+    pdf_pages_per_task: int = int(os.getenv("INGESTION_PDF_PAGES_PER_TASK", 16))
+    # Job status is shared through Postgres: progress of running jobs is saved this often,
+    # and finished jobs are kept this long for polling
+    job_flush_seconds: float = float(os.getenv("INGESTION_JOB_FLUSH_SECONDS", 2))
+    job_retention_hours: float = float(os.getenv("INGESTION_JOB_RETENTION_HOURS", 24))
+
+class UrlIngestionConfig(BaseModel):
+    max_connections: int = int(os.getenv("URL_INGESTION_MAX_CONNECTIONS", 64))
+    max_connections_per_host: int = int(os.getenv("URL_INGESTION_MAX_CONNECTIONS_PER_HOST", 8))
+    timeout_seconds: int = int(os.getenv("URL_INGESTION_TIMEOUT_SECONDS", 30))
+    process_concurrency: int = 4  # changed pages chunked and embedded at the same time
+    user_agent: str = os.getenv("USER_AGENT", "algo-ai")
+
+class EmbeddingRateLimitConfig(BaseModel):
+    # Unset values fall back to the provider defaults in rate_limiter.PROVIDER_LIMITS
+    tokens_per_minute: Optional[int] = int(os.getenv("EMBEDDING_TOKENS_PER_MINUTE")) if os.getenv("EMBEDDING_TOKENS_PER_MINUTE") else None
+    max_batch_chunks: Optional[int] = int(os.getenv("EMBEDDING_MAX_BATCH_CHUNKS")) if os.getenv("EMBEDDING_MAX_BATCH_CHUNKS") else None
+    concurrency: int = int(os.getenv("EMBEDDING_CONCURRENCY", 4))
+    max_retries: int = 5
+
+class EmbeddingStoreConfig(BaseModel):
+    # Persistent chunk embedding cache on local disk, consulted before calling the provider
+    enabled: bool = os.getenv("EMBEDDING_STORE_ENABLED", "true").lower() == "true"
+    path: str = os.getenv("EMBEDDING_STORE_PATH", "data/embeddings")
+
+class VectorInsertConfig(BaseModel):
+    # Astra inserts: documents per insertMany request (the Data API accepts up to 100) and requests in flight
+    batch_size: int = int(os.getenv("VECTOR_INSERT_BATCH_SIZE", 50))
+    concurrency: int = int(os.getenv("VECTOR_INSERT_CONCURRENCY", 8))
+    max_retries: int = 3
+    retry_backoff_seconds: float = 0.5  # doubled on every retry
+
+class SourceCatalogConfig(BaseModel):
+    # Source labels served by /info are cached per worker; changes in other workers show up after this long
+    cache_ttl_seconds: int = int(os.getenv("SOURCE_CATALOG_CACHE_TTL_SECONDS", 60))
+
+class HealthConfig(BaseModel):
+    # Dependencies are probed in the background; /health serves the latest results
+    interval_seconds: int = int(os.getenv("HEALTH_PROBE_INTERVAL_SECONDS", 15))
+    timeout_seconds: float = float(os.getenv("HEALTH_PROBE_TIMEOUT_SECONDS", 3))
+    # The provider is probed less often; the check is free but rate limited
+    provider_interval_seconds: int = int(os.getenv("HEALTH_PROVIDER_PROBE_INTERVAL_SECONDS", 300))
+
+class StartupConfig(BaseModel):
+    # Time from importing the application to serving requests; exceeding it logs a warning
+    budget_seconds: float = float(os.getenv("STARTUP_BUDGET_SECONDS", 5))
+    report_modules: int = 15  # slowest application modules listed in the startup report
 
 class InfoConfig(BaseModel):
     title: str = "AlgoAI API"
@@ -63,9 +191,23 @@ class AdminConfig(BaseModel):
 class Config(BaseModel):
     vector_db: VectorDBConfig = VectorDBConfig()
     postgres: PostgresConfig = PostgresConfig()
+    checkpoint_retention: CheckpointRetentionConfig = CheckpointRetentionConfig()
     model: ModelConfig = ModelConfig()
+    history: HistoryConfig = HistoryConfig()
+    context: ContextConfig = ContextConfig()
+    router: RouterConfig = RouterConfig()
+    source_catalog: SourceCatalogConfig = SourceCatalogConfig()
+    health: HealthConfig = HealthConfig()
+    startup: StartupConfig = StartupConfig()
     info: InfoConfig = InfoConfig()
     admin: AdminConfig = AdminConfig()
+    embedding_cache: EmbeddingCacheConfig = EmbeddingCacheConfig()
+    response_cache: ResponseCacheConfig = ResponseCacheConfig()
+    ingestion: IngestionConfig = IngestionConfig()
+    url_ingestion: UrlIngestionConfig = UrlIngestionConfig()
+    embedding_rate_limit: EmbeddingRateLimitConfig = EmbeddingRateLimitConfig()
+    embedding_store: EmbeddingStoreConfig = EmbeddingStoreConfig()
+    vector_insert: VectorInsertConfig = VectorInsertConfig()
     chunk_size: int = 512
     chunk_overlap: int = 20
     port: int = int(os.getenv("PORT", 10000))
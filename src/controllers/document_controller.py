@@ -1,10 +1,21 @@
+import asyncio
+import functools
+import os
+import shutil
+import tempfile
 import traceback
 from typing import Annotated
-from fastapi import APIRouter, Depends, Form, HTTPException, File, Header, UploadFile
+from fastapi import APIRouter, Depends, Form, HTTPException, File, Header, Query, UploadFile
 
-from src.models.response_models import DocumentResponse, EmptyResponse
+from src.models.response_models import EmptyResponse, JobResponse, SourcePageResponse
 from src.services.auth_service import verify_jwt
 from src.services.document_processor import DocumentProcessor
+from src.services.vector_store import AsyncVectorStore
+from src.services.resources import resources
+from src.services.response_cache import response_cache
+from src.services.source_catalog import source_catalog
+from src.services.ingestion_queue import ingestion_queue, QueueFullError
+from src.repositories.source_fetch_repository import SourceFetchRepository
 from src.models.request_models import TextRequest, URLsRequest
 import logging
 
@@ -12,68 +23,121 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+UPLOAD_COPY_BUFFER_SIZE = 1024 * 1024  # 1 MiB
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
 def get_document_processor() -> DocumentProcessor:
     return DocumentProcessor()
 
+def get_vector_store() -> AsyncVectorStore:
+    return resources.async_vector_store()
+
 # delete documents with source label from query (/?source_label=...)
 @router.delete("/", response_model=EmptyResponse)
-async def delete_documents_with_source_label(authorization: Annotated[str, Header()], source_label: str, processor: DocumentProcessor = Depends(get_document_processor)):
+async def delete_documents_with_source_label(authorization: Annotated[str, Header()], source_label: str, vector_store: AsyncVectorStore = Depends(get_vector_store)):
     """
     Delete documents with a specific source label.
     """
     if not verify_jwt(authorization.split(' ')[-1]):
         raise HTTPException(status_code=401, detail='Unauthorized: Invalid API key')
     try:
-        processor.vector_store.delete_embeddings_by_source_label(source_label)
+        await vector_store.delete_embeddings_by_source_label(source_label)
+        await source_catalog.delete_source_label(source_label)
+        # URL sources are labelled by their URL; forget the fetch state so re-adding one is not skipped as unchanged
+        await SourceFetchRepository().delete_fetch_state_by_url(source_label)
+        response_cache.invalidate()
         return {}
     except Exception as e:
         traceback.print_exc()
         logger.error("Error deleting documents: %s", str(e))
         raise HTTPException(status_code=500, detail=f"Error deleting documents: {str(e)}")
 
-@router.post("/text", response_model=DocumentResponse)
+@router.get("/sources", response_model=SourcePageResponse)
+async def get_sources(authorization: Annotated[str, Header()], offset: Annotated[int, Query(ge=0)] = 0,
+                      limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE):
+    """
+    Returns a page of the source catalog, most recently ingested first, and the total number of sources.
+    """
+    if not verify_jwt(authorization.split(' ')[-1]):
+        raise HTTPException(status_code=401, detail='Unauthorized: Invalid API key')
+    try:
+        sources, total = await source_catalog.get_sources(offset, limit)
+        return {"total": total, "sources": sources}
+    except Exception as e:
+        traceback.print_exc()
+        logger.error("Error getting sources: %s", str(e))
+        raise HTTPException(status_code=500, detail=f"Error getting sources: {str(e)}")
+
+@router.post("/text", response_model=JobResponse, status_code=202)
 async def process_text(authorization: Annotated[str, Header()], request: TextRequest, processor: DocumentProcessor = Depends(get_document_processor)):
     """
-    Process raw text by sending it to the document processor.
+    Queue raw text for processing and return the ingestion job.
     """
     if not verify_jwt(authorization.split(' ')[-1]):
         raise HTTPException(status_code=401, detail='Unauthorized: Invalid API key')
     try:
-        processor.process_text(request.text, request.title)
-        return {"message": "Text processed successfully."}
+        job = await ingestion_queue.submit("text", request.title, processor.process_text, request.text, request.title)
+        return job.to_response()
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         traceback.print_exc()
         logger.error("Error processing text: %s", str(e))
         raise HTTPException(status_code=500, detail=f"Error processing text: {str(e)}")
 
-@router.post("/pdf", response_model=DocumentResponse)
+@router.post("/pdf", response_model=JobResponse, status_code=202)
 async def process_pdf(authorization: Annotated[str, Header()], title: Annotated[str, Form()], file: UploadFile = File(...), processor: DocumentProcessor = Depends(get_document_processor)):
     """
-    Process a PDF file by sending it to the document processor.
+    Queue a PDF file for processing and return the ingestion job.
     """
     if not verify_jwt(authorization.split(' ')[-1]):
         raise HTTPException(status_code=401, detail='Unauthorized: Invalid API key')
     try:
-        file_bytes = await file.read()
-        
-        processor.process_pdf(file_bytes, title)
-        return {"message": "PDF processed successfully."}
+        # Spool the upload to a file owned by the job; the processor removes it when done, the queue if it never runs
+        temp_file = tempfile.NamedTemporaryFile(suffix=".pdf", delete=False)
+        try:
+            with temp_file:
+                await asyncio.to_thread(shutil.copyfileobj, file.file, temp_file, UPLOAD_COPY_BUFFER_SIZE)
+            job = await ingestion_queue.submit("pdf", title, processor.process_pdf, temp_file.name, title,
+                                               cleanup=functools.partial(os.remove, temp_file.name))
+        except BaseException:
+            # The job never took the file over, including when the request is cancelled mid-upload
+            os.remove(temp_file.name)
+            raise
+        return job.to_response()
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         traceback.print_exc()
         logger.error("Error processing PDF: %s", str(e))
         raise HTTPException(status_code=500, detail=f"Error processing PDF: {str(e)}")
 
-@router.post("/url", response_model=DocumentResponse)
+@router.post("/url", response_model=JobResponse, status_code=202)
 async def process_urls(authorization: Annotated[str, Header()], request: URLsRequest, processor: DocumentProcessor = Depends(get_document_processor)):
     """
-    Process a list of URLs by sending them to the document processor.
+    Queue a list of URLs for processing and return the ingestion job.
     """
     if not verify_jwt(authorization.split(' ')[-1]):
         raise HTTPException(status_code=401, detail='Unauthorized: Invalid API key')
     try:
-        processor.process_urls(request.urls)
-        return {"message": "URLs processed successfully."}
+        job = await ingestion_queue.submit("url", ", ".join(request.urls), processor.process_urls, request.urls)
+        return job.to_response()
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         traceback.print_exc()
         logger.error("Error processing URLs: %s", str(e))
         raise HTTPException(status_code=500, detail=f"Error processing URLs: {str(e)}")
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(authorization: Annotated[str, Header()], job_id: str):
+    """
+    Returns the status and per-stage progress of an ingestion job.
+    """
+    if not verify_jwt(authorization.split(' ')[-1]):
+        raise HTTPException(status_code=401, detail='Unauthorized: Invalid API key')
+    job = await ingestion_queue.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found.")
+    return job
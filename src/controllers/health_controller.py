@@ -1,34 +1,21 @@
-import traceback
-from fastapi import APIRouter, Depends
-from src.models.response_models import HealthResponse
-from src.services.vector_store import VectorStore
-from src.database import ping_db
+from fastapi import APIRouter
+from src.models.response_models import HealthResponse, LivenessResponse
+from src.services.health_prober import health_prober
 
 router = APIRouter()
 
-def get_vector_store() -> VectorStore:
-    return VectorStore()
-
 @router.get("/", response_model=HealthResponse)
-async def health_check(vector_store: VectorStore = Depends(get_vector_store)):
+async def health_check():
     """
     Health check endpoint.
-    Pings the vector store and the postgres db
+    Returns the latest background probe of the vector store, the postgres db and the LLM provider,
+    with each probe's latency, and the current saturation of the postgres connection pool.
     """
-    response = {}
-    try:
-        vector_store.ping()
-        response["vector_store"] = "up"
-    except Exception:
-        traceback.print_exc()
-        response["vector_store"] = "down"
-
-
-    try:
-        await ping_db()
-        response["db"] = "up"
-    except Exception:
-        traceback.print_exc()
-        response["db"] = "down"
+    return health_prober.stats()
 
-    return response
+@router.get("/live", response_model=LivenessResponse)
+async def liveness_check():
+    """
+    Liveness endpoint. Answers as long as the process serves requests, without touching any dependency.
+    """
+    return {"status": "ok"}
@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException
-from src.models.response_models import InfoResponse
+from src.models.response_models import InfoResponse, CacheStatsResponse, RetentionStatsResponse, RouterStatsResponse
 from src.services.info_service import InfoService
 import traceback
 import logging
@@ -17,9 +17,45 @@ async def get_info(info_service: InfoService = Depends(get_info_service)):
     Returns information and configuration values for the app.
     """
     try:
-        config_values = info_service.get_config_values()
+        config_values = await info_service.get_config_values()
         return config_values
     except Exception as e:
         traceback.print_exc()
         logger.error("Error getting info: %s", str(e))
         raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
+
+@router.get("/cache", response_model=CacheStatsResponse)
+async def get_cache_stats(info_service: InfoService = Depends(get_info_service)):
+    """
+    Returns hit rates and latency savings of the query embedding and answer caches.
+    """
+    try:
+        return info_service.get_cache_stats()
+    except Exception as e:
+        traceback.print_exc()
+        logger.error("Error getting cache stats: %s", str(e))
+        raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
+
+@router.get("/retention", response_model=RetentionStatsResponse)
+async def get_retention_stats(info_service: InfoService = Depends(get_info_service)):
+    """
+    Returns the rows and bytes reclaimed from the checkpoint tables by the retention task.
+    """
+    try:
+        return info_service.get_retention_stats()
+    except Exception as e:
+        traceback.print_exc()
+        logger.error("Error getting retention stats: %s", str(e))
+        raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
+
+@router.get("/router", response_model=RouterStatsResponse)
+async def get_router_stats(info_service: InfoService = Depends(get_info_service)):
+    """
+    Returns the local retrieval router's decisions, its agreement with the LLM router and speculative retrieval counters.
+    """
+    try:
+        return info_service.get_router_stats()
+    except Exception as e:
+        traceback.print_exc()
+        logger.error("Error getting router stats: %s", str(e))
+        raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
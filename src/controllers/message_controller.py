@@ -1,6 +1,6 @@
 import traceback
-from typing import Annotated
-from fastapi import APIRouter, Depends, HTTPException, Header
+from typing import Annotated, Optional
+from fastapi import APIRouter, Depends, HTTPException, Header, Query
 from fastapi.responses import JSONResponse
 from src.models.response_models import MessageResponse, EmptyResponse
 from src.services.message_service import MessageService
@@ -10,16 +10,22 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
 def get_message_service() -> MessageService:
     return MessageService()
 
 @router.get("/", response_model=list[MessageResponse])
-async def get_messages(x_user_id: Annotated[str, Header()], message_service: MessageService = Depends(get_message_service)):
+async def get_messages(x_user_id: Annotated[str, Header()], before_step: Optional[int] = None,
+                       limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+                       message_service: MessageService = Depends(get_message_service)):
     """
-    Returns a list of messages for the given user.
+    Returns a page of messages for the given user, sorted by step: the newest `limit` messages before `before_step`.
+    Pass the step of the oldest returned message as `before_step` to fetch the previous page.
     """
     try:
-        messages = await message_service.get_user_messages(x_user_id)
+        messages = await message_service.get_user_messages(x_user_id, before_step, limit)
         if not messages:
             return JSONResponse([], status_code=200)
         return messages
@@ -1,27 +1,47 @@
-import psycopg_pool
+from typing import Optional
 from psycopg_pool import AsyncConnectionPool
 from contextlib import asynccontextmanager
 from src.config.config import app_config
 
 
-# Setup the connection pool (asynchronous)
+# Connection pool (asynchronous), created by open_pool so importing this module does no I/O
 DATABASE_URL = app_config.postgres.uri
 
-pool: AsyncConnectionPool = psycopg_pool.AsyncConnectionPool(
-    conninfo=app_config.postgres.uri,
-    max_size=app_config.postgres.max_pool_size,
-    kwargs={
-        "autocommit": app_config.postgres.autocommit,
-        "prepare_threshold": app_config.postgres.prepare_threshold
-    }
-)
+pool: Optional[AsyncConnectionPool] = None
+
+async def open_pool():
+    """
+    Create and open the connection pool. Called once from the application lifespan.
+    """
+    global pool
+    pool = AsyncConnectionPool(
+        conninfo=app_config.postgres.uri,
+        max_size=app_config.postgres.max_pool_size,
+        kwargs={
+            "autocommit": app_config.postgres.autocommit,
+            "prepare_threshold": app_config.postgres.prepare_threshold
+        },
+        open=False
+    )
+    await pool.open()
+
+async def close_pool():
+    global pool
+    if pool is not None:
+        await pool.close()
+        pool = None
+
+def get_pool() -> AsyncConnectionPool:
+    if pool is None:
+        raise RuntimeError("Database pool is not open. Was the application lifespan started?")
+    return pool
 
 @asynccontextmanager
 async def get_db_connection():
     """
     Context manager for managing database connections using the connection pool.
     """
-    async with pool.connection() as conn:
+    async with get_pool().connection() as conn:
         yield conn
 
 async def ping_db():
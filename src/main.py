@@ -1,3 +1,10 @@
+import asyncio
+from contextlib import asynccontextmanager
+from src.startup_timing import startup_timer
+
+# Time the imports of the application's modules below
+startup_timer.install()
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
@@ -10,6 +17,21 @@ from src.controllers.health_controller import router as health_router
 from src.controllers.info_controller import router as info_router
 from src.controllers.auth_controller import router as auth_router
 from src.config.config import app_config
+from src.database import open_pool, close_pool
+from src.services.chat_service import graph_manager
+from src.services.embedding_cache import query_embedding_cache
+from src.services.ingestion_queue import ingestion_queue
+from src.services.url_ingestion import url_ingestion_engine
+from src.repositories.conversation_repository import ConversationRepository
+from src.services.checkpoint_retention import checkpoint_retention
+from src.services.retrieval_router import retrieval_router
+from src.services.resources import resources
+from src.services.source_catalog import source_catalog
+from src.services.health_prober import health_prober
+from src.repositories.source_catalog_repository import SourceCatalogRepository
+from src.repositories.response_cache_repository import ResponseCacheRepository
+from src.repositories.ingestion_job_repository import IngestionJobRepository
+from src.services.response_cache import response_cache
 import logging
 
 load_dotenv()
@@ -18,11 +40,56 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Opens the database pool and compiles the chat graph once per process.
+    Provider clients are created in the background once the application is ready.
+    """
+    with startup_timer.measure("database pool"):
+        await open_pool()
+    with startup_timer.measure("chat graph"):
+        await graph_manager.start()
+    if app_config.postgres.run_migrations:
+        with startup_timer.measure("migrations"):
+            await query_embedding_cache.setup()
+            await url_ingestion_engine.setup()
+            await ConversationRepository().setup()
+            await SourceCatalogRepository().setup()
+            await ResponseCacheRepository().setup()
+            await IngestionJobRepository().setup()
+    with startup_timer.measure("background services"):
+        await source_catalog.start()
+        await response_cache.start()
+        await ingestion_queue.start()
+        await url_ingestion_engine.start()
+        if app_config.checkpoint_retention.enabled:
+            await checkpoint_retention.start()
+        if app_config.router.enabled:
+            await retrieval_router.start()
+        await health_prober.start()
+    startup_timer.report()
+    warm_up = asyncio.create_task(asyncio.to_thread(resources.warm_up))
+    yield
+    await warm_up
+    await health_prober.stop()
+    await retrieval_router.stop()
+    await source_catalog.stop()
+    await checkpoint_retention.stop()
+    await ingestion_queue.stop()
+    await response_cache.stop()
+    await url_ingestion_engine.stop()
+    await graph_manager.stop()
+    await resources.close()
+    await close_pool()
+
+
 app = FastAPI(
     title=app_config.info.title,
     description=app_config.info.description,
     version=app_config.info.version,
-    docs_url="/"
+    docs_url="/",
+    lifespan=lifespan
 )
 
 
@@ -1,5 +1,6 @@
 
-from typing import Literal
+from datetime import datetime
+from typing import Literal, Optional
 from pydantic import BaseModel
 
 
@@ -13,9 +14,56 @@ class EmptyResponse(BaseModel):
 class DocumentResponse(BaseModel):
     message: str
 
+class SourceResponse(BaseModel):
+    source_key: str
+    source_label: str
+    type: str
+    chunk_count: int
+    byte_size: int
+    ingested_at: datetime
+
+class SourcePageResponse(BaseModel):
+    total: int
+    sources: list[SourceResponse]
+
+class JobStageResponse(BaseModel):
+    status: str
+    completed: int
+    total: int
+
+class JobResponse(BaseModel):
+    id: str
+    type: str
+    label: str
+    status: str
+    stages: dict[str, JobStageResponse]
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+class DependencyHealth(BaseModel):
+    status: Literal["up", "down", "unknown"]
+    latency_ms: Optional[float] = None
+    checked_at: Optional[datetime] = None
+    error: Optional[str] = None
+
+class PoolHealth(BaseModel):
+    size: int
+    available: int
+    max_size: int
+    waiting: int
+    saturation: float
+
 class HealthResponse(BaseModel):
-    vector_store: Literal["up", "down"]
-    db: Literal["up", "down"]
+    vector_store: Literal["up", "down", "unknown"]
+    db: Literal["up", "down", "unknown"]
+    llm_provider: Literal["up", "down", "unknown"]
+    dependencies: dict[str, DependencyHealth]
+    pool: Optional[PoolHealth] = None
+
+class LivenessResponse(BaseModel):
+    status: Literal["ok"]
 
 class InfoResponse(BaseModel):
     llm_provider: str
@@ -27,6 +75,57 @@ class InfoResponse(BaseModel):
     vector_dimension: int
     sources: list[str]
 
+class EmbeddingCacheStats(BaseModel):
+    size: int
+    max_size: int
+    hits: int
+    shared_hits: int
+    misses: int
+    hit_rate: float
+
+class ResponseCacheStats(BaseModel):
+    size: int
+    max_size: int
+    hits: int
+    misses: int
+    hit_rate: float
+    invalidations: int
+    avg_hit_latency_seconds: float
+    avg_miss_latency_seconds: float
+    latency_saved_seconds: float
+
+class CacheStatsResponse(BaseModel):
+    query_embeddings: EmbeddingCacheStats
+    responses: ResponseCacheStats
+
+class SpeculativeRetrievalStats(BaseModel):
+    enabled: bool
+    started: int
+    used: int
+    mismatched: int
+    unneeded: int
+    failed: int
+    waste_rate: float
+
+class RouterStatsResponse(BaseModel):
+    enabled: bool
+    sources: int
+    decisions: dict[str, int]
+    compared: int
+    agreement_rate: float
+    speculative_retrieval: SpeculativeRetrievalStats
+
+class ReclaimedStats(BaseModel):
+    rows: int
+    bytes: int
+
+class RetentionStatsResponse(BaseModel):
+    enabled: bool
+    runs: int
+    last_run_at: Optional[datetime] = None
+    last_run_seconds: float
+    reclaimed: dict[str, ReclaimedStats]
+
 class MessageSource(BaseModel):
     source_key: str
     source_label: str
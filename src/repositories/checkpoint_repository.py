@@ -0,0 +1,172 @@
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import AsyncIterator, List, Tuple
+from src.database import get_db_connection
+
+
+# Arbitrary application-wide key so a single worker runs retention at a time
+RETENTION_LOCK_KEY = 7_315_001
+
+# On-disk size of the columns that dominate each table, including TOASTed storage
+ROW_SIZE_EXPRESSIONS = {
+    "checkpoints": "pg_column_size(checkpoint) + pg_column_size(metadata)",
+    "checkpoint_writes": "COALESCE(pg_column_size(blob), 0)",
+    "checkpoint_blobs": "COALESCE(pg_column_size(blob), 0)",
+    "conversation_messages": "pg_column_size(content) + pg_column_size(sources)"
+}
+
+
+class CheckpointRepository:
+    """
+    Batched maintenance queries on the LangGraph checkpointer tables.
+    Every delete removes at most `batch_size` rows, picked by ctid, in its own short transaction,
+    and returns the number of rows and bytes it reclaimed.
+    """
+    def __init__(self):
+        pass
+
+    @asynccontextmanager
+    async def exclusive_run(self) -> AsyncIterator[bool]:
+        """
+        Holds a session-level advisory lock for the duration of the block. Yields False if another worker holds it.
+        """
+        async with get_db_connection() as conn:
+            cursor = await conn.execute("SELECT pg_try_advisory_lock(%s);", (RETENTION_LOCK_KEY,))
+            acquired = (await cursor.fetchone())[0]
+            try:
+                yield acquired
+            finally:
+                if acquired:
+                    await conn.execute("SELECT pg_advisory_unlock(%s);", (RETENTION_LOCK_KEY,))
+
+    async def get_idle_threads(self, idle_seconds: int, limit: int) -> List[str]:
+        """
+        Fetches up to `limit` threads without messages for `idle_seconds`, least recently active first.
+        Activity is read from conversation_threads, which the chat history keeps up to date.
+        """
+        query = """
+        SELECT thread_id
+        FROM conversation_threads
+        WHERE last_message_at < now() - make_interval(secs => %s)
+        ORDER BY last_message_at
+        LIMIT %s;
+        """
+        async with get_db_connection() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(query, (idle_seconds, limit))
+                rows = await cursor.fetchall()
+
+        return [row[0] for row in rows]
+
+    async def get_uncompacted_threads(self, idle_seconds: int, limit: int) -> List[Tuple[str, datetime]]:
+        """
+        Fetches up to `limit` threads idle for `idle_seconds` with messages since they were last compacted,
+        with the time of their latest message.
+        """
+        query = """
+        SELECT thread_id, last_message_at
+        FROM conversation_threads
+        WHERE (compacted_through IS NULL OR compacted_through < last_message_at)
+            AND last_message_at < now() - make_interval(secs => %s)
+        ORDER BY last_message_at
+        LIMIT %s;
+        """
+        async with get_db_connection() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(query, (idle_seconds, limit))
+                rows = await cursor.fetchall()
+
+        return [(row[0], row[1]) for row in rows]
+
+    async def mark_compacted(self, thread_id: str, compacted_through: datetime):
+        """
+        Records that the thread's checkpoints up to its message at `compacted_through` are compacted.
+        A newer message makes the thread a candidate again.
+        """
+        query = """
+        UPDATE conversation_threads
+        SET compacted_through = %s
+        WHERE thread_id = %s;
+        """
+        async with get_db_connection() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(query, (compacted_through, thread_id))
+
+    async def forget_thread(self, thread_id: str):
+        """
+        Removes the activity row of a thread whose rows were all deleted.
+        """
+        query = """
+        DELETE FROM conversation_threads
+        WHERE thread_id = %s;
+        """
+        async with get_db_connection() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(query, (thread_id,))
+
+    async def _delete_batch(self, table: str, where: str, params: dict) -> Tuple[int, int]:
+        query = f"""
+        WITH deleted AS (
+            DELETE FROM {table}
+            WHERE ctid = ANY(ARRAY(
+                SELECT ctid FROM {table} t
+                WHERE {where}
+                LIMIT %(batch_size)s
+            ))
+            RETURNING {ROW_SIZE_EXPRESSIONS[table]} AS size
+        )
+        SELECT count(*), COALESCE(sum(size), 0)
+        FROM deleted;
+        """
+        async with get_db_connection() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(query, params)
+                rows, size = await cursor.fetchone()
+        return rows, int(size)
+
+    async def prune_checkpoints(self, thread_id: str, keep: int, batch_size: int) -> Tuple[int, int]:
+        """
+        Deletes a batch of checkpoints older than the latest `keep` of each namespace in the thread.
+        """
+        where = """
+        t.thread_id = %(thread_id)s AND t.checkpoint_id < (
+            SELECT c.checkpoint_id FROM checkpoints c
+            WHERE c.thread_id = t.thread_id AND c.checkpoint_ns = t.checkpoint_ns
+            ORDER BY c.checkpoint_id DESC
+            OFFSET %(offset)s LIMIT 1
+        )
+        """
+        return await self._delete_batch("checkpoints", where, {"thread_id": thread_id, "offset": keep - 1, "batch_size": batch_size})
+
+    async def prune_writes(self, thread_id: str, batch_size: int) -> Tuple[int, int]:
+        """
+        Deletes a batch of pending writes that belong to neither a remaining checkpoint nor its parent,
+        whose writes are read as the checkpoint's pending sends.
+        """
+        where = """
+        t.thread_id = %(thread_id)s AND NOT EXISTS (
+            SELECT 1 FROM checkpoints c
+            WHERE c.thread_id = t.thread_id AND c.checkpoint_ns = t.checkpoint_ns
+                AND (c.checkpoint_id = t.checkpoint_id OR c.parent_checkpoint_id = t.checkpoint_id)
+        )
+        """
+        return await self._delete_batch("checkpoint_writes", where, {"thread_id": thread_id, "batch_size": batch_size})
+
+    async def prune_blobs(self, thread_id: str, batch_size: int) -> Tuple[int, int]:
+        """
+        Deletes a batch of channel values no remaining checkpoint references in its channel_versions.
+        """
+        where = """
+        t.thread_id = %(thread_id)s AND NOT EXISTS (
+            SELECT 1 FROM checkpoints c
+            WHERE c.thread_id = t.thread_id AND c.checkpoint_ns = t.checkpoint_ns
+                AND c.checkpoint->'channel_versions'->>t.channel = t.version
+        )
+        """
+        return await self._delete_batch("checkpoint_blobs", where, {"thread_id": thread_id, "batch_size": batch_size})
+
+    async def delete_thread(self, table: str, thread_id: str, batch_size: int) -> Tuple[int, int]:
+        """
+        Deletes a batch of the thread's rows from one of the tables.
+        """
+        return await self._delete_batch(table, "t.thread_id = %(thread_id)s", {"thread_id": thread_id, "batch_size": batch_size})
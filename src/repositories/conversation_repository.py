@@ -0,0 +1,185 @@
+from typing import Any, Dict, List, Optional, Tuple
+from psycopg.types.json import Jsonb
+from src.database import get_db_connection
+
+
+def unprojected_history(messages: List[Dict[str, Any]], projected: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+    """
+    Returns the checkpoint messages that precede the thread's projected history. The projection starts where
+    the longest tail of `messages` matching the oldest `projected` (role, content) pairs begins, so messages
+    already projected, by the chat or by an earlier backfill, are never inserted again.
+    """
+    if not projected:
+        return messages
+    keys = [(message["role"], message["content"]) for message in messages]
+    for start in range(len(keys)):
+        overlap = keys[start:start + len(projected)]
+        if overlap == projected[:len(overlap)]:
+            return messages[:start]
+    return messages
+
+
+class ConversationRepository:
+    """
+    Compact projection of the chat history shown to users, one row per message.
+    Steps are positions within a thread, assigned under a per-thread advisory lock.
+    conversation_threads keeps each thread's latest message time, so checkpoint retention finds idle threads
+    with an index scan instead of aggregating the checkpoints.
+    """
+    def __init__(self):
+        pass
+
+    async def setup(self):
+        queries = [
+            """
+            CREATE TABLE IF NOT EXISTS conversation_messages (
+                id BIGSERIAL PRIMARY KEY,
+                thread_id TEXT NOT NULL,
+                step INTEGER NOT NULL,
+                role TEXT NOT NULL,
+                content TEXT NOT NULL,
+                sources JSONB NOT NULL DEFAULT '[]',
+                created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            );
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS conversation_messages_thread_step_idx
+            ON conversation_messages (thread_id, step DESC);
+            """,
+            """
+            CREATE TABLE IF NOT EXISTS conversation_threads (
+                thread_id TEXT PRIMARY KEY,
+                last_message_at TIMESTAMPTZ NOT NULL,
+                compacted_through TIMESTAMPTZ
+            );
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS conversation_threads_last_message_at_idx
+            ON conversation_threads (last_message_at);
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS conversation_threads_uncompacted_idx
+            ON conversation_threads (last_message_at)
+            WHERE compacted_through IS NULL OR compacted_through < last_message_at;
+            """
+        ]
+        async with get_db_connection() as conn:
+            async with conn.cursor() as cursor:
+                for query in queries:
+                    await cursor.execute(query)
+
+    async def get_messages(self, thread_id: str, before_step: Optional[int] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Fetches the `limit` newest messages of a thread older than `before_step`, newest first.
+        """
+        step_filter = "AND step < %(before_step)s" if before_step is not None else ""
+        query = f"""
+        SELECT id, thread_id, step, role, content, sources
+        FROM conversation_messages
+        WHERE thread_id = %(thread_id)s {step_filter}
+        ORDER BY step DESC
+        LIMIT %(limit)s;
+        """
+        async with get_db_connection() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(query, {"thread_id": thread_id, "before_step": before_step, "limit": limit})
+                rows = await cursor.fetchall()
+
+        return [
+            {"id": str(row[0]), "thread_id": row[1], "step": row[2], "role": row[3], "content": row[4], "sources": row[5]}
+            for row in rows
+        ]
+
+    async def append_exchange(self, thread_id: str, question: str, answer: str, sources: List[dict]):
+        """
+        Appends a question and its answer at the next two steps of the thread.
+        """
+        async with get_db_connection() as conn:
+            async with conn.transaction():
+                await conn.execute("SELECT pg_advisory_xact_lock(hashtext(%s));", (thread_id,))
+                cursor = await conn.execute(
+                    "SELECT COALESCE(MAX(step), -1) + 1 FROM conversation_messages WHERE thread_id = %s;", (thread_id,)
+                )
+                step = (await cursor.fetchone())[0]
+                async with conn.cursor() as cursor:
+                    await cursor.executemany(
+                        """
+                        INSERT INTO conversation_messages (thread_id, step, role, content, sources)
+                        VALUES (%s, %s, %s, %s, %s);
+                        """,
+                        [
+                            (thread_id, step, "user", question, Jsonb([])),
+                            (thread_id, step + 1, "ai", answer, Jsonb(sources))
+                        ]
+                    )
+                await conn.execute(
+                    """
+                    INSERT INTO conversation_threads (thread_id, last_message_at) VALUES (%s, now())
+                    ON CONFLICT (thread_id) DO UPDATE SET last_message_at = EXCLUDED.last_message_at;
+                    """,
+                    (thread_id,)
+                )
+
+    async def backfill_thread(self, thread_id: str, messages: List[Dict[str, Any]]) -> int:
+        """
+        Inserts messages recovered from checkpoints ahead of the thread's projected messages.
+        Messages that overlap the start of the projection are skipped, so running it again is a no-op.
+        The thread's latest message time is recorded for checkpoint retention. Returns the number of inserted messages.
+        """
+        async with get_db_connection() as conn:
+            async with conn.transaction():
+                await conn.execute("SELECT pg_advisory_xact_lock(hashtext(%s));", (thread_id,))
+                if messages:
+                    await conn.execute(
+                        """
+                        INSERT INTO conversation_threads (thread_id, last_message_at) VALUES (%s, %s)
+                        ON CONFLICT (thread_id)
+                        DO UPDATE SET last_message_at = GREATEST(conversation_threads.last_message_at, EXCLUDED.last_message_at);
+                        """,
+                        (thread_id, max(message["created_at"] for message in messages))
+                    )
+                # Checkpoint timestamps precede the projected rows' created_at, so overlap is found by content
+                cursor = await conn.execute(
+                    """
+                    SELECT role, content FROM conversation_messages
+                    WHERE thread_id = %s
+                    ORDER BY step
+                    LIMIT %s;
+                    """,
+                    (thread_id, len(messages))
+                )
+                messages = unprojected_history(messages, [tuple(row) for row in await cursor.fetchall()])
+                if not messages:
+                    return 0
+
+                await conn.execute(
+                    "UPDATE conversation_messages SET step = step + %s WHERE thread_id = %s;", (len(messages), thread_id)
+                )
+                async with conn.cursor() as cursor:
+                    await cursor.executemany(
+                        """
+                        INSERT INTO conversation_messages (thread_id, step, role, content, sources, created_at)
+                        VALUES (%s, %s, %s, %s, %s, %s);
+                        """,
+                        [
+                            (thread_id, step, message["role"], message["content"], Jsonb(message["sources"]), message["created_at"])
+                            for step, message in enumerate(messages)
+                        ]
+                    )
+                return len(messages)
+
+    async def delete_messages(self, thread_id: str):
+        queries = [
+            """
+            DELETE FROM conversation_messages
+            WHERE thread_id = %s;
+            """,
+            """
+            DELETE FROM conversation_threads
+            WHERE thread_id = %s;
+            """
+        ]
+        async with get_db_connection() as conn:
+            async with conn.cursor() as cursor:
+                for query in queries:
+                    await cursor.execute(query, (thread_id,))
@@ -0,0 +1,81 @@
+from datetime import datetime
+from typing import Any, Dict, Optional
+from psycopg.types.json import Jsonb
+from src.database import get_db_connection
+
+
+class IngestionJobRepository:
+    """
+    Latest status and per-stage progress of each ingestion job, so any worker can answer a status poll.
+    """
+    def __init__(self):
+        pass
+
+    async def setup(self):
+        queries = [
+            """
+            CREATE TABLE IF NOT EXISTS ingestion_jobs (
+                id TEXT PRIMARY KEY,
+                type TEXT NOT NULL,
+                label TEXT NOT NULL,
+                status TEXT NOT NULL,
+                stages JSONB NOT NULL,
+                error TEXT,
+                created_at TIMESTAMPTZ NOT NULL,
+                started_at TIMESTAMPTZ,
+                finished_at TIMESTAMPTZ
+            );
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS ingestion_jobs_finished_at_idx
+            ON ingestion_jobs (finished_at)
+            WHERE finished_at IS NOT NULL;
+            """
+        ]
+        async with get_db_connection() as conn:
+            async with conn.cursor() as cursor:
+                for query in queries:
+                    await cursor.execute(query)
+
+    async def save_job(self, job: Dict[str, Any]):
+        """
+        Inserts or overwrites a job's snapshot, as produced by `JobResponse.model_dump()`.
+        """
+        query = """
+        INSERT INTO ingestion_jobs (id, type, label, status, stages, error, created_at, started_at, finished_at)
+        VALUES (%(id)s, %(type)s, %(label)s, %(status)s, %(stages)s, %(error)s, %(created_at)s, %(started_at)s, %(finished_at)s)
+        ON CONFLICT (id)
+        DO UPDATE SET status = EXCLUDED.status, stages = EXCLUDED.stages, error = EXCLUDED.error,
+            started_at = EXCLUDED.started_at, finished_at = EXCLUDED.finished_at;
+        """
+        async with get_db_connection() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(query, {**job, "stages": Jsonb(job["stages"])})
+
+    async def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        query = """
+        SELECT id, type, label, status, stages, error, created_at, started_at, finished_at
+        FROM ingestion_jobs
+        WHERE id = %s;
+        """
+        async with get_db_connection() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(query, (job_id,))
+                row = await cursor.fetchone()
+
+        if row is None:
+            return None
+        return {
+            "id": row[0], "type": row[1], "label": row[2], "status": row[3], "stages": row[4], "error": row[5],
+            "created_at": row[6], "started_at": row[7], "finished_at": row[8]
+        }
+
+    async def delete_finished_jobs(self, finished_before: datetime) -> int:
+        query = """
+        DELETE FROM ingestion_jobs
+        WHERE finished_at < %s;
+        """
+        async with get_db_connection() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(query, (finished_before,))
+                return cursor.rowcount
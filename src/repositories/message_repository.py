@@ -2,48 +2,128 @@ from typing import List, Dict, Any
 from src.database import get_db_connection
 
 
+# Checkpoints whose metadata holds a message shown in the history: the user question or an answer
+MESSAGE_WRITES_FILTER = "metadata->'writes' ?| array['__start__', 'direct_response', 'generate']"
+
+
 class MessageRepository:
     def __init__(self):
         pass
 
-    async def get_messages_by_user(self, user_id: str) -> List[Dict[str, Any]]:
+    async def create_backfill_indexes(self):
         """
-        Fetches all messages from the "checkpoints" table where thread_id matches user_id.
-        Also retrieves the metadata column.
+        Creates the partial expression indexes backing the checkpoint history query. They only serve the
+        one-off history backfill, so they are built before it and dropped after it rather than kept on the
+        checkpoints table, which every graph step writes to.
         """
+        queries = [
+            f"""
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS checkpoints_thread_messages_idx
+            ON checkpoints (thread_id, checkpoint_ns, ((metadata->>'step')::int) DESC)
+            WHERE {MESSAGE_WRITES_FILTER};
+            """,
+            """
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS checkpoints_thread_tools_idx
+            ON checkpoints (thread_id, checkpoint_ns, ((metadata->>'step')::int))
+            WHERE metadata->'writes' ? 'tools';
+            """
+        ]
+        async with get_db_connection() as conn:
+            for query in queries:
+                await conn.execute(query)
+
+    async def drop_backfill_indexes(self):
+        queries = [
+            "DROP INDEX CONCURRENTLY IF EXISTS checkpoints_thread_messages_idx;",
+            "DROP INDEX CONCURRENTLY IF EXISTS checkpoints_thread_tools_idx;"
+        ]
+        async with get_db_connection() as conn:
+            for query in queries:
+                await conn.execute(query)
+
+    async def get_thread_ids(self) -> List[str]:
         query = """
-        SELECT checkpoint_id, thread_id, metadata
-        FROM checkpoints
-        WHERE thread_id = %s;
+        SELECT DISTINCT thread_id
+        FROM checkpoints;
+        """
+        async with get_db_connection() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(query)
+                rows = await cursor.fetchall()
+
+        return [row[0] for row in rows]
+
+    async def get_checkpoint_messages(self, user_id: str) -> List[Dict[str, Any]]:
+        """
+        Recovers the messages of a thread from the "checkpoints" table where thread_id matches user_id, oldest first.
+        Only checkpoints that wrote a question or an answer are read, and only the fields the history needs are
+        extracted from their metadata. Answers from the "generate" node carry the sources of the retrieval
+        ("tools") checkpoint one step before them.
+        """
+        query = f"""
+        SELECT p.checkpoint_id, p.thread_id, p.step, p.node,
+            COALESCE(m.message->'kwargs'->>'content', m.message->>'content') AS content,
+            COALESCE(m.message->'kwargs'->>'type', m.message->>'role') AS type,
+            s.sources, p.created_at
+        FROM (
+            SELECT checkpoint_id, thread_id, checkpoint_ns, (metadata->>'step')::int AS step,
+                CASE
+                    WHEN metadata->'writes' ? '__start__' THEN '__start__'
+                    WHEN metadata->'writes' ? 'direct_response' THEN 'direct_response'
+                    ELSE 'generate'
+                END AS node,
+                metadata->'writes' AS writes,
+                (checkpoint->>'ts')::timestamptz AS created_at
+            FROM checkpoints
+            WHERE thread_id = %(user_id)s AND checkpoint_ns = ''
+                AND {MESSAGE_WRITES_FILTER}
+        ) p
+        CROSS JOIN LATERAL (
+            SELECT p.writes->p.node->'messages'->0 AS message
+        ) m
+        LEFT JOIN LATERAL (
+            SELECT jsonb_agg(jsonb_build_object(
+                'source_key', artifact->'kwargs'->'metadata'->>'source_key',
+                'source_label', artifact->'kwargs'->'metadata'->>'source_label'
+            )) AS sources
+            FROM checkpoints t
+            CROSS JOIN LATERAL jsonb_array_elements(
+                CASE WHEN jsonb_typeof(t.metadata->'writes'->'tools'->'messages'->0->'kwargs'->'artifact') = 'array'
+                    THEN t.metadata->'writes'->'tools'->'messages'->0->'kwargs'->'artifact'
+                    ELSE '[]'::jsonb END
+            ) AS artifact
+            WHERE p.node = 'generate' AND t.thread_id = p.thread_id AND t.checkpoint_ns = p.checkpoint_ns
+                AND t.metadata->'writes' ? 'tools'
+                AND (t.metadata->>'step')::int = p.step - 1
+        ) s ON true
+        ORDER BY p.step;
         """
         async with get_db_connection() as conn:
             async with conn.cursor() as cursor:
-                await cursor.execute(query, (user_id,))
+                await cursor.execute(query, {"user_id": user_id})
                 rows = await cursor.fetchall()
 
-        # Mapping the result to a more understandable structure
-        return [{"id": row[0], "thread_id": row[1], "metadata": row[2]} for row in rows]
+        return [
+            {"id": row[0], "thread_id": row[1], "step": row[2], "node": row[3], "content": row[4], "type": row[5],
+             "sources": row[6] or [], "created_at": row[7]}
+            for row in rows
+        ]
     
     async def delete_all_messages(self, user_id: str):
         """
-        Deletes all messages from the "checkpoints" table where thread_id matches user_id.
+        Deletes all checkpoints, writes and blobs where thread_id matches user_id, in a single statement.
         """
-        queries = [
-            """
+        query = """
+        WITH deleted_checkpoints AS (
             DELETE FROM checkpoints
-            WHERE thread_id = %s;
-            """,
-            """
+            WHERE thread_id = %(user_id)s
+        ), deleted_writes AS (
             DELETE FROM checkpoint_writes
-            WHERE thread_id = %s;
-            """,
-            """
-            DELETE FROM checkpoint_blobs
-            WHERE thread_id = %s;
-            """
-        ]
+            WHERE thread_id = %(user_id)s
+        )
+        DELETE FROM checkpoint_blobs
+        WHERE thread_id = %(user_id)s;
+        """
         async with get_db_connection() as conn:
             async with conn.cursor() as cursor:
-                for query in queries:
-                    await cursor.execute(query, (user_id,))
-                await conn.commit()  # Commit transaction
+                await cursor.execute(query, {"user_id": user_id})
@@ -0,0 +1,45 @@
+from src.database import get_db_connection
+
+
+class ResponseCacheRepository:
+    """
+    Generation counter of the semantic response caches, bumped whenever the corpus changes so every worker drops its answers.
+    """
+    def __init__(self):
+        pass
+
+    async def setup(self):
+        queries = [
+            """
+            CREATE TABLE IF NOT EXISTS response_cache_generation (
+                id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+                generation BIGINT NOT NULL DEFAULT 0
+            );
+            """,
+            """
+            INSERT INTO response_cache_generation (id) VALUES (TRUE)
+            ON CONFLICT (id) DO NOTHING;
+            """
+        ]
+        async with get_db_connection() as conn:
+            async with conn.cursor() as cursor:
+                for query in queries:
+                    await cursor.execute(query)
+
+    async def get_generation(self) -> int:
+        async with get_db_connection() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute("SELECT generation FROM response_cache_generation;")
+                row = await cursor.fetchone()
+        return row[0] if row else 0
+
+    async def bump_generation(self) -> int:
+        query = """
+        UPDATE response_cache_generation SET generation = generation + 1
+        RETURNING generation;
+        """
+        async with get_db_connection() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(query)
+                row = await cursor.fetchone()
+        return row[0] if row else 0
@@ -0,0 +1,186 @@
+from typing import Any, Dict, List, Optional, Tuple
+from src.database import get_db_connection
+
+
+class SourceCatalogRepository:
+    """
+    One row per ingested source with its chunk count and size, maintained on every ingestion and delete.
+    """
+    def __init__(self):
+        pass
+
+    async def setup(self):
+        queries = [
+            """
+            CREATE TABLE IF NOT EXISTS source_catalog (
+                source_key TEXT PRIMARY KEY,
+                source_label TEXT NOT NULL,
+                type TEXT NOT NULL,
+                chunk_count INTEGER NOT NULL,
+                byte_size BIGINT NOT NULL,
+                ingested_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            );
+            """,
+            """
+            ALTER TABLE source_catalog ADD COLUMN IF NOT EXISTS vector_sum DOUBLE PRECISION[];
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS source_catalog_label_idx
+            ON source_catalog (source_label);
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS source_catalog_ingested_at_idx
+            ON source_catalog (ingested_at DESC, source_key);
+            """
+        ]
+        async with get_db_connection() as conn:
+            async with conn.cursor() as cursor:
+                for query in queries:
+                    await cursor.execute(query)
+
+    async def save_source(self, source_key: str, source_label: str, type: str, chunk_count: int, byte_size: int,
+                          vector_sum: Optional[List[float]], replace_vector_sum: bool):
+        """
+        Inserts or updates a source. With `replace_vector_sum` the given vector sum is the source's total,
+        otherwise it is added to the stored one, element-wise and atomically. A source added without its
+        total keeps a NULL vector sum until the backfill computes it.
+        """
+        query = """
+        INSERT INTO source_catalog (source_key, source_label, type, chunk_count, byte_size, ingested_at, vector_sum)
+        VALUES (%(source_key)s, %(source_label)s, %(type)s, %(chunk_count)s, %(byte_size)s, now(),
+            CASE WHEN %(replace)s THEN %(vector_sum)s::float8[] END)
+        ON CONFLICT (source_key)
+        DO UPDATE SET source_label = EXCLUDED.source_label, type = EXCLUDED.type, chunk_count = EXCLUDED.chunk_count,
+            byte_size = EXCLUDED.byte_size, ingested_at = EXCLUDED.ingested_at,
+            vector_sum = CASE
+                WHEN %(replace)s THEN EXCLUDED.vector_sum
+                WHEN %(vector_sum)s::float8[] IS NULL THEN source_catalog.vector_sum
+                WHEN source_catalog.vector_sum IS NULL THEN NULL
+                ELSE (
+                    SELECT array_agg(sums.stored + sums.delta ORDER BY sums.i)
+                    FROM unnest(source_catalog.vector_sum, %(vector_sum)s::float8[]) WITH ORDINALITY AS sums(stored, delta, i)
+                )
+            END;
+        """
+        params = {
+            "source_key": source_key,
+            "source_label": source_label,
+            "type": type,
+            "chunk_count": chunk_count,
+            "byte_size": byte_size,
+            "vector_sum": vector_sum,
+            "replace": replace_vector_sum
+        }
+        async with get_db_connection() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(query, params)
+
+    async def save_sources(self, sources: List[Dict[str, Any]]):
+        """
+        Inserts or replaces many sources, keeping their ingested_at. Used by the backfill.
+        """
+        query = """
+        INSERT INTO source_catalog (source_key, source_label, type, chunk_count, byte_size, ingested_at, vector_sum)
+        VALUES (%(source_key)s, %(source_label)s, %(type)s, %(chunk_count)s, %(byte_size)s, %(ingested_at)s, %(vector_sum)s)
+        ON CONFLICT (source_key)
+        DO UPDATE SET source_label = EXCLUDED.source_label, type = EXCLUDED.type, chunk_count = EXCLUDED.chunk_count,
+            byte_size = EXCLUDED.byte_size, ingested_at = EXCLUDED.ingested_at, vector_sum = EXCLUDED.vector_sum;
+        """
+        async with get_db_connection() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.executemany(query, sources)
+
+    async def delete_source(self, source_key: str):
+        query = """
+        DELETE FROM source_catalog
+        WHERE source_key = %s;
+        """
+        async with get_db_connection() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(query, (source_key,))
+
+    async def delete_sources_by_label(self, source_label: str):
+        query = """
+        DELETE FROM source_catalog
+        WHERE source_label = %s;
+        """
+        async with get_db_connection() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(query, (source_label,))
+
+    async def has_sources(self) -> bool:
+        query = """
+        SELECT EXISTS (SELECT 1 FROM source_catalog);
+        """
+        async with get_db_connection() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(query)
+                row = await cursor.fetchone()
+
+        return row[0]
+
+    async def get_source_labels(self) -> List[str]:
+        """
+        Fetches the distinct source labels, oldest source first.
+        """
+        query = """
+        SELECT source_label
+        FROM source_catalog
+        GROUP BY source_label
+        ORDER BY min(ingested_at);
+        """
+        async with get_db_connection() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(query)
+                rows = await cursor.fetchall()
+
+        return [row[0] for row in rows]
+
+    async def get_vector_sums(self) -> List[Dict[str, Any]]:
+        """
+        Fetches the vector sum and chunk count of every source that has one.
+        """
+        query = """
+        SELECT source_key, source_label, chunk_count, vector_sum
+        FROM source_catalog
+        WHERE vector_sum IS NOT NULL AND chunk_count > 0;
+        """
+        async with get_db_connection() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(query)
+                rows = await cursor.fetchall()
+
+        return [
+            {"source_key": row[0], "source_label": row[1], "chunk_count": row[2], "vector_sum": row[3]}
+            for row in rows
+        ]
+
+    async def get_sources(self, offset: int, limit: int) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Fetches a page of sources, most recently ingested first, and the total number of sources.
+        """
+        query = """
+        SELECT source_key, source_label, type, chunk_count, byte_size, ingested_at
+        FROM source_catalog
+        ORDER BY ingested_at DESC, source_key
+        OFFSET %s LIMIT %s;
+        """
+        async with get_db_connection() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(query, (offset, limit))
+                rows = await cursor.fetchall()
+                await cursor.execute("SELECT count(*) FROM source_catalog;")
+                total = (await cursor.fetchone())[0]
+
+        sources = [
+            {
+                "source_key": row[0],
+                "source_label": row[1],
+                "type": row[2],
+                "chunk_count": row[3],
+                "byte_size": row[4],
+                "ingested_at": row[5]
+            }
+            for row in rows
+        ]
+        return sources, total
@@ -0,0 +1,65 @@
+from typing import Any, Dict, List, Optional
+from src.database import get_db_connection
+
+
+class SourceFetchRepository:
+    """
+    Validators and content hash of the last successful fetch of each URL source.
+    """
+    def __init__(self):
+        pass
+
+    async def setup(self):
+        query = """
+        CREATE TABLE IF NOT EXISTS source_fetch_state (
+            source_key TEXT PRIMARY KEY,
+            url TEXT NOT NULL,
+            etag TEXT,
+            last_modified TEXT,
+            content_hash TEXT NOT NULL,
+            fetched_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        );
+        """
+        async with get_db_connection() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(query)
+
+    async def get_fetch_states(self, source_keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Fetches the stored fetch state of the given sources, keyed by source key.
+        """
+        query = """
+        SELECT source_key, etag, last_modified, content_hash
+        FROM source_fetch_state
+        WHERE source_key = ANY(%s);
+        """
+        async with get_db_connection() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(query, (source_keys,))
+                rows = await cursor.fetchall()
+
+        return {row[0]: {"etag": row[1], "last_modified": row[2], "content_hash": row[3]} for row in rows}
+
+    async def save_fetch_state(self, source_key: str, url: str, etag: Optional[str], last_modified: Optional[str], content_hash: str):
+        query = """
+        INSERT INTO source_fetch_state (source_key, url, etag, last_modified, content_hash, fetched_at)
+        VALUES (%s, %s, %s, %s, %s, now())
+        ON CONFLICT (source_key)
+        DO UPDATE SET etag = EXCLUDED.etag, last_modified = EXCLUDED.last_modified,
+            content_hash = EXCLUDED.content_hash, fetched_at = EXCLUDED.fetched_at;
+        """
+        async with get_db_connection() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(query, (source_key, url, etag, last_modified, content_hash))
+
+    async def delete_fetch_state_by_url(self, url: str):
+        """
+        Forgets a source's fetch state so the next ingestion fetches and embeds it in full.
+        """
+        query = """
+        DELETE FROM source_fetch_state
+        WHERE url = %s;
+        """
+        async with get_db_connection() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(query, (url,))
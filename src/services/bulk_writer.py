@@ -0,0 +1,161 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Iterable, Iterator, List
+
+from src.config.config import app_config
+
+logger = logging.getLogger(__name__)
+
+
+class BulkWriteStats:
+    """
+    Counters of one bulk write, safe to update from the writer's threads.
+    """
+    def __init__(self):
+        self.documents = 0
+        self.batches = 0
+        self.retries = 0
+        self.started_at = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def add_batch(self, documents: int):
+        with self._lock:
+            self.documents += documents
+            self.batches += 1
+
+    def add_retry(self):
+        with self._lock:
+            self.retries += 1
+
+    @property
+    def elapsed_seconds(self) -> float:
+        return time.perf_counter() - self.started_at
+
+    @property
+    def documents_per_second(self) -> float:
+        elapsed = self.elapsed_seconds
+        return self.documents / elapsed if elapsed > 0 else 0.0
+
+
+class BulkWriter:
+    """
+    Writes a stream of documents in batches of `batch_size`, with up to `concurrency` requests in flight.
+    Documents are consumed lazily, so only the batches in flight are held in memory. A batch that fails with
+    an error accepted by `is_retryable` is sent again after an exponential backoff; the documents must carry
+    deterministic IDs and the insert must treat already stored IDs as written, so a retry never duplicates
+    the part of a batch that made it through. Throughput is logged when the write completes.
+    """
+    def __init__(self, batch_size: int, concurrency: int, max_retries: int, retry_backoff_seconds: float):
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.retry_backoff_seconds = retry_backoff_seconds
+
+    def _batched(self, documents: Iterable[dict]) -> Iterator[List[dict]]:
+        batch = []
+        for document in documents:
+            batch.append(document)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _should_retry(self, error: Exception, attempt: int, is_retryable: Callable[[Exception], bool],
+                      stats: BulkWriteStats) -> bool:
+        if attempt == self.max_retries or not is_retryable(error):
+            return False
+        logger.warning("Bulk insert of a batch failed (attempt %s of %s): %s", attempt + 1, self.max_retries + 1, str(error))
+        stats.add_retry()
+        return True
+
+    def _report(self, stats: BulkWriteStats):
+        logger.info("Inserted %s documents in %s batches (%s retried) in %.2fs, %.0f documents/s.",
+                    stats.documents, stats.batches, stats.retries, stats.elapsed_seconds, stats.documents_per_second)
+
+    def write(self, insert: Callable[[List[dict]], None], documents: Iterable[dict],
+              is_retryable: Callable[[Exception], bool]) -> BulkWriteStats:
+        """
+        Insert documents with a blocking `insert(batch)`, running the batches in a thread pool.
+        """
+        stats = BulkWriteStats()
+
+        def insert_batch(batch: List[dict]):
+            for attempt in range(self.max_retries + 1):
+                try:
+                    insert(batch)
+                    break
+                except Exception as e:
+                    if not self._should_retry(e, attempt, is_retryable, stats):
+                        raise
+                time.sleep(self.retry_backoff_seconds * 2 ** attempt)
+            stats.add_batch(len(batch))
+
+        executor = ThreadPoolExecutor(max_workers=self.concurrency)
+        try:
+            pending = deque()
+            for batch in self._batched(documents):
+                pending.append(executor.submit(insert_batch, batch))
+                # Bound the batches held in memory while the requests are in flight
+                if len(pending) >= 2 * self.concurrency:
+                    pending.popleft().result()
+            while pending:
+                pending.popleft().result()
+        finally:
+            executor.shutdown(cancel_futures=True)
+        self._report(stats)
+        return stats
+
+    async def write_async(self, insert: Callable[[List[dict]], Awaitable[None]], documents: Iterable[dict],
+                          is_retryable: Callable[[Exception], bool]) -> BulkWriteStats:
+        """
+        Insert documents with an awaitable `insert(batch)`, running the batches as concurrent tasks.
+        """
+        stats = BulkWriteStats()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        failed = asyncio.Event()
+
+        async def insert_batch(batch: List[dict]):
+            try:
+                for attempt in range(self.max_retries + 1):
+                    try:
+                        await insert(batch)
+                        break
+                    except Exception as e:
+                        if not self._should_retry(e, attempt, is_retryable, stats):
+                            failed.set()
+                            raise
+                    await asyncio.sleep(self.retry_backoff_seconds * 2 ** attempt)
+                stats.add_batch(len(batch))
+            finally:
+                semaphore.release()
+
+        tasks = []
+        try:
+            for batch in self._batched(documents):
+                await semaphore.acquire()
+                if failed.is_set():
+                    # Like `write`, stop at the first batch that failed for good; gather raises its error
+                    semaphore.release()
+                    break
+                tasks.append(asyncio.create_task(insert_batch(batch)))
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        self._report(stats)
+        return stats
+
+
+bulk_writer = BulkWriter(
+    batch_size=app_config.vector_insert.batch_size,
+    concurrency=app_config.vector_insert.concurrency,
+    max_retries=app_config.vector_insert.max_retries,
+    retry_backoff_seconds=app_config.vector_insert.retry_backoff_seconds
+)
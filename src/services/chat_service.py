@@ -1,95 +1,115 @@
-import json
-from langchain_cohere import ChatCohere
-from langchain_openai import OpenAI
-from langchain_cohere import CohereEmbeddings
-from langchain_community.embeddings import OpenAIEmbeddings
+import time
+import uuid
 from langgraph.graph import END, StateGraph, MessagesState
-from langchain import hub
 from langchain_core.documents import Document
 from langchain_core.tools import tool
-from langchain_core.messages import SystemMessage
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
 from langgraph.prebuilt import ToolNode
-from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
-from src.database import get_db_connection
+from langchain_core.runnables import RunnableConfig
 import logging
 
-from src.services.vector_store import VectorStore
-from src.config.config import SYSTEM_PROMPT, SYSTEM_PROMPT_GENERATE, LLMProvider, app_config
-
-# Shared Resources
-vector_store = VectorStore()
-prompt = hub.pull("rlm/rag-prompt")
-
-# LLM Initialization
-def get_llm():
-    if app_config.model.llm_provider == LLMProvider.OPENAI:
-        return OpenAI(
-            api_key=app_config.model.api_key,
-            model=app_config.model.llm_model
-        )
-    return ChatCohere(
-        cohere_api_key=app_config.model.api_key,
-        model=app_config.model.llm_model
-    )
+from src.services.resources import resources
+from src.services.graph_manager import GraphManager
+from src.services.embedding_cache import query_embedding_cache
+from src.services.response_cache import response_cache
+from src.services.message_service import MessageService
+from src.services.history_manager import HistoryManager
+from src.services.retrieval_router import Route, retrieval_router
+from src.services.speculative_retrieval import speculative_retriever
+from src.services.context_builder import context_builder
+from src.services.rate_limiter import estimate_tokens
+from src.config.config import NO_INFO_RESPONSE, SYSTEM_PROMPT, SYSTEM_PROMPT_GENERATE, SUMMARY_PROMPT, app_config
 
-llm = get_llm()
-
-# Embedding Model Initialization
-def get_embedding_model():
-    if app_config.model.llm_provider == LLMProvider.OPENAI:
-        return OpenAIEmbeddings(
-            api_key=app_config.model.api_key,
-            model=app_config.model.embedding_model
-        )
-    return CohereEmbeddings(
-        cohere_api_key=app_config.model.api_key,
-        model=app_config.model.embedding_model
+def summarize_history(summary: str, messages: list) -> str:
+    """Extend a conversation summary with older messages."""
+    transcript = "\n\n".join(
+        f"{'Student' if message.type == 'human' else 'Assistant'}: {message.content}" for message in messages
     )
+    response = resources.llm().invoke([
+        SystemMessage(SUMMARY_PROMPT),
+        HumanMessage(f"Current summary:\n{summary or 'None'}\n\nNew messages:\n{transcript}")
+    ])
+    return response.content
+
+history_manager = HistoryManager(
+    max_prompt_tokens=app_config.history.max_prompt_tokens,
+    summary_refresh_messages=app_config.history.summary_refresh_messages,
+    max_summaries=app_config.history.max_summaries,
+    summarize=summarize_history
+)
+
+RETRIEVAL_LIMIT = 10
 
-embedding_model = get_embedding_model()
+async def embed_query(query: str):
+    return await query_embedding_cache.get_or_embed(query, resources.embedding_model().aembed_query)
+
+async def search_chunks(embedding):
+    return await resources.async_vector_store().similarity_search(embedding, limit=RETRIEVAL_LIMIT)
 
 # Retrieve Tool
 @tool(response_format="content_and_artifact")
-def retrieve(query: str):
+async def retrieve(query: str, config: RunnableConfig):
     """
     Perform a similarity search to retrieve relevant information.
     """
-    embedding = embedding_model.embed_query(query)
-    rows = vector_store.similarity_search(embedding, limit=10)
-    context = [
+    embedding = await embed_query(query)
+    # Reuse the search started for the question while the router was deciding, if it matches the query
+    speculation = config.get("configurable", {}).get("speculative_retrieval")
+    rows = await speculative_retriever.resolve(speculation, embedding) if speculation is not None else None
+    if rows is None:
+        rows = await search_chunks(embedding)
+    documents = [
         Document(
             page_content=row["text"],
             metadata={
                 "source_key": row["source_key"],
-                "source_label": row["source_label"]
+                "source_label": row["source_label"],
+                "similarity": row.get("$similarity")
             }
         ) for row in rows
     ]
-    serialized = "SERIALIZED_SOURCES: " + json.dumps(
-        [
-            {"metadata": doc.metadata, "content": doc.page_content}
-            for doc in context
-        ],
-        indent=2
-    )
-    return serialized, context
+    # Keep only the chunks that make it into the compact context, so the reported sources match it
+    return context_builder.build(documents)
 
 # Query function
-def should_query(state: MessagesState):
-    """Determine if we need to query for information."""
+async def route_with_llm(messages: list, thread_id: str) -> AIMessage:
+    """Ask the LLM whether the question needs retrieval; a response with tool calls means it does."""
     # Create a chain that can use tools
-    chain = llm.bind_tools([retrieve])
+    chain = resources.llm().bind_tools([retrieve])
     
-    # Run the chain and get the response
-    messages = state["messages"]
+    # Run the chain on the history that fits the prompt budget
+    history = history_manager.fit(thread_id, messages, estimate_tokens(SYSTEM_PROMPT))
     system_message = SystemMessage(SYSTEM_PROMPT)
-    response = chain.invoke([system_message] + messages)
+    return await chain.ainvoke([system_message] + history)
+
+async def should_query(state: MessagesState, config: RunnableConfig):
+    """Determine if we need to query for information."""
+    messages = state["messages"]
+    thread_id = config["configurable"]["thread_id"]
+    decision = config["configurable"].get("routing_decision")
+
+    # Follow the local router when it is confident, checking a sample of its decisions against the LLM
+    if decision is not None and decision.route != Route.LLM:
+        if retrieval_router.should_shadow(decision):
+            async def llm_route():
+                return Route.RETRIEVE if (await route_with_llm(messages, thread_id)).tool_calls else Route.DIRECT
+            retrieval_router.shadow(decision, llm_route)
+        if decision.route == Route.RETRIEVE:
+            tool_call = {"name": "retrieve", "args": {"query": messages[-1].content}, "id": f"call_{uuid.uuid4().hex}", "type": "tool_call"}
+            return {"messages": messages + [AIMessage(content="", tool_calls=[tool_call])]}
+        return {"messages": messages}
+
+    response = await route_with_llm(messages, thread_id)
     
     # Check if we need tools by looking for tool calls
     if hasattr(response, "tool_calls") and response.tool_calls:
+        if decision is not None:
+            retrieval_router.record_llm_decision(decision, Route.RETRIEVE)
         # If we need tools, return the response with tool calls
         return {"messages": messages + [response]}
     else:
+        if decision is not None:
+            retrieval_router.record_llm_decision(decision, Route.DIRECT)
         # Log the decision to skip retrieval
         logging.info("No tool calls detected; skipping retrieval.")
         logging.debug("Messages: %s", messages)
@@ -100,35 +120,34 @@ def should_query(state: MessagesState):
 tools = ToolNode([retrieve])
 
 # Response function
-def direct_response(state: MessagesState):
+async def direct_response(state: MessagesState, config: RunnableConfig):
     """Generate direct response without tools."""
-    contents = [msg.content for msg in state["messages"]]    
+    history = history_manager.fit(config["configurable"]["thread_id"], state["messages"], estimate_tokens(SYSTEM_PROMPT))
     system_message = SystemMessage(SYSTEM_PROMPT)
-    response = llm.invoke([system_message] + contents)
+    # Passing the config lets the graph's "messages" stream receive the tokens as the provider emits them
+    response = await resources.llm().ainvoke([system_message] + history, config)
     return {"messages": [response]}
 
 # Generate Response
-def generate(state: MessagesState):
+async def generate(state: MessagesState, config: RunnableConfig):
     """Generate answer."""
-    # Get generated ToolMessages
-    recent_tool_messages = [message for message in reversed(state["messages"]) if message.type == "tool"]
+    # Get the ToolMessages generated for the current question
     tool_messages = []
-    for message in recent_tool_messages:
+    for message in reversed(state["messages"]):
         if message.type != "tool":
             break
         tool_messages.append(message)
+    tool_messages.reverse()
 
-    # Format into prompt
-    docs_content = "\n\n".join(doc.content for doc in tool_messages)
+    # Format into prompt, deduplicating across retrieve calls
+    documents = [document for message in tool_messages for document in message.artifact or []]
+    docs_content, _ = context_builder.build(documents)
     system_message_content = SYSTEM_PROMPT_GENERATE.format(docs_content=docs_content)
-    conversation_messages = [
-        message
-        for message in state["messages"]
-        if message.type in ("human", "system")
-        or (message.type == "ai" and not message.tool_calls)
-    ]
+    conversation_messages = history_manager.fit(
+        config["configurable"]["thread_id"], state["messages"], estimate_tokens(system_message_content)
+    )
     prompt = [SystemMessage(system_message_content)] + conversation_messages
-    response = llm.invoke(prompt)
+    response = await resources.llm().ainvoke(prompt, config)
 
     return {"messages": [response]}
 
@@ -140,10 +159,7 @@ def should_use_tools(state: MessagesState) -> str:
         return "tools"
     return END
 
-async def ask_question(question: str, thread_id: str):
-    config = {"configurable": {"thread_id": thread_id}}
-
-    # Build graph
+def build_graph() -> StateGraph:
     graph_builder = StateGraph(MessagesState)
     graph_builder.add_node("should_query", should_query)
     graph_builder.add_node("direct_response", direct_response)
@@ -161,18 +177,104 @@ async def ask_question(question: str, thread_id: str):
     graph_builder.add_edge("tools", "generate")
     graph_builder.add_edge("generate", END)
     graph_builder.add_edge("direct_response", END)
+    return graph_builder
+
+graph_manager = GraphManager(build_graph)
+
+CACHED_STREAM_CHUNK_SIZE = 64
 
-    async with get_db_connection() as pool:
-        checkpointer = AsyncPostgresSaver(pool)
-        await checkpointer.setup()
-        graph = graph_builder.compile(checkpointer=checkpointer)
-        async for message, metadata in graph.astream(
+def _get_message_sources(message) -> list:
+    """
+    Collect the distinct sources referenced by a retrieve ToolMessage.
+    """
+    sources = []
+    for doc in getattr(message, "artifact", None) or []:
+        source = {"source_key": doc.metadata.get("source_key"), "source_label": doc.metadata.get("source_label")}
+        if source not in sources:
+            sources.append(source)
+    return sources
+
+async def _record_cached_exchange(config: dict, question: str, answer: str):
+    """
+    Append a cache-served exchange to the thread so history and follow-up questions include it.
+    """
+    graph = graph_manager.graph
+    await graph.aupdate_state(config, {"messages": [HumanMessage(question)]}, as_node="direct_response")
+    await graph.aupdate_state(config, {"messages": [AIMessage(answer)]}, as_node="direct_response")
+
+async def _record_history(thread_id: str, question: str, answer: str, sources: list):
+    """
+    Write the finished exchange to the conversation projection. The answer has already been streamed,
+    so a failure here is logged rather than raised.
+    """
+    try:
+        await MessageService().record_exchange(thread_id, question, answer, sources)
+    except Exception as e:
+        logging.warning("Failed to record conversation history for thread %s: %s", thread_id, str(e))
+
+def _is_reusable_answer(answer: str, node: str, sources: list) -> bool:
+    """
+    Whether an answer may be served to similar questions. A retrieval answer without sources or
+    information says more about the corpus at the time than about the question.
+    """
+    if answer.startswith(NO_INFO_RESPONSE):
+        return False
+    return node != "generate" or bool(sources)
+
+async def ask_question(question: str, thread_id: str):
+    config = {"configurable": {"thread_id": thread_id}}
+    started_at = time.perf_counter()
+
+    cacheable = response_cache.is_cacheable(question)
+    question_embedding = None
+    if cacheable or retrieval_router.needs_embedding(question):
+        question_embedding = await embed_query(question)
+    if cacheable:
+        await response_cache.sync()
+        cached = response_cache.lookup(question_embedding)
+        if cached is not None:
+            logging.info("Serving cached answer (similarity %.3f).", cached.similarity)
+            for i in range(0, len(cached.answer), CACHED_STREAM_CHUNK_SIZE):
+                yield cached.answer[i:i + CACHED_STREAM_CHUNK_SIZE]
+            await _record_cached_exchange(config, question, cached.answer)
+            await _record_history(thread_id, question, cached.answer, cached.sources)
+            response_cache.record_hit(time.perf_counter() - started_at)
+            return
+
+    answer_parts = []
+    answer_node = None
+    sources = []
+    decision = retrieval_router.route(question, question_embedding)
+    config["configurable"]["routing_decision"] = decision
+    speculation = None
+    if decision.route == Route.LLM:
+        # Start retrieving for the question while the LLM decides whether retrieval is needed
+        speculation = speculative_retriever.start(question, embed_query, search_chunks)
+        config["configurable"]["speculative_retrieval"] = speculation
+    try:
+        async for message, metadata in graph_manager.graph.astream(
             {"messages": [{"role": "user", "content": question}]},
             stream_mode="messages",
             config=config,
         ):
             node = metadata.get("langgraph_node")
-            if node in ("should_query", "tools"):
+            if node == "tools":
+                sources.extend(source for source in _get_message_sources(message) if source not in sources)
+                continue
+            if node == "should_query":
                 continue
-            # Yield messages from direct_response and generate nodes
+            # Yield the tokens streamed from the direct_response and generate nodes
+            if not message.content:
+                continue
+            answer_node = node
+            answer_parts.append(message.content)
             yield message.content
+    finally:
+        speculative_retriever.finish(speculation)
+
+    answer = "".join(answer_parts)
+    await _record_history(thread_id, question, answer, sources)
+    if cacheable:
+        if _is_reusable_answer(answer, answer_node, sources):
+            response_cache.store(question_embedding, answer, sources)
+        response_cache.record_miss(time.perf_counter() - started_at)
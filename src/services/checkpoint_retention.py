@@ -0,0 +1,149 @@
+import argparse
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from src.config.config import app_config
+from src.database import open_pool, close_pool
+from src.repositories.checkpoint_repository import CheckpointRepository
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_TABLES = ("checkpoints", "checkpoint_writes", "checkpoint_blobs")
+
+
+class CheckpointRetention:
+    """
+    Periodically prunes the checkpointer tables in the background.
+    Threads idle for at least `min_idle_seconds` keep only their latest `keep_checkpoints` checkpoints,
+    plus the writes and channel values those reference; the chat history is served from conversation_messages.
+    Threads idle for longer than `idle_ttl_days` are deleted entirely, history included.
+    Each pass handles at most `threads_per_run` threads of each kind; the rest are picked up by the next pass.
+    A compacted thread is only compacted again after a new message.
+    """
+    def __init__(self, keep_checkpoints: int, idle_ttl_days: int, min_idle_seconds: int, interval_seconds: int,
+                 batch_size: int, repository: CheckpointRepository, threads_per_run: int = 1000):
+        self.keep_checkpoints = max(keep_checkpoints, 1)
+        self.idle_ttl_days = idle_ttl_days
+        self.min_idle_seconds = min_idle_seconds
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self.threads_per_run = threads_per_run
+        self.repository = repository
+        self._task: Optional[asyncio.Task] = None
+        self.runs = 0
+        self.last_run_at: Optional[datetime] = None
+        self.last_run_seconds = 0.0
+        self.reclaimed: Dict[str, Dict[str, int]] = {}
+
+    async def start(self):
+        self._task = asyncio.create_task(self._run_periodically())
+        logger.info("Checkpoint retention started (every %s seconds).", self.interval_seconds)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run_periodically(self):
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error("Checkpoint retention run failed: %s", str(e))
+
+    async def run_once(self) -> Dict[str, Dict[str, int]]:
+        """
+        Run one retention pass and return the rows and bytes reclaimed per table.
+        Skipped when another worker is already running a pass.
+        """
+        async with self.repository.exclusive_run() as acquired:
+            if not acquired:
+                logger.info("Checkpoint retention is running in another worker; skipping.")
+                return {}
+            started_at = time.perf_counter()
+            reclaimed: Dict[str, Dict[str, int]] = {}
+
+            expired = []
+            if self.idle_ttl_days > 0:
+                expired = await self.repository.get_idle_threads(self.idle_ttl_days * 86400, self.threads_per_run)
+                for thread_id in expired:
+                    for table in CHECKPOINT_TABLES + ("conversation_messages",):
+                        await self._drain(reclaimed, table, lambda: self.repository.delete_thread(table, thread_id, self.batch_size))
+                    await self.repository.forget_thread(thread_id)
+
+            compacted = await self.repository.get_uncompacted_threads(self.min_idle_seconds, self.threads_per_run)
+            for thread_id, last_message_at in compacted:
+                await self._drain(reclaimed, "checkpoints",
+                                  lambda: self.repository.prune_checkpoints(thread_id, self.keep_checkpoints, self.batch_size))
+                await self._drain(reclaimed, "checkpoint_writes", lambda: self.repository.prune_writes(thread_id, self.batch_size))
+                await self._drain(reclaimed, "checkpoint_blobs", lambda: self.repository.prune_blobs(thread_id, self.batch_size))
+                await self.repository.mark_compacted(thread_id, last_message_at)
+
+            self.runs += 1
+            self.last_run_at = datetime.now()
+            self.last_run_seconds = time.perf_counter() - started_at
+            for table, counts in reclaimed.items():
+                totals = self.reclaimed.setdefault(table, {"rows": 0, "bytes": 0})
+                totals["rows"] += counts["rows"]
+                totals["bytes"] += counts["bytes"]
+            logger.info("Checkpoint retention: %s threads expired, %s compacted in %.1fs. Reclaimed: %s",
+                        len(expired), len(compacted), self.last_run_seconds, reclaimed)
+            return reclaimed
+
+    async def _drain(self, reclaimed: Dict[str, Dict[str, int]], table: str, delete_batch: Callable[[], Awaitable[Tuple[int, int]]]):
+        """
+        Repeat a batched delete until it removes less than a full batch.
+        """
+        counts = reclaimed.setdefault(table, {"rows": 0, "bytes": 0})
+        while True:
+            rows, size = await delete_batch()
+            counts["rows"] += rows
+            counts["bytes"] += size
+            if rows < self.batch_size:
+                return
+            # Let request handlers use the pool between batches
+            await asyncio.sleep(0)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self._task is not None,
+            "runs": self.runs,
+            "last_run_at": self.last_run_at,
+            "last_run_seconds": self.last_run_seconds,
+            "reclaimed": self.reclaimed
+        }
+
+
+checkpoint_retention = CheckpointRetention(
+    keep_checkpoints=app_config.checkpoint_retention.keep_checkpoints,
+    idle_ttl_days=app_config.checkpoint_retention.idle_ttl_days,
+    min_idle_seconds=app_config.checkpoint_retention.min_idle_seconds,
+    interval_seconds=app_config.checkpoint_retention.interval_seconds,
+    batch_size=app_config.checkpoint_retention.batch_size,
+    repository=CheckpointRepository(),
+    threads_per_run=app_config.checkpoint_retention.threads_per_run
+)
+
+
+async def _run_retention():
+    await open_pool()
+    try:
+        reclaimed = await checkpoint_retention.run_once()
+        for table, counts in reclaimed.items():
+            print(f"{table}: {counts['rows']} rows, {counts['bytes']} bytes reclaimed")
+    finally:
+        await close_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prune the checkpointer tables.")
+    parser.add_argument("command", choices=["run"])
+    parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_run_retention())
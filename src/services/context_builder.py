@@ -0,0 +1,150 @@
+import logging
+import re
+from typing import List, Set, Tuple
+
+from langchain_core.documents import Document
+
+from src.config.config import app_config
+from src.services.rate_limiter import CHARS_PER_TOKEN, estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+WORD_PATTERN = re.compile(r"\w+")
+SHINGLE_SIZE = 3
+
+
+class ContextSegment:
+    """
+    Contiguous text of one source, made of one or more retrieved chunks.
+    """
+    def __init__(self, document: Document):
+        self.source_key = document.metadata.get("source_key")
+        self.source_label = document.metadata.get("source_label")
+        self.similarity = document.metadata.get("similarity") or 0.0
+        self.text = document.page_content.strip()
+        self.documents = [document]
+
+
+class ContextBuilder:
+    """
+    Assembles the retrieved chunks into the context of the answer prompt.
+    Hits are taken best first while they score within `similarity_margin` of the best one, so the number of
+    chunks adapts to how clearly the search matched. Near-duplicates are dropped, chunks of a source that
+    overlap (the splitter repeats `chunk_overlap` characters between neighbours) are merged into one passage,
+    and passages are added until `max_tokens` is spent. The result is plain text grouped under a source header.
+    """
+    def __init__(self, max_tokens: int, similarity_margin: float, duplicate_similarity: float, min_merge_overlap: int):
+        self.max_tokens = max_tokens
+        self.similarity_margin = similarity_margin
+        self.duplicate_similarity = duplicate_similarity
+        self.min_merge_overlap = min_merge_overlap
+
+    def build(self, documents: List[Document]) -> Tuple[str, List[Document]]:
+        """
+        Return the context text and the documents it includes.
+        """
+        ranked = sorted(documents, key=lambda document: document.metadata.get("similarity") or 0.0, reverse=True)
+        if not ranked:
+            return "", []
+
+        floor = (ranked[0].metadata.get("similarity") or 0.0) - self.similarity_margin
+        segments: List[ContextSegment] = []
+        seen_shingles: List[Set[Tuple[str, ...]]] = []
+        for document in ranked:
+            if segments and (document.metadata.get("similarity") or 0.0) < floor:
+                break
+            shingles = self._shingles(document.page_content)
+            if any(self._overlap_ratio(shingles, other) >= self.duplicate_similarity for other in seen_shingles):
+                continue
+            seen_shingles.append(shingles)
+            self._add(segments, ContextSegment(document))
+
+        segments.sort(key=lambda segment: segment.similarity, reverse=True)
+        selected: List[ContextSegment] = []
+        budget = self.max_tokens
+        for segment in segments:
+            tokens = estimate_tokens(segment.text)
+            if tokens > budget:
+                if selected:
+                    continue
+                # Truncate the best passage rather than answering without context
+                segment.text = segment.text[:budget * CHARS_PER_TOKEN]
+                tokens = budget
+            selected.append(segment)
+            budget -= tokens
+
+        included = [document for segment in selected for document in segment.documents]
+        logger.info("Built context from %s of %s retrieved chunks in %s passages (~%s tokens).",
+                    len(included), len(documents), len(selected), self.max_tokens - budget)
+        return self._format(selected), included
+
+    def _add(self, segments: List[ContextSegment], segment: ContextSegment):
+        for i, existing in enumerate(segments):
+            if existing.source_key != segment.source_key:
+                continue
+            merged = self._merge(existing.text, segment.text)
+            if merged is None:
+                continue
+            del segments[i]
+            existing.text = merged
+            existing.similarity = max(existing.similarity, segment.similarity)
+            existing.documents.extend(segment.documents)
+            # The merged passage may now overlap another passage of the source
+            self._add(segments, existing)
+            return
+        segments.append(segment)
+
+    def _merge(self, a: str, b: str):
+        """
+        Join two chunks that contain or overlap each other, or return None if they do not.
+        """
+        if b in a:
+            return a
+        if a in b:
+            return b
+        for first, second in ((a, b), (b, a)):
+            overlap = self._suffix_prefix_overlap(first, second)
+            if overlap >= self.min_merge_overlap:
+                return first + second[overlap:]
+        return None
+
+    @staticmethod
+    def _suffix_prefix_overlap(first: str, second: str) -> int:
+        """
+        Length of the longest suffix of `first` that is also a prefix of `second`.
+        """
+        for length in range(min(len(first), len(second)) - 1, 0, -1):
+            if first.endswith(second[:length]):
+                return length
+        return 0
+
+    @staticmethod
+    def _shingles(text: str) -> Set[Tuple[str, ...]]:
+        words = WORD_PATTERN.findall(text.lower())
+        if len(words) <= SHINGLE_SIZE:
+            return {tuple(words)}
+        return {tuple(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+    @staticmethod
+    def _overlap_ratio(a: Set[Tuple[str, ...]], b: Set[Tuple[str, ...]]) -> float:
+        """
+        Share of the smaller shingle set found in the other, so a chunk repeated inside a longer one counts as a duplicate.
+        """
+        if not a or not b:
+            return 0.0
+        return len(a & b) / min(len(a), len(b))
+
+    @staticmethod
+    def _format(segments: List[ContextSegment]) -> str:
+        passages = {}
+        for segment in segments:
+            passages.setdefault(segment.source_label, []).append(segment.text)
+        return "\n\n".join(f"[{label}]\n" + "\n\n".join(texts) for label, texts in passages.items())
+
+
+context_builder = ContextBuilder(
+    max_tokens=app_config.context.max_tokens,
+    similarity_margin=app_config.context.similarity_margin,
+    duplicate_similarity=app_config.context.duplicate_similarity,
+    min_merge_overlap=app_config.context.min_merge_overlap
+)
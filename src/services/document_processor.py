@@ -1,26 +1,31 @@
 import hashlib
-import tempfile
-import re
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_cohere import CohereEmbeddings
-from langchain_community.embeddings import OpenAIEmbeddings
-from langchain_community.document_loaders import WebBaseLoader
-
-from src.config.config import app_config, LLMProvider
-from src.services.vector_store import VectorStore
-
-import time
+import os
+from collections import deque
+from typing import Callable, Iterable, Iterator
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from pypdf import PdfReader
+
+from src.config.config import app_config
+from src.services.vector_store import hash_chunk, sum_vectors
+from src.services.resources import resources
+from src.services.response_cache import response_cache
+from src.services.source_catalog import source_catalog
+from src.services.ingestion_queue import JobProgress, JobStage, ingestion_queue
+from src.services.text_extraction import clean_and_split, extract_page_range
+from src.services.url_ingestion import url_ingestion_engine
+from src.services.embedding_store import embedding_store
+from src.services.rate_limiter import embedding_rate_limiter, max_embedding_batch_chunks, estimate_tokens, is_rate_limit_error, get_retry_after
+
 import logging
+from concurrent.futures import ThreadPoolExecutor
 
 logger = logging.getLogger(__name__)
 
 class DocumentProcessor:
     def __init__(self):
-        self.vector_store = VectorStore()
-        
-        # Initialize embedding model
-        self.embedding_model = self._get_embedding_model()
+        # Shared clients, created once per process
+        self.vector_store = resources.vector_store()
+        self.embedding_model = resources.embedding_model()
        
         # Initialize text splitter
         self.text_splitter = RecursiveCharacterTextSplitter(
@@ -33,94 +38,228 @@ class DocumentProcessor:
         """
         return hashlib.sha256(input_data.encode('utf-8')).hexdigest()
 
-    def process_text(self, text: str, title: str):
+    def process_text(self, text: str, title: str, progress: JobProgress = None):
         """
-        Process raw text: delete existing embeddings, generate new embeddings, and insert them.
+        Process raw text: embed new or changed chunks, insert them and delete chunks that are gone.
         """
+        progress = progress or JobProgress()
+        progress.begin(JobStage.FETCH, 1)
+        progress.advance(JobStage.FETCH)
+        progress.end(JobStage.FETCH)
+
         source_key = self._generate_source_key(title)
-        self.vector_store.delete_embeddings(source_key)
-        text = self._clean_text(text)
-        chunks = self.text_splitter.split_text(text)
-        embeddings = self._create_embeddings(chunks)
-        self.vector_store.insert_embeddings(chunks, embeddings, source_key, title, "text")
+        self._process_text_with_source_key(text, source_key, title, "text", progress)
 
-    def process_pdf(self, file_bytes: bytes, title: str):
+    def process_pdf(self, file_path: str, title: str, progress: JobProgress = None):
         """
-        Process a PDF file: extract text, chunk, delete old embeddings, create new embeddings, and insert.
+        Process a PDF file spooled to disk: extract, clean and split page ranges in parallel, and sync the
+        source's embeddings batch by batch. Peak memory does not depend on the size of the PDF.
+        The file is removed once processing finishes.
         """
+        progress = progress or JobProgress()
         source_key = self._generate_source_key(title)
-        with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-            temp_file.write(file_bytes)
-            temp_file_path = temp_file.name  # Get the file path of the temporary file
-    
-        loader = PyPDFLoader(temp_file_path)
-        text = " ".join([doc.page_content for doc in loader.load()])
-        
-        # Process the text after extraction
-        self._process_text_with_source_key(text, source_key, title, "pdf")
+        try:
+            page_count = len(PdfReader(file_path).pages)
+            self._sync_chunks(self._extract_pdf_chunks(file_path, page_count, progress), source_key, title, "pdf", progress)
+        finally:
+            os.remove(file_path)
 
-    def process_urls(self, urls: list):
+    async def process_urls(self, urls: list, progress: JobProgress = None):
         """
-        Process a list of URLs: fetch text, chunk, delete old embeddings, create new embeddings, and insert.
+        Process a list of URLs concurrently. Pages that did not change since their last ingestion are skipped;
+        changed pages are chunked and their source's embeddings synced with the new chunks.
         """
-        for url in urls:
-            source_key = self._generate_source_key(url)
-            loader = WebBaseLoader(url)
-            text = " ".join([doc.page_content for doc in loader.load()])
-            self._process_text_with_source_key(text, source_key, url, "url")
+        progress = progress or JobProgress()
+        sources = {self._generate_source_key(url): url for url in urls}
+        await url_ingestion_engine.ingest(
+            sources,
+            lambda text, source_key, url: self._process_text_with_source_key(text, source_key, url, "url", progress),
+            progress
+        )
 
-    def _process_text_with_source_key(self, text: str, source_key: str, source_label: str, type: str):
+    def _process_text_with_source_key(self, text: str, source_key: str, source_label: str, type: str, progress: JobProgress = None):
         """
         Process text with a predefined source key and label.
         """
-        self.vector_store.delete_embeddings(source_key)
-        text = self._clean_text(text)
-        chunks = self.text_splitter.split_text(text)
-        embeddings = self._create_embeddings(chunks)
-        self.vector_store.insert_embeddings(chunks, embeddings, source_key, source_label, type)
-
-    def _create_embeddings(self, chunks: list):
-        # split these into batches
-        # reason: trial token rate limit exceeded, limit is 100000 tokens per minute
-
-        '''
-        Math:
-        100_000 tokens -> how many words?
-        100_000 / 3 -> 33_333 words
-        chunk size = 512 -> 65 chunks
-
-        --> after 65 chunks, wait for 1 minute
-
-
-        '''
-        logger.info("Creating embeddings. Chunks: %s", len(chunks))
-        CHUNK_LIMIT = 700
-        embeddings = []
-        for i in range(0, len(chunks), CHUNK_LIMIT):
-            batch = chunks[i:i + CHUNK_LIMIT]
-            embeddings_batch = self.embedding_model.embed_documents(batch)
-            embeddings.extend(embeddings_batch)
-            logger.info("Created embeddings for chunks %s of %s", i + CHUNK_LIMIT, len(chunks))
-            if i + CHUNK_LIMIT < len(chunks):
-                time.sleep(60)  # wait for 1 minute if there are more chunks
+        progress = progress or JobProgress()
+        progress.begin(JobStage.CLEAN, 1)
+        progress.begin(JobStage.SPLIT, 1)
+        chunks = next(self._map_ordered(clean_and_split, [(text, app_config.chunk_size, app_config.chunk_overlap)]))
+        for stage in (JobStage.CLEAN, JobStage.SPLIT):
+            progress.advance(stage)
+            progress.end(stage)
+        self._sync_chunks(iter(chunks), source_key, source_label, type, progress)
+
+    def _extract_pdf_chunks(self, file_path: str, page_count: int, progress: JobProgress) -> Iterator[str]:
+        """
+        Extract, clean and split page ranges of a PDF in the ingestion process pool and yield the chunks in page order.
+        The last chunk of each range is re-split together with the head of the next range, so chunks and their
+        overlap span range boundaries instead of breaking at them.
+        """
+        stages = (JobStage.FETCH, JobStage.CLEAN, JobStage.SPLIT)
+        for stage in stages:
+            progress.begin(stage, page_count)
+
+        pages_per_task = app_config.ingestion.pdf_pages_per_task
+        ranges = [(start, min(start + pages_per_task, page_count)) for start in range(0, page_count, pages_per_task)]
+        tasks = [(file_path, start, end, app_config.chunk_size, app_config.chunk_overlap) for start, end in ranges]
+        carry = ""
+        for (start, end), chunks in zip(ranges, self._map_ordered(extract_page_range, tasks)):
+            for stage in stages:
+                progress.advance(stage, end - start)
+            if not chunks:
+                continue
+            if carry:
+                chunks = self.text_splitter.split_text(f"{carry} {chunks[0]}") + chunks[1:]
+            yield from chunks[:-1]
+            carry = chunks[-1]
+        if carry:
+            yield carry
+
+        for stage in stages:
+            progress.end(stage)
+
+    def _map_ordered(self, func: Callable, tasks: list) -> Iterator:
+        """
+        Run func over tasks in the ingestion process pool and yield results in task order, keeping at most
+        two tasks per worker in flight. Runs inline when no pool is available.
+        """
+        pool = ingestion_queue.process_pool
+        if pool is None:
+            for args in tasks:
+                yield func(*args)
+            return
+
+        pending = deque()
+        for args in tasks:
+            pending.append(pool.submit(func, *args))
+            if len(pending) >= 2 * app_config.ingestion.cpu_workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+    def _sync_chunks(self, chunks: Iterable[str], source_key: str, source_label: str, type: str, progress: JobProgress):
+        """
+        Sync a source's stored chunks with a stream of new chunks, in bounded batches.
+        Only chunks whose content changed are embedded and inserted; chunks that disappeared are deleted
+        at the end, so the source is never left without vectors.
+        """
+        existing_hashes = self.vector_store.get_chunk_hashes(source_key)
+        # Identical chunks within a source add nothing to retrieval, so each content hash is stored once
+        seen_hashes = set()
+        byte_size = 0
+        new_count = 0
+        # Change in the sum of the source's normalized vectors, kept in the catalog for the router's centroids
+        vector_sum = None
+        progress.begin(JobStage.EMBED)
+        progress.begin(JobStage.INSERT)
+        for batch in self._batched(chunks, app_config.ingestion.batch_chunks):
+            new_chunks = []
+            for chunk in batch:
+                chunk_hash = hash_chunk(chunk)
+                if chunk_hash in seen_hashes:
+                    continue
+                seen_hashes.add(chunk_hash)
+                byte_size += len(chunk.encode("utf-8"))
+                if chunk_hash not in existing_hashes:
+                    new_chunks.append(chunk)
+            if not new_chunks:
+                continue
+
+            embeddings = self._create_embeddings(new_chunks, progress)
+            progress.begin(JobStage.INSERT, len(new_chunks))
+            self.vector_store.insert_embeddings(new_chunks, embeddings, source_key, source_label, type)
+            batch_sum = sum_vectors(embeddings)
+            vector_sum = batch_sum if vector_sum is None else vector_sum + batch_sum
+            progress.advance(JobStage.INSERT, len(new_chunks))
+            new_count += len(new_chunks)
+        progress.end(JobStage.EMBED)
+
+        removed_hashes = existing_hashes - seen_hashes
+        if removed_hashes:
+            removed_sum = sum_vectors(self.vector_store.get_chunk_vectors(source_key, removed_hashes))
+            if removed_sum is not None:
+                vector_sum = -removed_sum if vector_sum is None else vector_sum - removed_sum
+            self.vector_store.delete_chunks(source_key, removed_hashes)
+        progress.end(JobStage.INSERT)
+        logger.info("Source %s: %s new or changed chunks, %s removed, %s unchanged.",
+                    source_label, new_count, len(removed_hashes), len(seen_hashes) - new_count)
+
+        # Recorded after the vector store is in sync, so the catalog never lists chunks that are not stored
+        # A source ingested for the first time has its whole vector sum; otherwise only the change is known
+        source_catalog.record_source_from_thread(
+            source_key, source_label, type, len(seen_hashes), byte_size,
+            vector_sum.tolist() if vector_sum is not None else None, replace_vector_sum=not existing_hashes
+        )
+        if new_count or removed_hashes:
+            response_cache.invalidate()
+
+    @staticmethod
+    def _batched(items: Iterable, size: int) -> Iterator[list]:
+        batch = []
+        for item in items:
+            batch.append(item)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _create_embeddings(self, chunks: list, progress: JobProgress = None):
+        """
+        Embed chunks, reusing vectors from the local embedding store where possible.
+        Remaining chunks are sent in batches admitted by the shared token-bucket limiter;
+        batches run concurrently while the budget allows and are retried after rate-limit responses.
+        """
+        progress = progress or JobProgress()
+        progress.begin(JobStage.EMBED, len(chunks))
+        embeddings = embedding_store.get_many(chunks) if embedding_store else [None] * len(chunks)
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        progress.advance(JobStage.EMBED, len(chunks) - len(missing))
+        logger.info("Creating embeddings. Chunks: %s, from local store: %s", len(chunks), len(chunks) - len(missing))
+
+        batches = self._batch_chunks([chunks[i] for i in missing])
+        with ThreadPoolExecutor(max_workers=app_config.embedding_rate_limit.concurrency) as executor:
+            results = executor.map(lambda batch: self._embed_batch(*batch, progress), batches)
+            new_embeddings = [embedding for batch_embeddings in results for embedding in batch_embeddings]
+        for i, embedding in zip(missing, new_embeddings):
+            embeddings[i] = embedding
         return embeddings
-    
-    def _clean_text(self, text):
-        '''
-        Remove extra whitespaces and newlines
-        '''
-        text = re.sub(r'\s+', ' ', text)  
-        return text.strip()
-
-    def _get_embedding_model(self):
-        if app_config.model.llm_provider == LLMProvider.OPENAI:
-            return OpenAIEmbeddings(
-                api_key=app_config.model.api_key,
-                model=app_config.model.embedding_model
-            )
-        else:
-            return CohereEmbeddings(
-                cohere_api_key=app_config.model.api_key,
-                model=app_config.model.embedding_model
-            )
-     
\ No newline at end of file
+
+    def _batch_chunks(self, chunks: list):
+        """
+        Group chunks into (chunks, estimated tokens) batches bounded by the provider's request size and the bucket capacity.
+        """
+        batches = []
+        batch, batch_tokens = [], 0
+        for chunk in chunks:
+            tokens = estimate_tokens(chunk)
+            if batch and (len(batch) >= max_embedding_batch_chunks or batch_tokens + tokens > embedding_rate_limiter.capacity):
+                batches.append((batch, batch_tokens))
+                batch, batch_tokens = [], 0
+            batch.append(chunk)
+            batch_tokens += tokens
+        if batch:
+            batches.append((batch, batch_tokens))
+        return batches
+
+    def _embed_batch(self, chunks: list, tokens: int, progress: JobProgress):
+        """
+        Embed one batch, persisting the result to the local embedding store.
+        """
+        max_retries = app_config.embedding_rate_limit.max_retries
+        for attempt in range(max_retries + 1):
+            embedding_rate_limiter.acquire(tokens)
+            try:
+                embeddings = self.embedding_model.embed_documents(chunks)
+            except Exception as e:
+                if not is_rate_limit_error(e) or attempt == max_retries:
+                    raise
+                logger.warning("Embedding batch rate limited (attempt %s of %s).", attempt + 1, max_retries + 1)
+                embedding_rate_limiter.penalize(get_retry_after(e))
+                continue
+            embedding_rate_limiter.reward()
+            if embedding_store:
+                embedding_store.put_many(chunks, embeddings)
+            progress.advance(JobStage.EMBED, len(chunks))
+            return embeddings
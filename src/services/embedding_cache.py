@@ -0,0 +1,203 @@
+import asyncio
+import hashlib
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from src.config.config import app_config
+from src.database import get_db_connection
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCacheBackend(ABC):
+    """
+    Shared second-level store so several workers can reuse each other's query embeddings.
+    """
+    async def setup(self):
+        pass
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[List[float]]:
+        pass
+
+    @abstractmethod
+    async def set(self, key: str, embedding: List[float], ttl_seconds: int):
+        pass
+
+
+class PostgresEmbeddingCacheBackend(EmbeddingCacheBackend):
+    """
+    Stores query embeddings in the application's Postgres database.
+    """
+    async def setup(self):
+        queries = [
+            """
+            CREATE TABLE IF NOT EXISTS query_embedding_cache (
+                cache_key TEXT PRIMARY KEY,
+                embedding DOUBLE PRECISION[] NOT NULL,
+                expires_at TIMESTAMPTZ NOT NULL
+            );
+            """,
+            """
+            DELETE FROM query_embedding_cache
+            WHERE expires_at < now();
+            """
+        ]
+        async with get_db_connection() as conn:
+            async with conn.cursor() as cursor:
+                for query in queries:
+                    await cursor.execute(query)
+
+    async def get(self, key: str) -> Optional[List[float]]:
+        query = """
+        SELECT embedding
+        FROM query_embedding_cache
+        WHERE cache_key = %s AND expires_at > now();
+        """
+        async with get_db_connection() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(query, (key,))
+                row = await cursor.fetchone()
+        return row[0] if row else None
+
+    async def set(self, key: str, embedding: List[float], ttl_seconds: int):
+        query = """
+        INSERT INTO query_embedding_cache (cache_key, embedding, expires_at)
+        VALUES (%s, %s, now() + make_interval(secs => %s))
+        ON CONFLICT (cache_key)
+        DO UPDATE SET embedding = EXCLUDED.embedding, expires_at = EXCLUDED.expires_at;
+        """
+        async with get_db_connection() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(query, (key, embedding, ttl_seconds))
+
+
+class QueryEmbeddingCache:
+    """
+    Bounded in-process LRU cache for query embeddings with a TTL and hit/miss counters.
+    Keys combine the embedding model name with a normalized form of the query.
+    """
+    def __init__(self, model_name: str, max_size: int, ttl_seconds: int, backend: Optional[EmbeddingCacheBackend] = None):
+        self.model_name = model_name
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.backend = backend
+        self._entries: "OrderedDict[str, tuple[float, List[float]]]" = OrderedDict()
+        self._pending: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    async def setup(self):
+        if self.backend is not None:
+            await self.backend.setup()
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        """
+        Lowercase, collapse whitespace and drop trailing punctuation so trivially different phrasings share an entry.
+        """
+        return " ".join(query.lower().split()).rstrip("?!. ")
+
+    def _key(self, query: str) -> str:
+        raw = f"{self.model_name}\x00{self.normalize(query)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _get_local(self, key: str) -> Optional[List[float]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, embedding = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return embedding
+
+    def _set_local(self, key: str, embedding: List[float]):
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, embedding)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def get_or_embed(self, query: str, embed: Callable[[str], Awaitable[List[float]]]) -> List[float]:
+        """
+        Return the cached embedding for the query, computing it with `embed` on a miss.
+        Concurrent misses for the same key share a single provider call.
+        """
+        key = self._key(query)
+        embedding = self._get_local(key)
+        if embedding is not None:
+            self.hits += 1
+            return embedding
+
+        pending = self._pending.get(key)
+        if pending is not None:
+            self.hits += 1
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            embedding = await self._get_shared(key)
+            if embedding is not None:
+                self.shared_hits += 1
+            else:
+                self.misses += 1
+                embedding = await embed(query)
+                await self._set_shared(key, embedding)
+            self._set_local(key, embedding)
+            future.set_result(embedding)
+            return embedding
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else is waiting on it
+            future.exception()
+            raise
+        finally:
+            del self._pending[key]
+
+    async def _get_shared(self, key: str) -> Optional[List[float]]:
+        if self.backend is None:
+            return None
+        try:
+            return await self.backend.get(key)
+        except Exception as e:
+            logger.warning("Shared embedding cache lookup failed: %s", str(e))
+            return None
+
+    async def _set_shared(self, key: str, embedding: List[float]):
+        if self.backend is None:
+            return
+        try:
+            await self.backend.set(key, embedding, self.ttl_seconds)
+        except Exception as e:
+            logger.warning("Shared embedding cache write failed: %s", str(e))
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.shared_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.shared_hits) / lookups if lookups else 0.0
+        }
+
+
+query_embedding_cache = QueryEmbeddingCache(
+    model_name=app_config.model.embedding_model,
+    max_size=app_config.embedding_cache.max_size,
+    ttl_seconds=app_config.embedding_cache.ttl_seconds,
+    backend=PostgresEmbeddingCacheBackend() if app_config.embedding_cache.shared else None
+)
@@ -0,0 +1,208 @@
+import argparse
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from src.config.config import app_config
+
+logger = logging.getLogger(__name__)
+
+VECTORS_FILE = "vectors.f32"
+INDEX_FILE = "index.tsv"
+META_FILE = "meta.json"
+LOCK_FILE = ".lock"
+
+
+class DiskEmbeddingStore:
+    """
+    Persistent, content-addressed embedding cache shared by every process on the host.
+
+    Vectors are appended as float32 rows to a memory-mapped array file and an append-only
+    index file maps hash(model name + chunk text) to a row. Writers take an exclusive file
+    lock; readers take a shared lock while they pick up rows appended by other processes.
+    """
+    def __init__(self, path: str, model_name: str):
+        self.path = path
+        self.model_name = model_name
+        os.makedirs(path, exist_ok=True)
+        self._lock = threading.Lock()
+        self._index: Dict[str, tuple] = {}
+        self._index_offset = 0
+        self._index_inode: Optional[int] = None
+        self._vectors: Optional[np.memmap] = None
+        self._dimension: Optional[int] = None
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool):
+        with open(self._file(LOCK_FILE), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def key(self, text: str, model_name: Optional[str] = None) -> str:
+        raw = f"{model_name or self.model_name}\x00{text}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _refresh(self):
+        """
+        Pick up index entries appended (or a compaction performed) by other processes. Caller holds the file lock.
+        """
+        index_path = self._file(INDEX_FILE)
+        if not os.path.exists(index_path):
+            return
+        inode = os.stat(index_path).st_ino
+        if inode != self._index_inode:
+            # The files were replaced by a compaction; start over
+            self._index = {}
+            self._index_offset = 0
+            self._index_inode = inode
+            self._vectors = None
+
+        if self._dimension is None and os.path.exists(self._file(META_FILE)):
+            with open(self._file(META_FILE)) as meta_file:
+                self._dimension = json.load(meta_file)["dimension"]
+
+        with open(index_path, "rb") as index_file:
+            index_file.seek(self._index_offset)
+            data = index_file.read()
+        # Only consume complete lines; a concurrent writer may be mid-append
+        complete = data[:data.rfind(b"\n") + 1]
+        for line in complete.decode("utf-8").splitlines():
+            key, model_name, row = line.split("\t")
+            self._index[key] = (model_name, int(row))
+        self._index_offset += len(complete)
+
+        rows = os.path.getsize(self._file(VECTORS_FILE)) // (self._dimension * 4) if self._dimension else 0
+        if rows and (self._vectors is None or self._vectors.shape[0] < rows):
+            self._vectors = np.memmap(self._file(VECTORS_FILE), dtype=np.float32, mode="r", shape=(rows, self._dimension))
+
+    def get_many(self, texts: List[str]) -> List[Optional[List[float]]]:
+        """
+        Return the stored embedding for each text, or None where it has not been computed yet.
+        """
+        with self._lock, self._file_lock(exclusive=False):
+            self._refresh()
+            results = []
+            for text in texts:
+                entry = self._index.get(self.key(text))
+                # An entry whose row is not in the file is treated as missing rather than read out of bounds
+                if entry is None or self._vectors is None or entry[1] >= self._vectors.shape[0]:
+                    results.append(None)
+                else:
+                    results.append(self._vectors[entry[1]].tolist())
+            return results
+
+    def put_many(self, texts: List[str], embeddings: List[List[float]]):
+        """
+        Append embeddings for texts that are not stored yet.
+        """
+        with self._lock, self._file_lock(exclusive=True):
+            self._refresh()
+            new_entries = {}
+            for text, embedding in zip(texts, embeddings):
+                key = self.key(text)
+                if key not in self._index and key not in new_entries:
+                    new_entries[key] = embedding
+            if not new_entries:
+                return
+
+            vectors = np.asarray(list(new_entries.values()), dtype=np.float32)
+            if self._dimension is None:
+                self._dimension = vectors.shape[1]
+                with open(self._file(META_FILE), "w") as meta_file:
+                    json.dump({"dimension": self._dimension}, meta_file)
+            elif vectors.shape[1] != self._dimension:
+                raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match store dimension {self._dimension}.")
+
+            vectors_path = self._file(VECTORS_FILE)
+            row_size = self._dimension * 4
+            size = os.path.getsize(vectors_path) if os.path.exists(vectors_path) else 0
+            if size % row_size:
+                # Drop the partial row of a writer that crashed mid-append so new rows stay aligned
+                logger.warning("Truncating %s bytes of a partial row from the embedding store.", size % row_size)
+                size -= size % row_size
+                os.truncate(vectors_path, size)
+            index_path = self._file(INDEX_FILE)
+            if os.path.exists(index_path) and os.path.getsize(index_path) > self._index_offset:
+                # Likewise drop a partial index line, which would otherwise merge with the next entry
+                os.truncate(index_path, self._index_offset)
+            first_row = size // row_size
+            # Vectors are written before the index so readers never see an entry without its row
+            with open(vectors_path, "ab") as vectors_file:
+                vectors_file.write(vectors.tobytes())
+                vectors_file.flush()
+                os.fsync(vectors_file.fileno())
+            with open(self._file(INDEX_FILE), "a", encoding="utf-8") as index_file:
+                index_file.writelines(
+                    f"{key}\t{self.model_name}\t{first_row + i}\n" for i, key in enumerate(new_entries)
+                )
+            self._refresh()
+
+    def compact(self, models: Optional[Iterable[str]] = None, keep_keys: Optional[Iterable[str]] = None) -> int:
+        """
+        Rewrite the store keeping only entries for the given models and/or keys. Returns the number of rows dropped.
+        """
+        models = set(models) if models is not None else None
+        keep_keys = set(keep_keys) if keep_keys is not None else None
+        with self._lock, self._file_lock(exclusive=True):
+            self._refresh()
+            if self._vectors is None:
+                return 0
+            kept = [
+                (key, model_name, row) for key, (model_name, row) in self._index.items()
+                if (models is None or model_name in models) and (keep_keys is None or key in keep_keys)
+            ]
+            dropped = self._vectors.shape[0] - len(kept)
+
+            vectors_tmp = self._file(VECTORS_FILE + ".tmp")
+            index_tmp = self._file(INDEX_FILE + ".tmp")
+            with open(vectors_tmp, "wb") as vectors_file:
+                for _, _, row in kept:
+                    vectors_file.write(self._vectors[row].tobytes())
+                vectors_file.flush()
+                os.fsync(vectors_file.fileno())
+            with open(index_tmp, "w", encoding="utf-8") as index_file:
+                index_file.writelines(f"{key}\t{model_name}\t{i}\n" for i, (key, model_name, _) in enumerate(kept))
+            os.replace(vectors_tmp, self._file(VECTORS_FILE))
+            os.replace(index_tmp, self._file(INDEX_FILE))
+            self._refresh()
+
+        logger.info("Compacted embedding store: kept %s rows, dropped %s.", len(kept), dropped)
+        return dropped
+
+    def __len__(self):
+        with self._lock, self._file_lock(exclusive=False):
+            self._refresh()
+            return len(self._index)
+
+
+embedding_store = DiskEmbeddingStore(
+    app_config.embedding_store.path,
+    app_config.model.embedding_model
+) if app_config.embedding_store.enabled else None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain the local embedding store.")
+    parser.add_argument("command", choices=["compact", "stats"])
+    parser.add_argument("--model", action="append", help="Keep only entries for this embedding model (repeatable).")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    store = embedding_store or DiskEmbeddingStore(app_config.embedding_store.path, app_config.model.embedding_model)
+    if args.command == "compact":
+        store.compact(models=args.model)
+    else:
+        print(f"{len(store)} embeddings in {store.path}")
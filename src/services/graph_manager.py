@@ -0,0 +1,46 @@
+import logging
+from typing import Callable, Optional
+
+from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+from langgraph.graph import StateGraph
+from langgraph.graph.state import CompiledStateGraph
+
+from src.config.config import app_config
+from src.database import get_pool
+
+logger = logging.getLogger(__name__)
+
+
+class GraphManager:
+    """
+    Owns the compiled LangGraph pipeline and its Postgres checkpointer for the lifetime of the process.
+    The graph is compiled once at startup; the checkpointer borrows a pooled connection per operation.
+    """
+    def __init__(self, build_graph: Callable[[], StateGraph]):
+        self._build_graph = build_graph
+        self._checkpointer: Optional[AsyncPostgresSaver] = None
+        self._graph: Optional[CompiledStateGraph] = None
+
+    async def start(self, run_migrations: bool = app_config.postgres.run_migrations):
+        """
+        Create the checkpointer on top of the connection pool, run its migrations and compile the graph.
+        """
+        self._checkpointer = AsyncPostgresSaver(get_pool())
+        if run_migrations:
+            await self._checkpointer.setup()
+            logger.info("Checkpoint migrations applied.")
+        else:
+            logger.info("Skipping checkpoint migrations.")
+
+        self._graph = self._build_graph().compile(checkpointer=self._checkpointer)
+        logger.info("Chat graph compiled.")
+
+    async def stop(self):
+        self._graph = None
+        self._checkpointer = None
+
+    @property
+    def graph(self) -> CompiledStateGraph:
+        if self._graph is None:
+            raise RuntimeError("Chat graph is not initialized. Was the application lifespan started?")
+        return self._graph
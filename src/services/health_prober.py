@@ -0,0 +1,124 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Optional
+
+from src.config.config import app_config
+from src.database import get_pool, ping_db
+from src.services.resources import resources
+
+logger = logging.getLogger(__name__)
+
+
+class ProbeResult:
+    def __init__(self, status: str, latency_ms: Optional[float] = None, checked_at: Optional[datetime] = None,
+                 error: Optional[str] = None):
+        self.status = status
+        self.latency_ms = latency_ms
+        self.checked_at = checked_at
+        self.error = error
+
+    def to_dict(self) -> dict:
+        return {"status": self.status, "latency_ms": self.latency_ms, "checked_at": self.checked_at, "error": self.error}
+
+
+class HealthProber:
+    """
+    Probes the application's dependencies in the background and caches the results for /health.
+    All probes of a round run at the same time, each bounded by `timeout_seconds`, so a hanging dependency
+    is reported down instead of stalling the endpoint. Probes with their own interval, like the LLM
+    provider's, are skipped until it has passed. Dependencies are "unknown" until their first probe completes.
+    """
+    def __init__(self, interval_seconds: int, timeout_seconds: float,
+                 probes: Dict[str, Callable[[], Awaitable[None]]], probe_intervals: Dict[str, int]):
+        self.interval_seconds = interval_seconds
+        self.timeout_seconds = timeout_seconds
+        self.probes = probes
+        self.probe_intervals = probe_intervals
+        self.results: Dict[str, ProbeResult] = {name: ProbeResult("unknown") for name in probes}
+        self._last_probed: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        self._task = asyncio.create_task(self._probe_periodically())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _probe_periodically(self):
+        while True:
+            try:
+                await self.probe_once()
+            except Exception as e:
+                logger.error("Health probe round failed: %s", str(e))
+            await asyncio.sleep(self.interval_seconds)
+
+    async def probe_once(self):
+        now = time.monotonic()
+        due = [
+            name for name in self.probes
+            if name not in self._last_probed or now - self._last_probed[name] >= self.probe_intervals.get(name, 0)
+        ]
+        await asyncio.gather(*(self._probe(name) for name in due))
+
+    async def _probe(self, name: str):
+        self._last_probed[name] = time.monotonic()
+        started_at = time.perf_counter()
+        try:
+            await asyncio.wait_for(self.probes[name](), self.timeout_seconds)
+            status, error = "up", None
+        except asyncio.TimeoutError:
+            status, error = "down", f"Timed out after {self.timeout_seconds}s"
+        except Exception as e:
+            status, error = "down", str(e)
+        latency_ms = (time.perf_counter() - started_at) * 1000
+        if status != self.results[name].status:
+            logger.log(logging.WARNING if status == "down" else logging.INFO, "Dependency %s is %s%s.",
+                       name, status, f": {error}" if error else "")
+        self.results[name] = ProbeResult(status, latency_ms, datetime.now(), error)
+
+    @staticmethod
+    def pool_stats() -> Optional[dict]:
+        """
+        Current use of the Postgres connection pool, read from the pool without a query.
+        """
+        try:
+            stats = get_pool().get_stats()
+        except RuntimeError:
+            return None
+        in_use = stats["pool_size"] - stats["pool_available"]
+        return {
+            "size": stats["pool_size"],
+            "available": stats["pool_available"],
+            "max_size": stats["pool_max"],
+            "waiting": stats.get("requests_waiting", 0),
+            "saturation": in_use / stats["pool_max"] if stats["pool_max"] else 0.0
+        }
+
+    def stats(self) -> dict:
+        return {
+            **{name: result.status for name, result in self.results.items()},
+            "dependencies": {name: result.to_dict() for name, result in self.results.items()},
+            "pool": self.pool_stats()
+        }
+
+
+async def _ping_vector_store():
+    vector_store = await asyncio.to_thread(resources.async_vector_store)
+    await vector_store.ping()
+
+
+health_prober = HealthProber(
+    interval_seconds=app_config.health.interval_seconds,
+    timeout_seconds=app_config.health.timeout_seconds,
+    probes={
+        "vector_store": _ping_vector_store,
+        "db": ping_db,
+        "llm_provider": resources.ping_provider
+    },
+    probe_intervals={"llm_provider": app_config.health.provider_interval_seconds}
+)
@@ -0,0 +1,138 @@
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Set
+
+from langchain_core.messages import BaseMessage, SystemMessage
+
+from src.services.rate_limiter import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PREFIX = "Summary of the earlier conversation with the student:\n"
+
+
+class ConversationSummary:
+    def __init__(self, text: str, last_message_id: Optional[str]):
+        self.text = text
+        self.last_message_id = last_message_id
+
+
+class HistoryManager:
+    """
+    Fits a thread's conversation into a prompt token budget.
+    The latest turns are kept verbatim, newest first, until the budget left after the system prompt and the
+    retrieved context is spent. Older turns are replaced by a rolling summary per thread, cached in memory.
+    The summary is extended with newly dropped turns in the background, so building a prompt never waits
+    for the LLM; until a refresh lands, the prompt uses the previous summary.
+    """
+    def __init__(self, max_prompt_tokens: int, summary_refresh_messages: int, max_summaries: int,
+                 summarize: Callable[[str, List[BaseMessage]], str]):
+        self.max_prompt_tokens = max_prompt_tokens
+        self.summary_refresh_messages = summary_refresh_messages
+        self.max_summaries = max_summaries
+        self.summarize = summarize
+        self._lock = threading.Lock()
+        self._summaries: "OrderedDict[str, ConversationSummary]" = OrderedDict()
+        self._refreshing: Set[str] = set()
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="history-summary")
+
+    @staticmethod
+    def conversation(messages: List[BaseMessage]) -> List[BaseMessage]:
+        """
+        Questions and answers of a thread, without tool calls and tool results.
+        """
+        return [
+            message
+            for message in messages
+            if message.type == "human" or (message.type == "ai" and not message.tool_calls)
+        ]
+
+    @staticmethod
+    def count_tokens(message: BaseMessage) -> int:
+        return estimate_tokens(message.content if isinstance(message.content, str) else str(message.content))
+
+    def fit(self, thread_id: str, messages: List[BaseMessage], reserved_tokens: int = 0) -> List[BaseMessage]:
+        """
+        Return the messages to send after the system prompt: the cached summary of older turns, if any,
+        followed by as many of the latest turns as fit in the budget left after `reserved_tokens`.
+        The latest message, the current question, is always kept.
+        """
+        conversation = self.conversation(messages)
+        if not conversation:
+            return []
+
+        summary = self._get_summary(thread_id)
+        budget = self.max_prompt_tokens - reserved_tokens - (estimate_tokens(summary.text) if summary else 0)
+        used = self.count_tokens(conversation[-1])
+        start = len(conversation) - 1
+        while start > 0:
+            tokens = self.count_tokens(conversation[start - 1])
+            if used + tokens > budget:
+                break
+            used += tokens
+            start -= 1
+        # Start the kept history at a question so an answer is never shown without it
+        while start < len(conversation) - 1 and conversation[start].type != "human":
+            start += 1
+
+        # The summary may have been cut at a different point for another node's budget; it stands for
+        # every message up to its last one, so only the messages after that count as new
+        covered = self._covered_index(summary, conversation)
+        if start - covered >= self.summary_refresh_messages:
+            self._schedule_refresh(thread_id, conversation, start)
+        if start == 0 or summary is None:
+            return conversation[start:]
+        return [SystemMessage(SUMMARY_PREFIX + summary.text)] + conversation[start:]
+
+    @staticmethod
+    def _covered_index(summary: Optional[ConversationSummary], conversation: List[BaseMessage]) -> int:
+        """
+        Number of leading messages of the conversation the summary covers, or 0 if its last message is not among them.
+        """
+        if summary is None:
+            return 0
+        for i in range(len(conversation) - 1, -1, -1):
+            message_id = conversation[i].id
+            if message_id is not None and message_id == summary.last_message_id:
+                return i + 1
+        return 0
+
+    def _get_summary(self, thread_id: str) -> Optional[ConversationSummary]:
+        with self._lock:
+            summary = self._summaries.get(thread_id)
+            if summary is not None:
+                self._summaries.move_to_end(thread_id)
+            return summary
+
+    def _schedule_refresh(self, thread_id: str, conversation: List[BaseMessage], end: int):
+        with self._lock:
+            if thread_id in self._refreshing:
+                return
+            self._refreshing.add(thread_id)
+        self._executor.submit(self._refresh, thread_id, list(conversation), end)
+
+    def _refresh(self, thread_id: str, conversation: List[BaseMessage], end: int):
+        """
+        Fold the turns before `end` that the summary does not cover yet into the thread's summary.
+        """
+        try:
+            summary = self._get_summary(thread_id)
+            covered = self._covered_index(summary, conversation)
+            # A refresh scheduled before the previous one landed may have nothing left to add
+            if covered >= end:
+                return
+            previous = summary.text if covered else ""
+            text = self.summarize(previous, conversation[covered:end])
+            with self._lock:
+                self._summaries[thread_id] = ConversationSummary(text, conversation[end - 1].id)
+                self._summaries.move_to_end(thread_id)
+                while len(self._summaries) > self.max_summaries:
+                    self._summaries.popitem(last=False)
+            logger.info("Refreshed conversation summary for thread %s with %s messages.", thread_id, end - covered)
+        except Exception as e:
+            logger.warning("Failed to refresh conversation summary for thread %s: %s", thread_id, str(e))
+        finally:
+            with self._lock:
+                self._refreshing.discard(thread_id)
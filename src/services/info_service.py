@@ -1,12 +1,14 @@
 from src.config.config import app_config
-from src.models.response_models import InfoResponse
-from src.services.vector_store import VectorStore
+from src.models.response_models import InfoResponse, CacheStatsResponse, RetentionStatsResponse, RouterStatsResponse
+from src.services.source_catalog import source_catalog
+from src.services.embedding_cache import query_embedding_cache
+from src.services.response_cache import response_cache
+from src.services.checkpoint_retention import checkpoint_retention
+from src.services.retrieval_router import retrieval_router
+from src.services.speculative_retrieval import speculative_retriever
 
 class InfoService:
-    def __init__(self):
-        self.vector_store = VectorStore()
-
-    def get_config_values(self):
+    async def get_config_values(self):
         return InfoResponse(
             llm_provider=app_config.model.llm_provider,
             llm=app_config.model.llm_model,
@@ -15,5 +17,17 @@ class InfoService:
             chunk_size=app_config.chunk_size,
             chunk_overlap=app_config.chunk_overlap,
             vector_dimension=app_config.vector_db.vector_dimension,
-            sources=self.vector_store.get_distinct_sources()
+            sources=await source_catalog.get_source_labels()
+        )
+
+    def get_cache_stats(self):
+        return CacheStatsResponse(
+            query_embeddings=query_embedding_cache.stats(),
+            responses=response_cache.stats()
         )
+
+    def get_retention_stats(self):
+        return RetentionStatsResponse(**checkpoint_retention.stats())
+
+    def get_router_stats(self):
+        return RouterStatsResponse(**retrieval_router.stats(), speculative_retrieval=speculative_retriever.stats())
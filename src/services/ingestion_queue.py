@@ -0,0 +1,272 @@
+import asyncio
+import logging
+import multiprocessing
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from enum import Enum
+from typing import Callable, Dict, List, Optional
+
+from src.config.config import app_config
+from src.models.response_models import JobResponse, JobStageResponse
+from src.repositories.ingestion_job_repository import IngestionJobRepository
+
+logger = logging.getLogger(__name__)
+
+
+class JobStatus(str, Enum):
+    QUEUED = "QUEUED"
+    RUNNING = "RUNNING"
+    COMPLETED = "COMPLETED"
+    FAILED = "FAILED"
+
+
+class JobStage(str, Enum):
+    FETCH = "FETCH"
+    CLEAN = "CLEAN"
+    SPLIT = "SPLIT"
+    EMBED = "EMBED"
+    INSERT = "INSERT"
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class JobProgress:
+    """
+    Thread-safe per-stage progress tracker handed to DocumentProcessor.
+    Counters are in stage-specific units: sources for fetch/clean/split, chunks for embed/insert.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages: Dict[JobStage, dict] = {
+            stage: {"status": JobStatus.QUEUED, "completed": 0, "total": 0}
+            for stage in JobStage
+        }
+
+    def begin(self, stage: JobStage, total: int = 0):
+        with self._lock:
+            self._stages[stage]["status"] = JobStatus.RUNNING
+            self._stages[stage]["total"] += total
+
+    def advance(self, stage: JobStage, amount: int = 1):
+        with self._lock:
+            self._stages[stage]["completed"] += amount
+
+    def end(self, stage: JobStage):
+        with self._lock:
+            self._stages[stage]["status"] = JobStatus.COMPLETED
+
+    def snapshot(self) -> Dict[str, JobStageResponse]:
+        with self._lock:
+            return {stage.value: JobStageResponse(**values) for stage, values in self._stages.items()}
+
+
+class IngestionJob:
+    def __init__(self, type: str, label: str, func: Callable, args: tuple, cleanup: Optional[Callable[[], None]] = None):
+        self.id = str(uuid.uuid4())
+        self.type = type
+        self.label = label
+        self.func = func
+        self.args = args
+        self.cleanup = cleanup
+        self.status = JobStatus.QUEUED
+        self.progress = JobProgress()
+        self.error: Optional[str] = None
+        self.created_at = datetime.now()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+
+    def to_response(self) -> JobResponse:
+        return JobResponse(
+            id=self.id,
+            type=self.type,
+            label=self.label,
+            status=self.status,
+            stages=self.progress.snapshot(),
+            error=self.error,
+            created_at=self.created_at,
+            started_at=self.started_at,
+            finished_at=self.finished_at
+        )
+
+
+class IngestionQueue:
+    """
+    Runs document ingestion off the request path on a bounded pool of worker threads.
+    Handlers enqueue a job and return its id immediately; progress is polled by id.
+    CPU-heavy stages are offloaded from the job threads to a shared process pool.
+    Job snapshots are saved to Postgres when a job is submitted and finishes, and every `flush_seconds`
+    while it runs, so a poll answered by another worker sees the job too. Jobs of
+    a worker that died keep their last saved status.
+    """
+    def __init__(self, workers: int, max_pending_jobs: int, max_finished_jobs: int, cpu_workers: int,
+                 repository: Optional[IngestionJobRepository] = None, flush_seconds: float = 2,
+                 retention_hours: float = 24):
+        self.workers = workers
+        self.cpu_workers = cpu_workers
+        self.process_pool: Optional[ProcessPoolExecutor] = None
+        self.max_pending_jobs = max_pending_jobs
+        self.max_finished_jobs = max_finished_jobs
+        self.repository = repository
+        self.flush_seconds = flush_seconds
+        self.retention_hours = retention_hours
+        self._queue: Optional[asyncio.Queue] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._tasks: List[asyncio.Task] = []
+        self._jobs: "OrderedDict[str, IngestionJob]" = OrderedDict()
+
+    async def start(self):
+        self._queue = asyncio.Queue(maxsize=self.max_pending_jobs)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ingestion")
+        if self.cpu_workers > 0:
+            # Spawn rather than fork: the server process is multi-threaded
+            self.process_pool = ProcessPoolExecutor(max_workers=self.cpu_workers, mp_context=multiprocessing.get_context("spawn"))
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        if self.repository is not None:
+            self._tasks.append(asyncio.create_task(self._flush()))
+        logger.info("Ingestion queue started with %s workers and %s CPU workers.", self.workers, self.cpu_workers)
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self._discard_pending_jobs()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        if self.process_pool is not None:
+            self.process_pool.shutdown(wait=False, cancel_futures=True)
+            self.process_pool = None
+
+    async def submit(self, type: str, label: str, func: Callable, *args,
+                     cleanup: Optional[Callable[[], None]] = None) -> IngestionJob:
+        """
+        Enqueue `func(*args, progress=...)` and return the job without waiting for it.
+        Coroutine functions are awaited on the event loop; others run on a worker thread.
+        `cleanup` is called if the queue stops before the job starts, to release what the job would have.
+        The job is saved before it is enqueued, so it can be polled from any worker as soon as its id is returned.
+        """
+        if self._queue is None:
+            raise RuntimeError("Ingestion queue is not started. Was the application lifespan started?")
+        if self._queue.full():
+            raise self._queue_full_error()
+        job = IngestionJob(type, label, func, args, cleanup)
+        await self._save(job)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            # Filled up by other submissions while the job was saved
+            self._fail(job, "Too many pending ingestion jobs.")
+            await self._save(job)
+            raise self._queue_full_error()
+        self._jobs[job.id] = job
+        self._evict_finished_jobs()
+        return job
+
+    async def get_job(self, job_id: str) -> Optional[JobResponse]:
+        """
+        Return the job's status from this worker, or from the snapshot saved by the worker that runs it.
+        """
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job.to_response()
+        if self.repository is None:
+            return None
+        row = await self.repository.get_job(job_id)
+        return JobResponse(**row) if row is not None else None
+
+    def _queue_full_error(self) -> QueueFullError:
+        return QueueFullError(f"Too many pending ingestion jobs (limit {self.max_pending_jobs}).")
+
+    def _fail(self, job: IngestionJob, error: str):
+        job.status = JobStatus.FAILED
+        job.error = error
+        job.finished_at = datetime.now()
+
+    async def _save(self, job: IngestionJob):
+        if self.repository is None:
+            return
+        try:
+            await self.repository.save_job(job.to_response().model_dump())
+        except Exception as e:
+            # Polls answered by this worker still see the job
+            logger.warning("Failed to save ingestion job %s: %s", job.id, str(e))
+
+    async def _flush(self):
+        """
+        Save the progress of running jobs and delete the snapshots of jobs finished longer ago than the retention.
+        """
+        purged_at = 0.0
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            for job in [job for job in self._jobs.values() if job.status == JobStatus.RUNNING]:
+                await self._save(job)
+            if time.monotonic() - purged_at > 3600:
+                purged_at = time.monotonic()
+                try:
+                    await self.repository.delete_finished_jobs(datetime.now() - timedelta(hours=self.retention_hours))
+                except Exception as e:
+                    logger.warning("Failed to delete finished ingestion jobs: %s", str(e))
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self._queue.get()
+            job.status = JobStatus.RUNNING
+            job.started_at = datetime.now()
+            logger.info("Ingestion job %s started (%s: %s).", job.id, job.type, job.label)
+            try:
+                if asyncio.iscoroutinefunction(job.func):
+                    # I/O-bound jobs run on the event loop and offload their own blocking work
+                    await job.func(*job.args, progress=job.progress)
+                else:
+                    await loop.run_in_executor(self._executor, lambda: job.func(*job.args, progress=job.progress))
+                job.status = JobStatus.COMPLETED
+                logger.info("Ingestion job %s completed.", job.id)
+            except Exception as e:
+                traceback.print_exc()
+                logger.error("Ingestion job %s failed: %s", job.id, str(e))
+                job.status = JobStatus.FAILED
+                job.error = str(e)
+            finally:
+                job.finished_at = datetime.now()
+                self._queue.task_done()
+            await self._save(job)
+
+    async def _discard_pending_jobs(self):
+        if self._queue is None:
+            return
+        while not self._queue.empty():
+            job = self._queue.get_nowait()
+            self._fail(job, "Ingestion queue stopped before the job started.")
+            await self._save(job)
+            if job.cleanup is not None:
+                try:
+                    job.cleanup()
+                except Exception as e:
+                    logger.error("Cleanup of ingestion job %s failed: %s", job.id, str(e))
+            self._queue.task_done()
+        logger.info("Ingestion queue stopped.")
+
+    def _evict_finished_jobs(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished_at is not None]
+        for job_id in finished[:max(len(finished) - self.max_finished_jobs, 0)]:
+            del self._jobs[job_id]
+
+
+ingestion_queue = IngestionQueue(
+    workers=app_config.ingestion.workers,
+    max_pending_jobs=app_config.ingestion.max_pending_jobs,
+    max_finished_jobs=app_config.ingestion.max_finished_jobs,
+    cpu_workers=app_config.ingestion.cpu_workers,
+    repository=IngestionJobRepository(),
+    flush_seconds=app_config.ingestion.job_flush_seconds,
+    retention_hours=app_config.ingestion.job_retention_hours
+)
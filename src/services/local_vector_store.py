@@ -0,0 +1,473 @@
+import asyncio
+import fcntl
+import io
+import json
+import logging
+import os
+import shutil
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from src.config.config import LocalIndexType, app_config
+from src.services.vector_store import AsyncVectorStore, SourceStats, VectorStore, hash_chunk
+
+logger = logging.getLogger(__name__)
+
+VECTORS_FILE = "vectors.npy"
+DOCUMENTS_FILE = "documents.jsonl"
+LOG_FILE = "log.jsonl"
+SEGMENTS_DIR = "segments"
+CURRENT_FILE = "CURRENT"
+LOCK_FILE = ".lock"
+GENERATION_PREFIX = "generation-"
+
+KMEANS_ITERATIONS = 10
+# Vectors sampled per list when training the IVF centroids
+KMEANS_SAMPLES_PER_LIST = 64
+# The log is folded into a new base once it holds as many rows as the base (at least this many) or this many operations
+LOG_COMPACTION_MIN_ROWS = 10000
+LOG_COMPACTION_MAX_OPS = 1000
+MIN_BUFFER_ROWS = 1024
+
+
+class _Snapshot:
+    """
+    Immutable view of the index. Writers publish a new snapshot instead of changing this one,
+    so searches read it without taking a lock.
+    """
+    def __init__(self, vectors: Optional[np.ndarray], documents: List[dict], centroids: Optional[np.ndarray] = None,
+                 assignments: Optional[np.ndarray] = None, trained_size: int = 0):
+        self.vectors = vectors
+        self.documents = documents
+        self.centroids = centroids
+        self.assignments = assignments
+        self.trained_size = trained_size
+
+
+class LocalVectorStore(VectorStore):
+    """
+    In-process NumPy vector index with cosine metric, persisted to disk.
+
+    Vectors are kept L2-normalized so cosine similarity is a single matrix-vector product.
+    EXACT mode scores every vector; IVF mode clusters the vectors with k-means and only
+    scores the lists whose centroids are closest to the query.
+
+    On disk, a generation directory holds a base (vectors.npy, documents.jsonl) and an append-only log of the
+    inserts and deletes since; inserted vectors go to one segment file per insert. A write appends to the log
+    instead of rewriting the index, and the log is compacted into a new generation, named by the CURRENT file,
+    once it has grown as large as the base. Every process on the host shares the files: writers take an
+    exclusive file lock and readers pick up the operations other processes appended.
+    """
+    def __init__(self, path: str, index_type: LocalIndexType, ivf_lists: int = 0, ivf_probes: int = 8):
+        self.path = path
+        self.index_type = index_type
+        self.ivf_lists = ivf_lists
+        self.ivf_probes = ivf_probes
+        self._lock = threading.RLock()
+        self._snapshot = _Snapshot(None, [])
+        # Writer-owned array whose leading rows back the snapshot's vectors, so inserts append in place
+        self._buffer: Optional[np.ndarray] = None
+        self._generation = 0
+        self._current_inode: Optional[int] = None
+        self._log_offset = 0
+        self._base_rows = 0
+        self._log_rows = 0
+        self._log_ops = 0
+        os.makedirs(path, exist_ok=True)
+        with self._lock, self._file_lock(exclusive=True):
+            if not os.path.exists(self._file(CURRENT_FILE)):
+                self._create_layout()
+            self._catch_up()
+        logger.info("Loaded local vector index with %s vectors.", len(self._snapshot.documents))
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _generation_file(self, name: str, generation: Optional[int] = None) -> str:
+        generation = self._generation if generation is None else generation
+        return os.path.join(self.path, f"{GENERATION_PREFIX}{generation}", name)
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool, blocking: bool = True):
+        """
+        Hold the index's file lock; yields False instead of waiting when `blocking` is off and the lock is taken.
+        """
+        with open(self._file(LOCK_FILE), "a") as lock_file:
+            flags = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+            try:
+                fcntl.flock(lock_file, flags if blocking else flags | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _fsync_write(path: str, data: bytes, mode: str = "wb"):
+        with open(path, mode) as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+
+    def _create_layout(self):
+        """
+        Create the first generation, adopting an index saved by earlier versions as its base. Caller holds the file lock.
+        """
+        os.makedirs(self._generation_file(SEGMENTS_DIR, 0), exist_ok=True)
+        for name in (VECTORS_FILE, DOCUMENTS_FILE):
+            if os.path.exists(self._file(name)):
+                os.replace(self._file(name), self._generation_file(name, 0))
+        self._fsync_write(self._generation_file(LOG_FILE, 0), b"", "ab")
+        self._fsync_write(self._file(CURRENT_FILE + ".tmp"), b"0")
+        os.replace(self._file(CURRENT_FILE + ".tmp"), self._file(CURRENT_FILE))
+
+    def _changed(self) -> bool:
+        """
+        Cheap check for changes made by other processes, without taking the file lock.
+        """
+        try:
+            return (os.stat(self._file(CURRENT_FILE)).st_ino != self._current_inode
+                    or os.path.getsize(self._generation_file(LOG_FILE)) != self._log_offset)
+        except FileNotFoundError:
+            # A compaction removed our generation
+            return True
+
+    def _refresh(self, blocking: bool = True):
+        """
+        Apply the operations other processes appended to the log. A non-blocking refresh gives up while
+        a writer holds a lock, leaving the caller to read the current snapshot.
+        """
+        if not self._changed() or not self._lock.acquire(blocking=blocking):
+            return
+        try:
+            with self._file_lock(exclusive=False, blocking=blocking) as locked:
+                if locked:
+                    self._catch_up()
+        finally:
+            self._lock.release()
+
+    def _catch_up(self):
+        """
+        Load a new generation if one was compacted, then apply the log's unread operations. Caller holds both locks.
+        """
+        current_inode = os.stat(self._file(CURRENT_FILE)).st_ino
+        if current_inode != self._current_inode:
+            with open(self._file(CURRENT_FILE)) as current_file:
+                self._generation = int(current_file.read())
+            vectors, documents = self._read_base()
+            self._buffer = None
+            self._snapshot = self._index(vectors, documents)
+            self._current_inode = current_inode
+            self._log_offset = 0
+            self._base_rows = len(documents)
+            self._log_rows = self._log_ops = 0
+
+        with open(self._generation_file(LOG_FILE), "rb") as log_file:
+            log_file.seek(self._log_offset)
+            data = log_file.read()
+        # Only consume complete lines; a writer that crashed mid-append leaves a partial one
+        complete = data[:data.rfind(b"\n") + 1]
+        for line in complete.decode("utf-8").splitlines():
+            operation = json.loads(line)
+            vectors = np.load(self._generation_file(os.path.join(SEGMENTS_DIR, operation["segment"]))) \
+                if operation["op"] == "insert" else None
+            self._apply(operation, vectors)
+        self._log_offset += len(complete)
+
+    def _read_base(self):
+        vectors_path = self._generation_file(VECTORS_FILE)
+        documents_path = self._generation_file(DOCUMENTS_FILE)
+        if not os.path.exists(vectors_path) or not os.path.exists(documents_path):
+            return None, []
+        with open(documents_path, encoding="utf-8") as documents_file:
+            documents = [json.loads(line) for line in documents_file]
+        return (np.load(vectors_path) if documents else None), documents
+
+    def _index(self, vectors: Optional[np.ndarray], documents: List[dict]) -> _Snapshot:
+        if self.index_type == LocalIndexType.IVF and documents:
+            centroids, assignments = self._train_ivf(vectors)
+            return _Snapshot(vectors, documents, centroids, assignments, len(documents))
+        return _Snapshot(vectors, documents)
+
+    def _write(self, operation: dict, vectors: Optional[np.ndarray] = None):
+        """
+        Append an operation to the log and apply it, compacting the log when it is due.
+        """
+        with self._lock, self._file_lock(exclusive=True):
+            self._catch_up()
+            if operation["op"] == "delete" and not any(map(self._delete_predicate(operation), self._snapshot.documents)):
+                return
+            log_path = self._generation_file(LOG_FILE)
+            if os.path.getsize(log_path) > self._log_offset:
+                # Drop the partial line of a writer that crashed mid-append
+                os.truncate(log_path, self._log_offset)
+            if vectors is not None:
+                operation["segment"] = f"{uuid.uuid4().hex}.npy"
+                buffer = io.BytesIO()
+                np.save(buffer, vectors)
+                # Written before the log entry so readers never see an insert without its vectors
+                self._fsync_write(self._generation_file(os.path.join(SEGMENTS_DIR, operation["segment"])), buffer.getvalue())
+            line = (json.dumps(operation) + "\n").encode("utf-8")
+            self._fsync_write(log_path, line, "ab")
+            self._log_offset += len(line)
+            self._apply(operation, vectors)
+            if self._log_ops >= LOG_COMPACTION_MAX_OPS or self._log_rows >= max(self._base_rows, LOG_COMPACTION_MIN_ROWS):
+                self._compact()
+
+    @staticmethod
+    def _delete_predicate(operation: dict) -> Callable[[dict], bool]:
+        if "source_label" in operation:
+            return lambda document: document["source_label"] == operation["source_label"]
+        if "chunk_hashes" in operation:
+            chunk_hashes = set(operation["chunk_hashes"])
+            return lambda document: document["source_key"] == operation["source_key"] and \
+                document.get("chunk_hash") in chunk_hashes
+        return lambda document: document["source_key"] == operation["source_key"]
+
+    def _apply(self, operation: dict, vectors: Optional[np.ndarray]):
+        """
+        Publish the snapshot with an operation applied. Caller holds the lock.
+        """
+        snapshot = self._snapshot
+        self._log_ops += 1
+        if operation["op"] == "insert":
+            self._log_rows += len(vectors)
+            documents = snapshot.documents + operation["documents"]
+            all_vectors = self._append_vectors(snapshot, vectors)
+            centroids, assignments, trained_size = snapshot.centroids, snapshot.assignments, snapshot.trained_size
+            if self.index_type == LocalIndexType.IVF:
+                # Route new vectors to their nearest list; retrain on the writer's thread once the index has doubled
+                if centroids is None or len(documents) >= 2 * trained_size:
+                    centroids, assignments = self._train_ivf(all_vectors)
+                    trained_size = len(documents)
+                else:
+                    assignments = np.concatenate([assignments, np.argmax(vectors @ centroids.T, axis=1)])
+            self._snapshot = _Snapshot(all_vectors, documents, centroids, assignments, trained_size)
+            return
+
+        predicate = self._delete_predicate(operation)
+        keep = [i for i, document in enumerate(snapshot.documents) if not predicate(document)]
+        if len(keep) == len(snapshot.documents):
+            return
+        self._buffer = None
+        self._snapshot = _Snapshot(
+            snapshot.vectors[keep] if snapshot.vectors is not None else None,
+            [snapshot.documents[i] for i in keep],
+            snapshot.centroids,
+            snapshot.assignments[keep] if snapshot.assignments is not None else None,
+            snapshot.trained_size
+        )
+
+    def _append_vectors(self, snapshot: _Snapshot, vectors: np.ndarray) -> np.ndarray:
+        """
+        Vectors of the snapshot followed by the new ones. Rows are written past the end of the published
+        snapshot, which readers never look at, and the buffer doubles when full, so appends are amortized O(rows).
+        """
+        count = len(snapshot.documents)
+        if self._buffer is None or count + len(vectors) > len(self._buffer) or self._buffer.shape[1] != vectors.shape[1]:
+            buffer = np.empty((max(2 * (count + len(vectors)), MIN_BUFFER_ROWS), vectors.shape[1]), dtype=np.float32)
+            if count:
+                buffer[:count] = snapshot.vectors
+            self._buffer = buffer
+        self._buffer[count:count + len(vectors)] = vectors
+        return self._buffer[:count + len(vectors)]
+
+    def _compact(self):
+        """
+        Write the current snapshot as the base of a new generation with an empty log, switch CURRENT to it
+        and remove the older generations. Caller holds both locks.
+        """
+        snapshot = self._snapshot
+        generation = self._generation + 1
+        shutil.rmtree(self._generation_file("", generation), ignore_errors=True)
+        os.makedirs(self._generation_file(SEGMENTS_DIR, generation))
+        buffer = io.BytesIO()
+        np.save(buffer, snapshot.vectors if snapshot.vectors is not None else np.zeros((0, 0), dtype=np.float32))
+        self._fsync_write(self._generation_file(VECTORS_FILE, generation), buffer.getvalue())
+        self._fsync_write(self._generation_file(DOCUMENTS_FILE, generation),
+                          "".join(json.dumps(document) + "\n" for document in snapshot.documents).encode("utf-8"))
+        self._fsync_write(self._generation_file(LOG_FILE, generation), b"")
+        self._fsync_write(self._file(CURRENT_FILE + ".tmp"), str(generation).encode("utf-8"))
+        os.replace(self._file(CURRENT_FILE + ".tmp"), self._file(CURRENT_FILE))
+
+        for name in os.listdir(self.path):
+            if name.startswith(GENERATION_PREFIX) and name != f"{GENERATION_PREFIX}{generation}":
+                shutil.rmtree(self._file(name), ignore_errors=True)
+        self._generation = generation
+        self._current_inode = os.stat(self._file(CURRENT_FILE)).st_ino
+        self._log_offset = 0
+        self._base_rows = len(snapshot.documents)
+        self._log_rows = self._log_ops = 0
+        logger.info("Compacted local vector index to generation %s with %s vectors.", generation, self._base_rows)
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def delete_embeddings(self, source_key: str):
+        self._write({"op": "delete", "source_key": source_key})
+
+    def delete_embeddings_by_source_label(self, source_label: str):
+        self._write({"op": "delete", "source_label": source_label})
+
+    def get_chunk_hashes(self, source_key: str) -> set:
+        self._refresh()
+        return {document.get("chunk_hash") for document in self._snapshot.documents if document["source_key"] == source_key}
+
+    def delete_chunks(self, source_key: str, chunk_hashes):
+        self._write({"op": "delete", "source_key": source_key, "chunk_hashes": list(chunk_hashes)})
+
+    def ping(self):
+        pass
+
+    def insert_embeddings(self, chunks, embeddings, source_key, source_label, type):
+        if not chunks:
+            return
+        vectors = self._normalize(np.asarray(embeddings, dtype=np.float32))
+        created_at = datetime.now().isoformat()
+        documents = [
+            {
+                "text": chunk,
+                "source_key": source_key,
+                "source_label": source_label,
+                "created_at": created_at,
+                "type": type,
+                "chunk_hash": hash_chunk(chunk)
+            }
+            for chunk in chunks
+        ]
+        self._write({"op": "insert", "documents": documents}, vectors)
+
+    def _train_ivf(self, vectors: np.ndarray):
+        """
+        Train IVF centroids with spherical k-means on a sample of the vectors. Returns the centroids and each vector's list.
+        """
+        count = len(vectors)
+        lists = self.ivf_lists or max(1, int(np.sqrt(count)))
+        lists = min(lists, count)
+        rng = np.random.default_rng(0)
+        sample = vectors[rng.choice(count, size=min(count, lists * KMEANS_SAMPLES_PER_LIST), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=lists, replace=False)]
+        for _ in range(KMEANS_ITERATIONS):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            for i in range(lists):
+                members = sample[labels == i]
+                # Re-seed empty lists with a random sample vector
+                centroids[i] = members.sum(axis=0) if len(members) else sample[rng.integers(len(sample))]
+            centroids = self._normalize(centroids)
+        logger.info("Trained local IVF index with %s lists over %s vectors.", lists, count)
+        return centroids, np.argmax(vectors @ centroids.T, axis=1)
+
+    def similarity_search(self, embedding, limit=10) -> list:
+        query = self._normalize(np.asarray(embedding, dtype=np.float32))
+        # Never wait for a writer; search the latest published snapshot instead
+        self._refresh(blocking=False)
+        snapshot = self._snapshot
+        if not snapshot.documents:
+            return []
+        candidates = None
+        if self.index_type == LocalIndexType.IVF and snapshot.centroids is not None:
+            probes = min(self.ivf_probes, len(snapshot.centroids))
+            nearest_lists = np.argpartition(-(snapshot.centroids @ query), probes - 1)[:probes]
+            candidates = np.flatnonzero(np.isin(snapshot.assignments, nearest_lists))
+        vectors = snapshot.vectors if candidates is None else snapshot.vectors[candidates]
+        scores = vectors @ query
+        top = min(limit, len(scores))
+        if top == 0:
+            return []
+        best = np.argpartition(-scores, top - 1)[:top]
+        best = best[np.argsort(-scores[best])]
+        rows = []
+        for i in best:
+            index = int(i) if candidates is None else int(candidates[i])
+            # Astra reports cosine similarity rescaled to [0, 1]; match it
+            rows.append({**snapshot.documents[index], "$similarity": (1 + float(scores[i])) / 2})
+        return rows
+
+    def get_distinct_sources(self) -> list:
+        self._refresh(blocking=False)
+        return list(dict.fromkeys(document["source_label"] for document in self._snapshot.documents))
+
+    def get_chunk_vectors(self, source_key: str, chunk_hashes) -> list:
+        chunk_hashes = set(chunk_hashes)
+        self._refresh()
+        snapshot = self._snapshot
+        return [
+            vector.tolist()
+            for document, vector in zip(snapshot.documents, snapshot.vectors if snapshot.vectors is not None else [])
+            if document["source_key"] == source_key and document.get("chunk_hash") in chunk_hashes
+        ]
+
+    def get_source_stats(self) -> list:
+        self._refresh()
+        snapshot = self._snapshot
+        stats = SourceStats()
+        for document, vector in zip(snapshot.documents, snapshot.vectors if snapshot.vectors is not None else []):
+            stats.add({**document, "$vector": vector})
+        return stats.result()
+
+
+class AsyncLocalVectorStore(AsyncVectorStore):
+    """
+    Async facade over the process-wide LocalVectorStore. Every call runs in a worker thread: reads scan the
+    whole snapshot and writes append to the index files, so neither belongs on the event loop.
+    """
+    def __init__(self, store: LocalVectorStore):
+        self.store = store
+
+    async def delete_embeddings(self, source_key: str):
+        await asyncio.to_thread(self.store.delete_embeddings, source_key)
+
+    async def delete_embeddings_by_source_label(self, source_label: str):
+        await asyncio.to_thread(self.store.delete_embeddings_by_source_label, source_label)
+
+    async def get_chunk_hashes(self, source_key: str) -> set:
+        return await asyncio.to_thread(self.store.get_chunk_hashes, source_key)
+
+    async def delete_chunks(self, source_key: str, chunk_hashes):
+        await asyncio.to_thread(self.store.delete_chunks, source_key, chunk_hashes)
+
+    async def ping(self):
+        self.store.ping()
+
+    async def insert_embeddings(self, chunks, embeddings, source_key, source_label, type):
+        await asyncio.to_thread(self.store.insert_embeddings, chunks, embeddings, source_key, source_label, type)
+
+    async def similarity_search(self, embedding, limit=10) -> list:
+        return await asyncio.to_thread(self.store.similarity_search, embedding, limit)
+
+    async def get_distinct_sources(self) -> list:
+        return await asyncio.to_thread(self.store.get_distinct_sources)
+
+    async def close(self):
+        # The index is shared by the process and every mutation is logged to disk
+        pass
+
+
+_local_vector_store: Optional[LocalVectorStore] = None
+_local_vector_store_lock = threading.Lock()
+
+
+def get_local_vector_store() -> LocalVectorStore:
+    """
+    Return the process-wide local index; every caller must share it to see the same data.
+    """
+    global _local_vector_store
+    with _local_vector_store_lock:
+        if _local_vector_store is None:
+            _local_vector_store = LocalVectorStore(
+                app_config.vector_db.local_path,
+                app_config.vector_db.local_index_type,
+                app_config.vector_db.ivf_lists,
+                app_config.vector_db.ivf_probes
+            )
+        return _local_vector_store
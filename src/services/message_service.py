@@ -1,108 +1,115 @@
+import argparse
+import asyncio
+import logging
+from typing import Optional
 from src.repositories.message_repository import MessageRepository
+from src.repositories.conversation_repository import ConversationRepository
 from src.models.response_models import MessageResponse, MessageSource
 from src.config.config import NO_INFO_RESPONSE
+from src.database import open_pool, close_pool
+
+logger = logging.getLogger(__name__)
 
 class MessageService:
     def __init__(self):
         self.message_repository = MessageRepository()
-        self.sources = []
+        self.conversation_repository = ConversationRepository()
 
-    async def get_user_messages(self, user_id: str):
+    async def get_user_messages(self, user_id: str, before_step: Optional[int] = None, limit: int = 50):
+        """
+        Fetches a page of messages for the given user: the `limit` newest messages older than `before_step`, sorted by step.
         """
-        Fetches messages for the given user by querying the repository.
+        rows = await self.conversation_repository.get_messages(user_id, before_step, limit)
+        return [
+            MessageResponse(
+                thread_id=row["thread_id"],
+                id=row["id"],
+                content=row["content"],
+                type=row["role"],
+                step=row["step"],
+                sources=[MessageSource(**source) for source in row["sources"]]
+            )
+            for row in reversed(rows)
+        ]
+
+    async def record_exchange(self, user_id: str, question: str, answer: str, sources: list):
         """
-        rows = await self.message_repository.get_messages_by_user(user_id)
-        valid_rows = [row for row in rows if row.get("metadata", {}).get("writes") is not None]
-        messages = [self._parse_message_row(row) for row in valid_rows]
-        messages = [message for message in messages if message is not None]
-        # sort messages by step
-        messages = sorted(messages, key=lambda x: x.step)
-        return messages
+        Appends an answered question to the user's history.
+        """
+        if answer.startswith(NO_INFO_RESPONSE):
+            sources = []
+        await self.conversation_repository.append_exchange(user_id, question, answer, sources)
     
     async def delete_all_messages(self, user_id: str):
         """
         Deletes all messages for the given user by querying the repository.
         """
-        return await self.message_repository.delete_all_messages(user_id)
-    
-    def _parse_user_message(self, message: dict):
-        content = message.get("content")
-        type = message.get("role")
-        return content, type
-    
-    def _parse_ai_message(self, message: dict):
-        kwargs = message.get("kwargs", {})
-        content = kwargs.get("content")
-        message_type = kwargs.get("type") 
-        return content, message_type
+        await self.message_repository.delete_all_messages(user_id)
+        await self.conversation_repository.delete_messages(user_id)
+
+    async def backfill(self) -> int:
+        """
+        Projects the history stored in checkpoints for every thread into the conversation_messages table.
+        Returns the number of inserted messages.
+        """
+        inserted = 0
+        for thread_id in await self.message_repository.get_thread_ids():
+            rows = await self.message_repository.get_checkpoint_messages(thread_id)
+            messages = [message for message in map(self._parse_checkpoint_row, rows) if message is not None]
+            count = await self.conversation_repository.backfill_thread(thread_id, messages)
+            logger.info("Thread %s: backfilled %s messages.", thread_id, count)
+            inserted += count
+        return inserted
     
-    def _get_sources(self, message: dict):
-        artifacts = message.get("kwargs", {}).get("artifact", [])
+    def _parse_checkpoint_row(self, row: dict) -> Optional[dict]:
+        """
+        Maps a checkpoint history row to a projection row. Questions are stored with a "user" role; answers,
+        including questions recorded for cached exchanges, as serialized LangChain messages.
+        """
+        content, message_type = row.get("content"), row.get("type")
+        if content is None or message_type is None:
+            return None
+        if message_type == "human":
+            message_type = "user"
+
+        sources = []
+        if row.get("node") == "generate" and not content.startswith(NO_INFO_RESPONSE):
+            sources = self._get_sources(row.get("sources", []))
+
+        return {"role": message_type, "content": content, "sources": sources, "created_at": row.get("created_at")}
+
+    def _get_sources(self, rows: list):
         source_keys = set()
         sources = []
-        for artifact in artifacts:
-            source_key = artifact.get("kwargs", {}).get("metadata", {}).get("source_key")
+        for row in rows:
+            source_key = row.get("source_key")
             if source_key in source_keys:
                 continue
             source_keys.add(source_key)
-            source_label = artifact.get("kwargs", {}).get("metadata", {}).get("source_label")
-            sources.append(MessageSource(source_key=source_key, source_label=source_label))
+            sources.append({"source_key": source_key, "source_label": row.get("source_label")})
 
         return sources
 
-    def _parse_message_row(self, row: dict) -> MessageResponse:
-        """
-        Parses a database row to extract the thread_id, id, content, and type (user/ai).
-        """
-        metadata = row.get("metadata", {})
-        writes = metadata.get("writes") or {}  # Default to an empty dict if None
-        step = metadata.get("step")
-        # Find content and type based on available keys in "writes"
-        content, message_type = None, None
-        sources = []
 
-        if isinstance(writes, dict):  # Ensure writes is a dictionary
-            if "__start__" in writes:  # User messages
-                messages = writes.get("__start__", {}).get("messages", [])
-                if not isinstance(messages, list):
-                    return None
-                
-                message = next(iter(messages), {})
-                content, message_type = self._parse_user_message(message)
-            elif "direct_response" in writes:  # potential AI message
-                messages = writes.get("direct_response", {}).get("messages", [])
-                if not isinstance(messages, list):
-                    return None
-                
-                message = next(iter(messages), {})
-                content, message_type = self._parse_ai_message(message)
-            elif "tools" in writes:  # source
-                messages = writes.get("tools", {}).get("messages", [])
-                if not isinstance(messages, list):
-                    return None
-                
-                message = next(iter(messages), {})
-                my_sources = self._get_sources(message)
-                self.sources = my_sources
-                return None
-            elif "generate" in writes:  # ai message
-                messages = writes.get("generate", {}).get("messages", [])
-                if not isinstance(messages, list):
-                    return None
-                
-                message = next(iter(messages), {})
-                content, message_type = self._parse_ai_message(message)
-                if not content.startswith(NO_INFO_RESPONSE):
-                    sources = self.sources
-                    self.sources = []
-            else: 
-                return None
+async def _run_backfill():
+    await open_pool()
+    try:
+        await ConversationRepository().setup()
+        message_repository = MessageRepository()
+        await message_repository.create_backfill_indexes()
+        try:
+            inserted = await MessageService().backfill()
+        finally:
+            await message_repository.drop_backfill_indexes()
+        print(f"Backfilled {inserted} messages into conversation_messages")
+    finally:
+        await close_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain the conversation history projection.")
+    parser.add_argument("command", choices=["backfill"])
+    parser.parse_args()
 
-        return MessageResponse(
-            thread_id=row.get("thread_id"),
-            id=row.get("id"),
-            content=content,
-            type=message_type,
-            step=step,
-            sources=sources
-        )
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_run_backfill())
@@ -0,0 +1,108 @@
+import logging
+import math
+import threading
+import time
+from typing import Optional
+
+from src.config.config import LLMProvider, app_config
+
+logger = logging.getLogger(__name__)
+
+# Per-provider defaults: embedding tokens per minute and the maximum texts per embed request
+PROVIDER_LIMITS = {
+    LLMProvider.COHERE: {"tokens_per_minute": 100_000, "max_batch_chunks": 96},
+    LLMProvider.OPENAI: {"tokens_per_minute": 1_000_000, "max_batch_chunks": 2048},
+}
+
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap token estimate for English text; errs on the high side for short chunks.
+    """
+    return math.ceil(len(text) / CHARS_PER_TOKEN) + 1
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    status_code = getattr(error, "status_code", None)
+    if status_code is None:
+        status_code = getattr(getattr(error, "response", None), "status_code", None)
+    return status_code == 429
+
+
+def get_retry_after(error: Exception) -> Optional[float]:
+    """
+    Read the Retry-After header from a provider error, if the SDK exposes it.
+    """
+    headers = getattr(error, "headers", None) or getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucketLimiter:
+    """
+    Thread-safe token bucket that refills continuously up to one minute of budget.
+    The refill rate is scaled down on 429 responses and recovers gradually on success.
+    """
+    MIN_RATE_FACTOR = 0.1
+
+    def __init__(self, tokens_per_minute: int):
+        self.capacity = tokens_per_minute
+        self._tokens = float(tokens_per_minute)
+        self._updated_at = time.monotonic()
+        self._rate_factor = 1.0
+        self._blocked_until = 0.0
+        self._condition = threading.Condition()
+
+    def _refill(self, now: float):
+        rate = self.capacity / 60 * self._rate_factor
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * rate)
+        self._updated_at = now
+
+    def acquire(self, tokens: int):
+        """
+        Block until `tokens` are available and take them. Requests larger than the bucket wait for a full bucket.
+        """
+        tokens = min(tokens, self.capacity)
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._blocked_until and self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                rate = self.capacity / 60 * self._rate_factor
+                wait = max(self._blocked_until - now, (tokens - self._tokens) / rate)
+                self._condition.wait(timeout=wait)
+
+    def penalize(self, retry_after: Optional[float] = None):
+        """
+        Back off after a 429: drain the bucket, halve the refill rate and pause until Retry-After.
+        """
+        with self._condition:
+            now = time.monotonic()
+            self._tokens = 0.0
+            self._updated_at = now
+            self._rate_factor = max(self.MIN_RATE_FACTOR, self._rate_factor / 2)
+            if retry_after:
+                self._blocked_until = max(self._blocked_until, now + retry_after)
+            logger.warning("Embedding rate limit hit; refill rate reduced to %.0f%%.", self._rate_factor * 100)
+
+    def reward(self):
+        with self._condition:
+            if self._rate_factor < 1.0:
+                self._rate_factor = min(1.0, self._rate_factor * 1.1)
+                self._condition.notify_all()
+
+
+def _get_limit(name: str, override: Optional[int]) -> int:
+    return override if override is not None else PROVIDER_LIMITS[app_config.model.llm_provider][name]
+
+
+embedding_rate_limiter = TokenBucketLimiter(
+    tokens_per_minute=_get_limit("tokens_per_minute", app_config.embedding_rate_limit.tokens_per_minute)
+)
+max_embedding_batch_chunks = _get_limit("max_batch_chunks", app_config.embedding_rate_limit.max_batch_chunks)
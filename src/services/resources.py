@@ -0,0 +1,152 @@
+import asyncio
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Dict, List
+
+import httpx
+
+from src.config.config import LLMProvider, app_config
+from src.services.vector_store import AsyncVectorStore, VectorStore, create_async_vector_store, create_vector_store
+
+logger = logging.getLogger(__name__)
+
+
+class ResourceRegistry:
+    """
+    Process-wide clients for the vector store, the embedding model and the LLM.
+    Each client is created once, on first use, and shared by every request, ingestion job and background task,
+    so their keep-alive HTTP connection pools are reused. `close()` releases the connections at shutdown.
+    Provider SDKs are imported when their client is first created, keeping them out of the startup path;
+    `warm_up()` creates the clients ahead of the first request once the application is ready.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        # One lock per client, so creating a slow one does not block getting the others
+        self._creation_locks: Dict[str, threading.Lock] = {}
+        self._resources: Dict[str, Any] = {}
+        self._closers: List[Callable[[], Awaitable[None]]] = []
+
+    def _get(self, name: str, create: Callable[[], Any]) -> Any:
+        resource = self._resources.get(name)
+        if resource is not None:
+            return resource
+        with self._lock:
+            creation_lock = self._creation_locks.setdefault(name, threading.Lock())
+        with creation_lock:
+            if name not in self._resources:
+                resource = create()
+                with self._lock:
+                    self._resources[name] = resource
+                logger.info("Created shared %s client.", name)
+            return self._resources[name]
+
+    def vector_store(self) -> VectorStore:
+        """
+        The blocking vector store, for ingestion threads.
+        """
+        return self._get("vector_store", create_vector_store)
+
+    def async_vector_store(self) -> AsyncVectorStore:
+        return self._get("async_vector_store", self._create_async_vector_store)
+
+    def embedding_model(self):
+        return self._get("embedding_model", self._create_embedding_model)
+
+    def llm(self):
+        return self._get("llm", self._create_llm)
+
+    async def ping_provider(self):
+        """
+        Check that the LLM provider is reachable and accepts the API key, without spending tokens.
+        """
+        # Created off the event loop in case the provider SDK is not imported yet
+        llm = await asyncio.to_thread(self.llm)
+        if app_config.model.llm_provider == LLMProvider.OPENAI:
+            await llm.root_async_client.models.retrieve(app_config.model.llm_model)
+        else:
+            await llm.async_client.check_api_key()
+
+    def warm_up(self):
+        """
+        Create every client. Blocking; run it in a thread after startup.
+        """
+        for create in (self.async_vector_store, self.vector_store, self.embedding_model, self.llm):
+            try:
+                create()
+            except Exception as e:
+                logger.warning("Failed to warm up a shared client: %s", str(e))
+
+    def _create_async_vector_store(self) -> AsyncVectorStore:
+        vector_store = create_async_vector_store()
+        self._add_closer(vector_store.close)
+        return vector_store
+
+    def _add_closer(self, close: Callable[[], Awaitable[None]]):
+        with self._lock:
+            self._closers.append(close)
+
+    def _http_clients(self) -> dict:
+        """
+        HTTP clients for an OpenAI model, owned by the registry so they can be closed.
+        """
+        http_client, http_async_client = httpx.Client(), httpx.AsyncClient()
+
+        async def close():
+            http_client.close()
+            await http_async_client.aclose()
+        self._add_closer(close)
+        return {"http_client": http_client, "http_async_client": http_async_client}
+
+    def _close_cohere(self, model):
+        async def close():
+            model.client.__exit__(None, None, None)
+            await model.async_client.__aexit__(None, None, None)
+        self._add_closer(close)
+
+    def _create_embedding_model(self):
+        if app_config.model.llm_provider == LLMProvider.OPENAI:
+            from langchain_openai import OpenAIEmbeddings
+            return OpenAIEmbeddings(
+                api_key=app_config.model.api_key,
+                model=app_config.model.embedding_model,
+                **self._http_clients()
+            )
+        from langchain_cohere import CohereEmbeddings
+        embedding_model = CohereEmbeddings(
+            cohere_api_key=app_config.model.api_key,
+            model=app_config.model.embedding_model
+        )
+        self._close_cohere(embedding_model)
+        return embedding_model
+
+    def _create_llm(self):
+        if app_config.model.llm_provider == LLMProvider.OPENAI:
+            from langchain_openai import ChatOpenAI
+            return ChatOpenAI(
+                api_key=app_config.model.api_key,
+                model=app_config.model.llm_model,
+                **self._http_clients()
+            )
+        from langchain_cohere import ChatCohere
+        llm = ChatCohere(
+            cohere_api_key=app_config.model.api_key,
+            model=app_config.model.llm_model
+        )
+        self._close_cohere(llm)
+        return llm
+
+    async def close(self):
+        """
+        Close the clients' HTTP connections. Called once from the application lifespan.
+        """
+        with self._lock:
+            closers, self._closers = self._closers, []
+            self._resources.clear()
+        for close in closers:
+            try:
+                await close()
+            except Exception as e:
+                logger.warning("Failed to close a shared client: %s", str(e))
+
+
+resources = ResourceRegistry()
@@ -0,0 +1,191 @@
+import asyncio
+import logging
+import re
+import threading
+import time
+from typing import List, Optional
+
+import numpy as np
+
+from src.config.config import app_config
+from src.repositories.response_cache_repository import ResponseCacheRepository
+
+logger = logging.getLogger(__name__)
+
+# Follow-ups that point back into the conversation depend on thread context and are never cached
+REFERENTIAL_PATTERN = re.compile(r"\b(it|its|this|that|these|those|they|them|above|previous|again|more)\b", re.IGNORECASE)
+
+
+class CachedResponse:
+    def __init__(self, answer: str, sources: List[dict], similarity: float):
+        self.answer = answer
+        self.sources = sources
+        self.similarity = similarity
+
+
+class SemanticResponseCache:
+    """
+    Caches final answers by question embedding and serves them for near-duplicate questions.
+    Lookups are an exact cosine search over a fixed-size ring buffer of normalized vectors.
+    Invalidations are shared through a generation counter in Postgres: `invalidate` bumps it, and `sync`,
+    called before lookups, drops the cached answers once another worker has bumped it. The counter is read
+    at most every `sync_seconds`, so other workers may serve answers from the old corpus for that long.
+    """
+    def __init__(self, similarity_threshold: float, max_entries: int, ttl_seconds: int, enabled: bool = True,
+                 sync_seconds: float = 5, repository: Optional[ResponseCacheRepository] = None):
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self.sync_seconds = sync_seconds
+        self.repository = repository
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._generation: Optional[int] = None
+        self._synced_at = 0.0
+        self._publishing: set = set()
+        self._lock = threading.Lock()
+        self._vectors: Optional[np.ndarray] = None
+        self._expires_at = np.zeros(max_entries, dtype=np.float64)
+        self._entries: List[Optional[tuple]] = [None] * max_entries
+        self._next = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._miss_latency_total = 0.0
+        self._hit_latency_total = 0.0
+
+    async def start(self):
+        """
+        Bind the cache to the event loop that owns the connection pool, for invalidations from ingestion threads.
+        """
+        self._loop = asyncio.get_running_loop()
+        await self.sync()
+
+    async def stop(self):
+        if self._publishing:
+            await asyncio.gather(*self._publishing, return_exceptions=True)
+        self._loop = None
+
+    async def sync(self):
+        """
+        Drop the cached answers if another worker invalidated the cache since the last check.
+        """
+        if not self.enabled or self.repository is None or time.monotonic() - self._synced_at < self.sync_seconds:
+            return
+        self._synced_at = time.monotonic()
+        try:
+            generation = await self.repository.get_generation()
+        except Exception as e:
+            logger.warning("Failed to read the response cache generation: %s", str(e))
+            return
+        if self._generation is not None and generation != self._generation:
+            self._clear()
+            logger.info("Semantic response cache invalidated by another worker.")
+        self._generation = generation
+
+    def is_cacheable(self, question: str) -> bool:
+        return self.enabled and not REFERENTIAL_PATTERN.search(question)
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, embedding: List[float]) -> Optional[CachedResponse]:
+        """
+        Return the most similar cached answer above the similarity threshold, if any.
+        """
+        with self._lock:
+            if self._vectors is None:
+                return None
+            scores = self._vectors @ self._normalize(embedding)
+            scores[self._expires_at < time.monotonic()] = -1.0
+            index = int(np.argmax(scores))
+            similarity = float(scores[index])
+            if similarity < self.similarity_threshold:
+                return None
+            answer, sources = self._entries[index]
+            return CachedResponse(answer, sources, similarity)
+
+    def store(self, embedding: List[float], answer: str, sources: List[dict]):
+        if not answer.strip():
+            # Serving an empty answer for the whole TTL is worse than asking the LLM again
+            return
+        vector = self._normalize(embedding)
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+            self._vectors[self._next] = vector
+            self._expires_at[self._next] = time.monotonic() + self.ttl_seconds
+            self._entries[self._next] = (answer, sources)
+            self._next = (self._next + 1) % self.max_entries
+
+    def invalidate(self):
+        """
+        Drop every cached answer and tell the other workers to do the same. Called whenever the corpus changes,
+        from the event loop or from ingestion threads.
+        """
+        self._clear()
+        logger.info("Semantic response cache invalidated.")
+        if not self.enabled or self.repository is None or self._loop is None:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            task = self._loop.create_task(self._publish())
+            self._publishing.add(task)
+            task.add_done_callback(self._publishing.discard)
+        else:
+            asyncio.run_coroutine_threadsafe(self._publish(), self._loop)
+
+    async def _publish(self):
+        try:
+            self._generation = await self.repository.bump_generation()
+        except Exception as e:
+            logger.error("Failed to publish the response cache invalidation: %s", str(e))
+
+    def _clear(self):
+        with self._lock:
+            self._vectors = None
+            self._expires_at[:] = 0
+            self._entries = [None] * self.max_entries
+            self._next = 0
+            self.invalidations += 1
+
+    def record_hit(self, latency: float):
+        self.hits += 1
+        self._hit_latency_total += latency
+
+    def record_miss(self, latency: float):
+        self.misses += 1
+        self._miss_latency_total += latency
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        avg_miss_latency = self._miss_latency_total / self.misses if self.misses else 0.0
+        avg_hit_latency = self._hit_latency_total / self.hits if self.hits else 0.0
+        return {
+            "size": sum(entry is not None for entry in self._entries),
+            "max_size": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "invalidations": self.invalidations,
+            "avg_hit_latency_seconds": avg_hit_latency,
+            "avg_miss_latency_seconds": avg_miss_latency,
+            # Estimated from the average full-pipeline latency of misses
+            "latency_saved_seconds": max(avg_miss_latency - avg_hit_latency, 0.0) * self.hits
+        }
+
+
+response_cache = SemanticResponseCache(
+    similarity_threshold=app_config.response_cache.similarity_threshold,
+    max_entries=app_config.response_cache.max_entries,
+    ttl_seconds=app_config.response_cache.ttl_seconds,
+    enabled=app_config.response_cache.enabled,
+    sync_seconds=app_config.response_cache.sync_seconds,
+    repository=ResponseCacheRepository()
+)
@@ -0,0 +1,207 @@
+import asyncio
+import contextvars
+import logging
+import random
+import re
+from enum import Enum
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+import numpy as np
+
+from src.config.config import app_config
+from src.services.response_cache import REFERENTIAL_PATTERN
+from src.services.source_catalog import source_catalog
+
+logger = logging.getLogger(__name__)
+
+SMALL_TALK_PATTERN = re.compile(
+    r"^(hi|hello|hey|thanks|thank you|thx|ok|okay|bye|goodbye|good (morning|afternoon|evening)|who are you|what can you do)"
+    r"( there)?[\s!?.,]*$",
+    re.IGNORECASE
+)
+TOPIC_PATTERN = re.compile(
+    r"\b(algorithms?|complexity|big[- ]?o|sort(ing)?|search(ing)?|trees?|graphs?|heaps?|stacks?|queues?|arrays?|"
+    r"linked lists?|hash(ing|es)?|hash ?(tables?|maps?)|recursion|recursive|dynamic programming|memoization|greedy|"
+    r"bfs|dfs|dijkstra|binary|tries?|traversal)\b",
+    re.IGNORECASE
+)
+
+
+class Route(str, Enum):
+    RETRIEVE = "RETRIEVE"
+    DIRECT = "DIRECT"
+    LLM = "LLM"
+
+
+class RoutingDecision:
+    def __init__(self, route: Route, reason: str, similarity: Optional[float] = None, source_label: Optional[str] = None):
+        self.route = route
+        self.reason = reason
+        self.similarity = similarity
+        self.source_label = source_label
+
+    def lean(self, midpoint: float) -> Optional[Route]:
+        """
+        The route the similarity points to, for comparison with the LLM on ambiguous questions.
+        """
+        if self.route != Route.LLM:
+            return self.route
+        if self.similarity is None:
+            return None
+        return Route.RETRIEVE if self.similarity >= midpoint else Route.DIRECT
+
+
+class RetrievalRouter:
+    """
+    Decides in-process whether a question needs retrieval, before the graph runs.
+    Small talk is answered directly and follow-up questions are left to the LLM. Everything else is routed by the
+    cosine similarity of the question embedding to the closest source centroid: above `retrieve_threshold`
+    retrieves, below `direct_threshold` answers directly (unless the question names a DSA topic), and the band
+    in between falls back to the LLM router. A sample of local decisions is also checked against the LLM in the
+    background; decisions and agreement are logged and counted for threshold tuning.
+    """
+    def __init__(self, enabled: bool, retrieve_threshold: float, direct_threshold: float, shadow_sample_rate: float,
+                 refresh_seconds: int, get_source_centroids: Callable[[], Awaitable[List[Dict[str, Any]]]]):
+        self.enabled = enabled
+        self.retrieve_threshold = retrieve_threshold
+        self.direct_threshold = direct_threshold
+        self.shadow_sample_rate = shadow_sample_rate
+        self.refresh_seconds = refresh_seconds
+        self.get_source_centroids = get_source_centroids
+        self._centroids: Optional[np.ndarray] = None
+        self._labels: List[str] = []
+        self._task: Optional[asyncio.Task] = None
+        self._shadow_tasks: Set[asyncio.Task] = set()
+        self.decisions = {route.value: 0 for route in Route}
+        self.compared = 0
+        self.agreed = 0
+
+    async def start(self):
+        self._task = asyncio.create_task(self._refresh_periodically())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for task in list(self._shadow_tasks):
+            task.cancel()
+        await asyncio.gather(*self._shadow_tasks, return_exceptions=True)
+
+    async def _refresh_periodically(self):
+        while True:
+            try:
+                await self.refresh_centroids()
+            except Exception as e:
+                logger.warning("Failed to refresh router centroids: %s", str(e))
+            await asyncio.sleep(self.refresh_seconds)
+
+    async def refresh_centroids(self):
+        sources = await self.get_source_centroids()
+        if not sources:
+            self._centroids, self._labels = None, []
+            return
+        centroids = np.stack([source["centroid"] for source in sources]).astype(np.float32)
+        norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        self._centroids, self._labels = centroids / norms, [source["source_label"] for source in sources]
+        logger.info("Router centroids refreshed for %s sources.", len(sources))
+
+    @property
+    def midpoint(self) -> float:
+        return (self.retrieve_threshold + self.direct_threshold) / 2
+
+    def _route_without_embedding(self, text: str) -> Optional[RoutingDecision]:
+        if SMALL_TALK_PATTERN.match(text):
+            return RoutingDecision(Route.DIRECT, "small_talk")
+        if REFERENTIAL_PATTERN.search(text):
+            return RoutingDecision(Route.LLM, "follow_up")
+        if self._centroids is None:
+            return RoutingDecision(Route.LLM, "no_centroids")
+        return None
+
+    def needs_embedding(self, question: str) -> bool:
+        """
+        Whether routing the question depends on its embedding.
+        """
+        return self.enabled and self._route_without_embedding(question.strip()) is None
+
+    def route(self, question: str, embedding: Optional[List[float]] = None) -> RoutingDecision:
+        if not self.enabled:
+            return RoutingDecision(Route.LLM, "disabled")
+        text = question.strip()
+        decision = self._route_without_embedding(text)
+        if decision is not None:
+            return self._record(decision)
+        if embedding is None:
+            return self._record(RoutingDecision(Route.LLM, "no_embedding"))
+
+        centroids, labels = self._centroids, self._labels
+        query = np.asarray(embedding, dtype=np.float32)
+        query /= np.linalg.norm(query) or 1.0
+        scores = centroids @ query
+        best = int(np.argmax(scores))
+        similarity, source_label = float(scores[best]), labels[best]
+        if similarity >= self.retrieve_threshold:
+            decision = RoutingDecision(Route.RETRIEVE, "similar_source", similarity, source_label)
+        elif similarity <= self.direct_threshold and not TOPIC_PATTERN.search(text):
+            decision = RoutingDecision(Route.DIRECT, "off_topic", similarity, source_label)
+        elif similarity >= self.midpoint and TOPIC_PATTERN.search(text):
+            decision = RoutingDecision(Route.RETRIEVE, "topic_keyword", similarity, source_label)
+        else:
+            decision = RoutingDecision(Route.LLM, "ambiguous", similarity, source_label)
+        return self._record(decision)
+
+    def _record(self, decision: RoutingDecision) -> RoutingDecision:
+        self.decisions[decision.route.value] += 1
+        logger.info("Router decision: %s (%s, similarity %s, closest source %s).", decision.route.value, decision.reason,
+                    f"{decision.similarity:.3f}" if decision.similarity is not None else "n/a", decision.source_label)
+        return decision
+
+    def should_shadow(self, decision: RoutingDecision) -> bool:
+        return decision.route != Route.LLM and random.random() < self.shadow_sample_rate
+
+    def shadow(self, decision: RoutingDecision, llm_route: Callable[[], Awaitable[Route]]):
+        """
+        Ask the LLM router for a locally routed question in the background and record whether it agrees.
+        """
+        async def run():
+            try:
+                self.record_llm_decision(decision, await llm_route())
+            except Exception as e:
+                logger.warning("Shadow routing call failed: %s", str(e))
+        # Run outside the graph's callback context so the shadow call's tokens are not streamed with the answer
+        task = asyncio.create_task(run(), context=contextvars.Context())
+        self._shadow_tasks.add(task)
+        task.add_done_callback(self._shadow_tasks.discard)
+
+    def record_llm_decision(self, decision: RoutingDecision, llm_route: Route):
+        """
+        Compare the LLM's route with the local decision, or with its lean for questions left to the LLM.
+        """
+        lean = decision.lean(self.midpoint)
+        if lean is None:
+            return
+        self.compared += 1
+        self.agreed += lean == llm_route
+        logger.info("Router agreement: local %s (%s, similarity %s), LLM %s.", lean.value, decision.reason,
+                    f"{decision.similarity:.3f}" if decision.similarity is not None else "n/a", llm_route.value)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "sources": len(self._labels),
+            "decisions": self.decisions,
+            "compared": self.compared,
+            "agreement_rate": self.agreed / self.compared if self.compared else 0.0
+        }
+
+
+retrieval_router = RetrievalRouter(
+    enabled=app_config.router.enabled,
+    retrieve_threshold=app_config.router.retrieve_threshold,
+    direct_threshold=app_config.router.direct_threshold,
+    shadow_sample_rate=app_config.router.shadow_sample_rate,
+    refresh_seconds=app_config.router.refresh_seconds,
+    get_source_centroids=source_catalog.get_source_centroids
+)
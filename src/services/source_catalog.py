@@ -0,0 +1,157 @@
+import argparse
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.config.config import app_config
+from src.database import open_pool, close_pool
+from src.repositories.source_catalog_repository import SourceCatalogRepository
+from src.services.resources import resources
+
+logger = logging.getLogger(__name__)
+
+
+class SourceCatalog:
+    """
+    Catalog of the ingested sources with their type, chunk count, size and ingestion time, kept in Postgres.
+    DocumentProcessor records a source once its chunks are synced and deletes remove it, so listing the
+    sources never scans the vector collection. The labels served by /info are cached in memory; changes made
+    in this process invalidate the cache, and it expires after `cache_ttl_seconds` to pick up other workers' changes.
+    """
+    def __init__(self, cache_ttl_seconds: int, repository: SourceCatalogRepository):
+        self.cache_ttl_seconds = cache_ttl_seconds
+        self.repository = repository
+        self._labels: Optional[List[str]] = None
+        self._loaded_at = 0.0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._backfill_task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """
+        Bind the catalog to the event loop that owns the connection pool, for updates from ingestion threads.
+        An empty catalog, as after the first deploy, is backfilled from the vector store in the background.
+        """
+        self._loop = asyncio.get_running_loop()
+        try:
+            if not await self.repository.has_sources():
+                self._backfill_task = asyncio.create_task(self._backfill_in_background())
+        except Exception as e:
+            logger.warning("Failed to check the source catalog: %s", str(e))
+
+    async def stop(self):
+        if self._backfill_task is not None:
+            self._backfill_task.cancel()
+            await asyncio.gather(self._backfill_task, return_exceptions=True)
+            self._backfill_task = None
+
+    async def _backfill_in_background(self):
+        try:
+            await self.backfill()
+        except Exception as e:
+            logger.error("Failed to backfill the source catalog: %s", str(e))
+
+    @property
+    def backfilling(self) -> bool:
+        return self._backfill_task is not None and not self._backfill_task.done()
+
+    def invalidate(self):
+        self._labels = None
+
+    async def get_source_labels(self) -> List[str]:
+        if self.backfilling:
+            # The catalog is still being filled; list the labels from the vector store as before
+            return await resources.async_vector_store().get_distinct_sources()
+        if self._labels is None or time.monotonic() - self._loaded_at > self.cache_ttl_seconds:
+            self._labels = await self.repository.get_source_labels()
+            self._loaded_at = time.monotonic()
+        return self._labels
+
+    async def get_sources(self, offset: int, limit: int) -> Tuple[List[Dict[str, Any]], int]:
+        return await self.repository.get_sources(offset, limit)
+
+    async def record_source(self, source_key: str, source_label: str, type: str, chunk_count: int, byte_size: int,
+                            vector_sum: Optional[List[float]] = None, replace_vector_sum: bool = False):
+        """
+        Record a source's chunks after ingestion; a source left without chunks is removed.
+        `vector_sum` is the change in the sum of the source's normalized chunk vectors, or its total with `replace_vector_sum`.
+        """
+        try:
+            if chunk_count:
+                await self.repository.save_source(source_key, source_label, type, chunk_count, byte_size,
+                                                  vector_sum, replace_vector_sum)
+            else:
+                await self.repository.delete_source(source_key)
+        finally:
+            self.invalidate()
+
+    def record_source_from_thread(self, source_key: str, source_label: str, type: str, chunk_count: int, byte_size: int,
+                                  vector_sum: Optional[List[float]] = None, replace_vector_sum: bool = False):
+        """
+        Blocking variant of `record_source` for ingestion threads; runs on the catalog's event loop.
+        """
+        if self._loop is None:
+            raise RuntimeError("Source catalog is not started. Was the application lifespan started?")
+        future = asyncio.run_coroutine_threadsafe(
+            self.record_source(source_key, source_label, type, chunk_count, byte_size, vector_sum, replace_vector_sum),
+            self._loop
+        )
+        future.result()
+
+    async def get_source_centroids(self) -> List[Dict[str, Any]]:
+        """
+        Mean normalized chunk vector per source, from the vector sums kept up to date by ingestion.
+        """
+        return [
+            {
+                "source_key": source["source_key"],
+                "source_label": source["source_label"],
+                "centroid": np.asarray(source["vector_sum"], dtype=np.float32) / source["chunk_count"],
+                "count": source["chunk_count"]
+            }
+            for source in await self.repository.get_vector_sums()
+        ]
+
+    async def delete_source_label(self, source_label: str):
+        try:
+            await self.repository.delete_sources_by_label(source_label)
+        finally:
+            self.invalidate()
+
+    async def backfill(self) -> int:
+        """
+        Rebuild the catalog entries of every source from a full scan of the vector store. Returns the number of sources.
+        """
+        sources = await asyncio.to_thread(resources.vector_store().get_source_stats)
+        if sources:
+            await self.repository.save_sources(sources)
+        self.invalidate()
+        logger.info("Backfilled the source catalog with %s sources.", len(sources))
+        return len(sources)
+
+
+source_catalog = SourceCatalog(
+    cache_ttl_seconds=app_config.source_catalog.cache_ttl_seconds,
+    repository=SourceCatalogRepository()
+)
+
+
+async def _backfill():
+    await open_pool()
+    try:
+        await source_catalog.repository.setup()
+        count = await source_catalog.backfill()
+        print(f"Backfilled {count} sources")
+    finally:
+        await close_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain the source catalog.")
+    parser.add_argument("command", choices=["backfill"])
+    parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_backfill())
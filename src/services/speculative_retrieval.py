@@ -0,0 +1,97 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, List, Optional
+
+import numpy as np
+
+from src.config.config import app_config
+
+logger = logging.getLogger(__name__)
+
+
+class Speculation:
+    """
+    A vector search for the raw question, started while the LLM router decides whether to retrieve.
+    """
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.outcome: Optional[str] = None
+
+
+class SpeculativeRetriever:
+    """
+    Overlaps the retrieval round-trips with the routing LLM call. The question is embedded and searched as soon as
+    it arrives; the retrieve tool uses those rows if its query embedding is close enough to the question's,
+    and searches normally otherwise. Speculations that end up unused are cancelled and counted as wasted work:
+    "mismatched" when the tool searched for a different query, "unneeded" when the answer needed no retrieval.
+    """
+    def __init__(self, enabled: bool, match_similarity: float):
+        self.enabled = enabled
+        self.match_similarity = match_similarity
+        self.started = 0
+        self.outcomes = {"used": 0, "mismatched": 0, "unneeded": 0, "failed": 0}
+
+    def start(self, question: str, embed: Callable[[str], Awaitable[List[float]]],
+              search: Callable[[List[float]], Awaitable[list]]) -> Optional[Speculation]:
+        if not self.enabled:
+            return None
+
+        async def run():
+            embedding = await embed(question)
+            return embedding, await search(embedding)
+
+        self.started += 1
+        return Speculation(asyncio.create_task(run()))
+
+    async def resolve(self, speculation: Speculation, embedding: List[float]) -> Optional[list]:
+        """
+        Return the speculative rows if they were searched for a query matching `embedding`, otherwise None.
+        """
+        try:
+            speculative_embedding, rows = await speculation.task
+        except Exception as e:
+            speculation.outcome = speculation.outcome or "failed"
+            logger.warning("Speculative retrieval failed: %s", str(e))
+            return None
+
+        a = np.asarray(embedding, dtype=np.float32)
+        b = np.asarray(speculative_embedding, dtype=np.float32)
+        similarity = float(a @ b / ((np.linalg.norm(a) * np.linalg.norm(b)) or 1.0))
+        if similarity < self.match_similarity:
+            speculation.outcome = speculation.outcome or "mismatched"
+            logger.info("Speculative retrieval discarded: tool query similarity %.3f.", similarity)
+            return None
+        speculation.outcome = "used"
+        return rows
+
+    def finish(self, speculation: Optional[Speculation]):
+        """
+        Account for a speculation once the question has been answered, cancelling it if it is still running.
+        """
+        if speculation is None:
+            return
+        if speculation.outcome is None:
+            speculation.outcome = "unneeded"
+            if speculation.task.done():
+                # Retrieve the result so a failed search is not reported as an unhandled task exception
+                if not speculation.task.cancelled():
+                    speculation.task.exception()
+            else:
+                speculation.task.cancel()
+        self.outcomes[speculation.outcome] += 1
+
+    def stats(self) -> dict:
+        finished = sum(self.outcomes.values())
+        wasted = finished - self.outcomes["used"]
+        return {
+            "enabled": self.enabled,
+            "started": self.started,
+            **self.outcomes,
+            "waste_rate": wasted / finished if finished else 0.0
+        }
+
+
+speculative_retriever = SpeculativeRetriever(
+    enabled=app_config.router.speculative_retrieval,
+    match_similarity=app_config.router.speculative_match_similarity
+)
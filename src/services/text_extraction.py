@@ -0,0 +1,43 @@
+"""
+CPU-bound ingestion stages that run in the ingestion process pool.
+This module only depends on pypdf, BeautifulSoup and the text splitter so spawned workers start quickly.
+"""
+import re
+from typing import List
+
+from bs4 import BeautifulSoup
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from pypdf import PdfReader
+
+
+def clean_text(text: str) -> str:
+    '''
+    Remove extra whitespaces and newlines
+    '''
+    text = re.sub(r'\s+', ' ', text)
+    return text.strip()
+
+
+def split_text(text: str, chunk_size: int, chunk_overlap: int) -> List[str]:
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    return splitter.split_text(text)
+
+
+def clean_and_split(text: str, chunk_size: int, chunk_overlap: int) -> List[str]:
+    return split_text(clean_text(text), chunk_size, chunk_overlap)
+
+
+def extract_page_range(file_path: str, start: int, end: int, chunk_size: int, chunk_overlap: int) -> List[str]:
+    """
+    Extract, clean and split pages [start, end) of a PDF.
+    """
+    reader = PdfReader(file_path)
+    pages = (clean_text(reader.pages[i].extract_text()) for i in range(start, end))
+    return split_text(" ".join(page for page in pages if page), chunk_size, chunk_overlap)
+
+
+def extract_html_text(html: str) -> str:
+    """
+    Extract the visible text of an HTML page, as WebBaseLoader does.
+    """
+    return BeautifulSoup(html, "html.parser").get_text()
@@ -0,0 +1,137 @@
+import asyncio
+import hashlib
+import logging
+from typing import Callable, Dict, Optional, Tuple
+
+import aiohttp
+
+from src.config.config import app_config
+from src.repositories.source_fetch_repository import SourceFetchRepository
+from src.services.ingestion_queue import JobProgress, JobStage, ingestion_queue
+from src.services.text_extraction import extract_html_text
+
+logger = logging.getLogger(__name__)
+
+
+class UrlIngestionEngine:
+    """
+    Fetches URL sources concurrently over a shared connection pool with per-host limits.
+    Requests are conditional on the ETag / Last-Modified of the previous fetch, and pages whose
+    extracted text hashes to the stored content hash are skipped without embedding or vector writes.
+    """
+    def __init__(self, max_connections: int, max_connections_per_host: int, timeout_seconds: int,
+                 process_concurrency: int, user_agent: str, repository: SourceFetchRepository):
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.timeout_seconds = timeout_seconds
+        self.process_concurrency = process_concurrency
+        self.user_agent = user_agent
+        self.repository = repository
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def setup(self):
+        await self.repository.setup()
+
+    async def start(self):
+        connector = aiohttp.TCPConnector(
+            limit=self.max_connections,
+            limit_per_host=self.max_connections_per_host,
+            ttl_dns_cache=300
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout_seconds),
+            headers={"User-Agent": self.user_agent}
+        )
+
+    async def stop(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def ingest(self, sources: Dict[str, str], process: Callable[[str, str, str], None], progress: JobProgress):
+        """
+        Fetch every source ({source_key: url}) and call `process(text, source_key, url)` in a worker thread
+        for the pages that changed. Fails after all sources were attempted if any of them failed.
+        """
+        if self._session is None:
+            raise RuntimeError("URL ingestion engine is not started. Was the application lifespan started?")
+        states = await self.repository.get_fetch_states(list(sources))
+        process_semaphore = asyncio.Semaphore(self.process_concurrency)
+
+        progress.begin(JobStage.FETCH, len(sources))
+        results = await asyncio.gather(
+            *(self._ingest_source(source_key, url, states.get(source_key), process, process_semaphore, progress)
+              for source_key, url in sources.items()),
+            return_exceptions=True
+        )
+        progress.end(JobStage.FETCH)
+
+        failed = []
+        for url, result in zip(sources.values(), results):
+            if isinstance(result, Exception):
+                logger.warning("Failed to ingest %s: %s", url, str(result))
+                failed.append(url)
+        changed = sum(1 for result in results if result is True)
+        logger.info("URL ingestion: %s changed, %s unchanged, %s failed.",
+                    changed, len(sources) - changed - len(failed), len(failed))
+        if failed:
+            raise RuntimeError(f"Failed to ingest {len(failed)} of {len(sources)} URLs: {', '.join(failed[:5])}")
+
+    async def _ingest_source(self, source_key: str, url: str, state: Optional[dict], process: Callable[[str, str, str], None],
+                             process_semaphore: asyncio.Semaphore, progress: JobProgress) -> bool:
+        """
+        Returns whether the source changed and was processed.
+        """
+        try:
+            fetched = await self._fetch(url, state)
+        finally:
+            progress.advance(JobStage.FETCH)
+        if fetched is None:
+            return False
+
+        text, etag, last_modified = fetched
+        content_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        changed = state is None or state["content_hash"] != content_hash
+        if changed:
+            async with process_semaphore:
+                await asyncio.to_thread(process, text, source_key, url)
+        # Saved only once processing succeeded, so a failed source is fetched in full next time
+        await self.repository.save_fetch_state(source_key, url, etag, last_modified, content_hash)
+        return changed
+
+    async def _fetch(self, url: str, state: Optional[dict]) -> Optional[Tuple[str, Optional[str], Optional[str]]]:
+        """
+        Conditionally GET a page. Returns its text and validators, or None if the server reports it unchanged.
+        """
+        headers = {}
+        if state is not None:
+            if state["etag"]:
+                headers["If-None-Match"] = state["etag"]
+            if state["last_modified"]:
+                headers["If-Modified-Since"] = state["last_modified"]
+
+        async with self._session.get(url, headers=headers) as response:
+            if response.status == 304:
+                return None
+            response.raise_for_status()
+            html = await response.text(errors="replace")
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+
+        pool = ingestion_queue.process_pool
+        if pool is None:
+            text = await asyncio.to_thread(extract_html_text, html)
+        else:
+            text = await asyncio.get_running_loop().run_in_executor(pool, extract_html_text, html)
+        return text, etag, last_modified
+
+
+url_ingestion_engine = UrlIngestionEngine(
+    max_connections=app_config.url_ingestion.max_connections,
+    max_connections_per_host=app_config.url_ingestion.max_connections_per_host,
+    timeout_seconds=app_config.url_ingestion.timeout_seconds,
+    process_concurrency=app_config.url_ingestion.process_concurrency,
+    user_agent=app_config.url_ingestion.user_agent,
+    repository=SourceFetchRepository()
+)
@@ -1,11 +1,226 @@
+import hashlib
+from abc import ABC, abstractmethod
 from datetime import datetime
-from astrapy.constants import VectorMetric
-from astrapy import DataAPIClient, Collection
+from typing import Dict, Iterator, List, Optional
+import httpx
+import numpy as np
 
-from src.config.config import app_config
+from src.config.config import VectorBackend, app_config
+from src.services.bulk_writer import bulk_writer
 
-class VectorStore:
+# Astra caps the number of values in a single $in filter
+MAX_IN_FILTER_VALUES = 100
+
+def hash_chunk(text: str) -> str:
+    """
+    Content hash stored with every chunk so re-ingestion can diff against what is already indexed.
+    """
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+def chunk_id(source_key: str, chunk_hash: str) -> str:
+    """
+    Deterministic document ID of a chunk. A source stores each content hash once, so retrying an insert
+    finds the chunks that were already written instead of duplicating them.
+    """
+    return hashlib.sha256(f"{source_key}:{chunk_hash}".encode('utf-8')).hexdigest()
+
+def chunk_documents(chunks, embeddings, source_key, source_label, type) -> Iterator[dict]:
+    """
+    Yield the Astra documents of a source's chunks, all stamped with the same creation time.
+    """
+    created_at = datetime.now().isoformat()
+    for chunk, embedding in zip(chunks, embeddings):
+        chunk_hash = hash_chunk(chunk)
+        yield {
+            "_id": chunk_id(source_key, chunk_hash),
+            "text": chunk,
+            "$vector": embedding,
+            "source_key": source_key,
+            "source_label": source_label,
+            "created_at": created_at,
+            "type": type,
+            "chunk_hash": chunk_hash
+        }
+
+def is_transient_insert_error(error: Exception) -> bool:
+    """
+    Whether an Astra insert failed for a reason worth retrying: timeouts, dropped connections,
+    rate limiting and server errors. Rejected documents are not retried.
+    """
+    from astrapy.exceptions import DataAPIHttpException, DataAPITimeoutException
+
+    if isinstance(error, (DataAPITimeoutException, httpx.TransportError)):
+        return True
+    if isinstance(error, DataAPIHttpException) and error.httpx_error is not None:
+        status_code = error.httpx_error.response.status_code
+        return status_code == 429 or status_code >= 500
+    return False
+
+def _only_existing_documents(error: Exception) -> bool:
+    """
+    Whether an insert failed only on documents whose ID is already stored, i.e. a retry of a batch
+    that was partly written before.
+    """
+    from astrapy.exceptions import InsertManyException
+
+    return isinstance(error, InsertManyException) and bool(error.error_descriptors) and all(
+        descriptor.error_code == "DOCUMENT_ALREADY_EXISTS" for descriptor in error.error_descriptors
+    )
+
+def sum_vectors(vectors) -> Optional[np.ndarray]:
+    """
+    Sum of the L2-normalized vectors, the per-source aggregate the router's centroids are derived from.
+    """
+    vectors = np.asarray(vectors, dtype=np.float64)
+    if not len(vectors):
+        return None
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).sum(axis=0)
+
+class SourceStats:
+    """
+    Accumulates the chunk count, text size, latest insert time and vector sum of each source from chunk rows.
+    """
     def __init__(self):
+        self._sources: Dict[str, dict] = {}
+        self._vector_sums: Dict[str, np.ndarray] = {}
+
+    def add(self, row: dict):
+        source = self._sources.setdefault(row["source_key"], {
+            "source_key": row["source_key"],
+            "source_label": row.get("source_label"),
+            "type": row.get("type"),
+            "chunk_count": 0,
+            "byte_size": 0,
+            "ingested_at": None
+        })
+        source["chunk_count"] += 1
+        source["byte_size"] += len(row.get("text", "").encode("utf-8"))
+        created_at = row.get("created_at")
+        if created_at is not None and (source["ingested_at"] is None or created_at > source["ingested_at"]):
+            source["ingested_at"] = created_at
+        vector = row.get("$vector")
+        if vector is not None:
+            vector_sum = sum_vectors([vector])
+            if row["source_key"] in self._vector_sums:
+                self._vector_sums[row["source_key"]] += vector_sum
+            else:
+                self._vector_sums[row["source_key"]] = vector_sum
+
+    def result(self) -> List[dict]:
+        return [
+            {
+                **source,
+                "ingested_at": datetime.fromisoformat(source["ingested_at"]) if source["ingested_at"] else datetime.now(),
+                "vector_sum": self._vector_sums[source_key].tolist() if source_key in self._vector_sums else None
+            }
+            for source_key, source in self._sources.items()
+        ]
+
+class VectorStore(ABC):
+    """
+    Interface of the synchronous vector store backends. Search rows are dicts with the chunk
+    fields (text, source_key, source_label, type) and a cosine "$similarity" in [0, 1].
+    """
+    @abstractmethod
+    def delete_embeddings(self, source_key: str):
+        pass
+
+    @abstractmethod
+    def delete_embeddings_by_source_label(self, source_label: str):
+        pass
+
+    @abstractmethod
+    def get_chunk_hashes(self, source_key: str) -> set:
+        pass
+
+    @abstractmethod
+    def delete_chunks(self, source_key: str, chunk_hashes):
+        pass
+
+    @abstractmethod
+    def ping(self):
+        pass
+
+    @abstractmethod
+    def insert_embeddings(self, chunks, embeddings, source_key, source_label, type):
+        pass
+
+    @abstractmethod
+    def similarity_search(self, embedding, limit=10) -> list:
+        pass
+
+    @abstractmethod
+    def get_distinct_sources(self) -> list:
+        pass
+
+    @abstractmethod
+    def get_chunk_vectors(self, source_key: str, chunk_hashes) -> list:
+        """
+        Vectors of the chunks of a source with the given content hashes; a None hash selects the unhashed chunks.
+        """
+        pass
+
+    @abstractmethod
+    def get_source_stats(self) -> List[dict]:
+        """
+        Catalog entry per source, as dicts with source_key, source_label, type, chunk_count, byte_size,
+        ingested_at and vector_sum.
+        """
+        pass
+
+
+class AsyncVectorStore(ABC):
+    """
+    Interface of the non-blocking vector store backends used from async handlers.
+    """
+    @abstractmethod
+    async def delete_embeddings(self, source_key: str):
+        pass
+
+    @abstractmethod
+    async def delete_embeddings_by_source_label(self, source_label: str):
+        pass
+
+    @abstractmethod
+    async def get_chunk_hashes(self, source_key: str) -> set:
+        pass
+
+    @abstractmethod
+    async def delete_chunks(self, source_key: str, chunk_hashes):
+        pass
+
+    @abstractmethod
+    async def ping(self):
+        pass
+
+    @abstractmethod
+    async def insert_embeddings(self, chunks, embeddings, source_key, source_label, type):
+        pass
+
+    @abstractmethod
+    async def similarity_search(self, embedding, limit=10) -> list:
+        pass
+
+    @abstractmethod
+    async def get_distinct_sources(self) -> list:
+        pass
+
+    @abstractmethod
+    async def close(self):
+        """
+        Release the backend's connections.
+        """
+        pass
+
+
+class AstraVectorStore(VectorStore):
+    def __init__(self):
+        # Imported here so the LOCAL backend and startup do not pay for astrapy
+        from astrapy import DataAPIClient, Collection
+        from astrapy.constants import VectorMetric
+
         client = DataAPIClient()
         self.db = client.get_database(
             app_config.vector_db.api_endpoint,
@@ -32,6 +247,25 @@ class VectorStore:
         """
         self.collection.delete_many({"source_label": source_label})
     
+    def get_chunk_hashes(self, source_key: str) -> set:
+        """
+        Return the content hashes of the chunks stored for a source. Chunks stored before hashing was introduced map to None.
+        """
+        cursor = self.collection.find({"source_key": source_key}, projection={"chunk_hash": True})
+        return {document.get("chunk_hash") for document in cursor}
+
+    def delete_chunks(self, source_key: str, chunk_hashes):
+        """
+        Delete the chunks of a source with the given content hashes. A None hash deletes the source's unhashed chunks.
+        """
+        chunk_hashes = list(chunk_hashes)
+        if None in chunk_hashes:
+            chunk_hashes.remove(None)
+            self.collection.delete_many({"source_key": source_key, "chunk_hash": {"$exists": False}})
+        for i in range(0, len(chunk_hashes), MAX_IN_FILTER_VALUES):
+            batch = chunk_hashes[i:i + MAX_IN_FILTER_VALUES]
+            self.collection.delete_many({"source_key": source_key, "chunk_hash": {"$in": batch}})
+
     def ping(self):
         """
         Ping the vector database to verify connectivity.
@@ -41,26 +275,154 @@ class VectorStore:
     def insert_embeddings(self, chunks, embeddings, source_key, source_label, type):
         """
         Insert new embeddings into the vector database with source metadata.
+        The documents are sent in concurrent unordered batches; failed batches are retried.
         """
-        documents = [
-            {
-                "text": chunk,
-                "$vector": embedding,
-                "source_key": source_key,
-                "source_label": source_label,
-                "created_at": datetime.now().isoformat(),
-                "type": type
-            }
-            for chunk, embedding in zip(chunks, embeddings)
-        ]
-        self.collection.insert_many(documents)
+        documents = chunk_documents(chunks, embeddings, source_key, source_label, type)
+        bulk_writer.write(self._insert_batch, documents, is_transient_insert_error)
+
+    def _insert_batch(self, documents: List[dict]):
+        try:
+            self.collection.insert_many(documents, ordered=False, chunk_size=len(documents), concurrency=1)
+        except Exception as e:
+            if not _only_existing_documents(e):
+                raise
 
     def similarity_search(self, embedding, limit=10):
-        return self.collection.find(
+        return list(self.collection.find(
             {},
             sort={"$vector": embedding},
             limit=limit,
-            include_similarity=True)
+            include_similarity=True))
     
     def get_distinct_sources(self):
-        return self.collection.distinct("source_label")
\ No newline at end of file
+        return self.collection.distinct("source_label")
+
+    def get_chunk_vectors(self, source_key: str, chunk_hashes) -> list:
+        chunk_hashes = list(chunk_hashes)
+        filters = []
+        if None in chunk_hashes:
+            chunk_hashes.remove(None)
+            filters.append({"source_key": source_key, "chunk_hash": {"$exists": False}})
+        for i in range(0, len(chunk_hashes), MAX_IN_FILTER_VALUES):
+            filters.append({"source_key": source_key, "chunk_hash": {"$in": chunk_hashes[i:i + MAX_IN_FILTER_VALUES]}})
+        return [
+            document["$vector"]
+            for query in filters
+            for document in self.collection.find(query, projection={"$vector": True})
+            if document.get("$vector") is not None
+        ]
+
+    def get_source_stats(self) -> List[dict]:
+        """
+        Scans every chunk in the collection; meant for the one-off source catalog backfill.
+        """
+        stats = SourceStats()
+        cursor = self.collection.find({}, projection={"source_key": True, "source_label": True, "type": True,
+                                                      "text": True, "created_at": True, "$vector": True})
+        for row in cursor:
+            stats.add(row)
+        return stats.result()
+
+class AsyncAstraVectorStore(AsyncVectorStore):
+    """
+    Non-blocking counterpart of AstraVectorStore built on astrapy's async collection API.
+    Use this from async handlers so Astra round-trips do not stall the event loop.
+    """
+    def __init__(self):
+        from astrapy import DataAPIClient, AsyncCollection
+
+        client = DataAPIClient()
+        db = client.get_database(
+            app_config.vector_db.api_endpoint,
+            token=app_config.vector_db.application_token
+        )
+        # Resolving the collection handle does no I/O; every call on it afterwards is awaitable
+        self.collection: AsyncCollection = db.get_collection(app_config.vector_db.collection_name).to_async()
+        self.db = self.collection.database
+
+    async def delete_embeddings(self, source_key: str):
+        """
+        Delete existing embeddings in the vector database for a specific source ID.
+        """
+        await self.collection.delete_many({"source_key": source_key})
+
+    async def delete_embeddings_by_source_label(self, source_label: str):
+        """
+        Delete existing embeddings in the vector database for a specific source label.
+        """
+        await self.collection.delete_many({"source_label": source_label})
+
+    async def ping(self):
+        """
+        Ping the vector database to verify connectivity.
+        """
+        await self.collection.find_one()
+
+    async def get_chunk_hashes(self, source_key: str) -> set:
+        """
+        Return the content hashes of the chunks stored for a source. Chunks stored before hashing was introduced map to None.
+        """
+        cursor = self.collection.find({"source_key": source_key}, projection={"chunk_hash": True})
+        return {document.get("chunk_hash") async for document in cursor}
+
+    async def delete_chunks(self, source_key: str, chunk_hashes):
+        """
+        Delete the chunks of a source with the given content hashes. A None hash deletes the source's unhashed chunks.
+        """
+        chunk_hashes = list(chunk_hashes)
+        if None in chunk_hashes:
+            chunk_hashes.remove(None)
+            await self.collection.delete_many({"source_key": source_key, "chunk_hash": {"$exists": False}})
+        for i in range(0, len(chunk_hashes), MAX_IN_FILTER_VALUES):
+            batch = chunk_hashes[i:i + MAX_IN_FILTER_VALUES]
+            await self.collection.delete_many({"source_key": source_key, "chunk_hash": {"$in": batch}})
+
+    async def insert_embeddings(self, chunks, embeddings, source_key, source_label, type):
+        """
+        Insert new embeddings into the vector database with source metadata.
+        The documents are sent in concurrent unordered batches; failed batches are retried.
+        """
+        documents = chunk_documents(chunks, embeddings, source_key, source_label, type)
+        await bulk_writer.write_async(self._insert_batch, documents, is_transient_insert_error)
+
+    async def _insert_batch(self, documents: List[dict]):
+        try:
+            await self.collection.insert_many(documents, ordered=False, chunk_size=len(documents), concurrency=1)
+        except Exception as e:
+            if not _only_existing_documents(e):
+                raise
+
+    async def similarity_search(self, embedding, limit=10):
+        cursor = self.collection.find(
+            {},
+            sort={"$vector": embedding},
+            limit=limit,
+            include_similarity=True)
+        return [row async for row in cursor]
+
+    async def get_distinct_sources(self):
+        return await self.collection.distinct("source_label")
+
+    async def close(self):
+        # The async collection owns its own HTTP client; the blocking one is shared by astrapy
+        await self.collection.__aexit__()
+
+
+def create_vector_store() -> VectorStore:
+    """
+    Return the synchronous vector store for the configured backend.
+    """
+    if app_config.vector_db.backend == VectorBackend.LOCAL:
+        from src.services.local_vector_store import get_local_vector_store
+        return get_local_vector_store()
+    return AstraVectorStore()
+
+
+def create_async_vector_store() -> AsyncVectorStore:
+    """
+    Return the async vector store for the configured backend.
+    """
+    if app_config.vector_db.backend == VectorBackend.LOCAL:
+        from src.services.local_vector_store import AsyncLocalVectorStore, get_local_vector_store
+        return AsyncLocalVectorStore(get_local_vector_store())
+    return AsyncAstraVectorStore()
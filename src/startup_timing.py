@@ -0,0 +1,122 @@
+import argparse
+import importlib
+import importlib.abc
+import importlib.machinery
+import logging
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, List
+
+from src.config.config import app_config
+
+logger = logging.getLogger(__name__)
+
+
+class _TimingFinder(importlib.abc.MetaPathFinder):
+    """
+    Finds the application's modules like the default path finder and times their execution.
+    """
+    def __init__(self, timer: "StartupTimer"):
+        self.timer = timer
+
+    def find_spec(self, name, path, target=None):
+        if not name.startswith(self.timer.package + "."):
+            return None
+        spec = importlib.machinery.PathFinder.find_spec(name, path, target)
+        if spec is None or not hasattr(spec.loader, "exec_module"):
+            return spec
+        exec_module = spec.loader.exec_module
+
+        def timed_exec_module(module):
+            with self.timer._time_import(name):
+                exec_module(module)
+        spec.loader.exec_module = timed_exec_module
+        return spec
+
+
+class StartupTimer:
+    """
+    Measures the time to ready of the application, broken down per module and per lifespan step.
+    Each application module is charged the time spent executing it, including the third-party packages it
+    imports first, but not the other application modules it imports, which are listed separately.
+    The report is logged once the lifespan is ready, with a warning when the total exceeds the budget.
+    """
+    def __init__(self, package: str, budget_seconds: float, report_modules: int):
+        self.package = package
+        self.budget_seconds = budget_seconds
+        self.report_modules = report_modules
+        self.started_at = time.perf_counter()
+        self.imports: Dict[str, float] = {}
+        self.steps: Dict[str, float] = {}
+        self._children: List[float] = []
+        self._finder = None
+
+    def install(self):
+        """
+        Start timing imports of the application's modules. Call before importing them.
+        """
+        if self._finder is None:
+            self._finder = _TimingFinder(self)
+            sys.meta_path.insert(0, self._finder)
+
+    def uninstall(self):
+        if self._finder is not None:
+            sys.meta_path.remove(self._finder)
+            self._finder = None
+
+    @contextmanager
+    def _time_import(self, name: str):
+        started_at = time.perf_counter()
+        self._children.append(0.0)
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started_at
+            self.imports[name] = elapsed - self._children.pop()
+            if self._children:
+                self._children[-1] += elapsed
+
+    @contextmanager
+    def measure(self, step: str):
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.steps[step] = time.perf_counter() - started_at
+
+    def report(self) -> float:
+        """
+        Log the startup report and return the total startup time in seconds.
+        """
+        self.uninstall()
+        total = time.perf_counter() - self.started_at
+        slowest = sorted(self.imports.items(), key=lambda item: item[1], reverse=True)[:self.report_modules]
+        lines = [f"Startup took {total:.2f}s: imports {sum(self.imports.values()):.2f}s, "
+                 f"lifespan {sum(self.steps.values()):.2f}s."]
+        lines += [f"  import {name}: {seconds * 1000:.0f} ms" for name, seconds in slowest]
+        lines += [f"  {step}: {seconds * 1000:.0f} ms" for step, seconds in self.steps.items()]
+        logger.info("\n".join(lines))
+        if total > self.budget_seconds:
+            logger.warning("Startup took %.2fs, over the budget of %.2fs.", total, self.budget_seconds)
+        return total
+
+
+startup_timer = StartupTimer(
+    package="src",
+    budget_seconds=app_config.startup.budget_seconds,
+    report_modules=app_config.startup.report_modules
+)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the application's imports against the startup budget.")
+    parser.add_argument("command", choices=["imports"])
+    parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    # Use the module's own instance, which src.main installs, rather than this __main__ copy
+    from src.startup_timing import startup_timer as timer
+    timer.install()
+    importlib.import_module("src.main")
+    sys.exit(0 if timer.report() <= timer.budget_seconds else 1)
@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+from src.services.bulk_writer import BulkWriter
+
+
+class _TransientError(Exception):
+    pass
+
+
+def _writer(concurrency: int = 2) -> BulkWriter:
+    return BulkWriter(batch_size=2, concurrency=concurrency, max_retries=2, retry_backoff_seconds=0)
+
+
+def _documents(count: int):
+    return ({"_id": str(i)} for i in range(count))
+
+
+def _is_transient(error: Exception) -> bool:
+    return isinstance(error, _TransientError)
+
+
+def test_write_retries_transient_failures():
+    inserted, failures = [], [_TransientError()]
+
+    def insert(batch):
+        if failures:
+            raise failures.pop()
+        inserted.extend(batch)
+
+    stats = _writer().write(insert, _documents(5), _is_transient)
+
+    assert sorted(document["_id"] for document in inserted) == [str(i) for i in range(5)]
+    assert (stats.documents, stats.batches, stats.retries) == (5, 3, 1)
+
+
+def test_write_async_bounds_the_batches_in_flight():
+    in_flight, peak = 0, 0
+
+    async def insert(batch):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+
+    stats = asyncio.run(_writer(concurrency=3).write_async(insert, _documents(20), _is_transient))
+
+    assert stats.documents == 20
+    assert peak == 3
+
+
+def test_write_async_stops_scheduling_after_a_permanent_failure():
+    attempted = []
+
+    async def insert(batch):
+        attempted.append(batch[0]["_id"])
+        if batch[0]["_id"] == "0":
+            raise ValueError("rejected")
+        await asyncio.sleep(0.05)
+
+    with pytest.raises(ValueError):
+        asyncio.run(_writer(concurrency=2).write_async(insert, _documents(100), _is_transient))
+
+    # The failing batch and the one already in flight; nothing is scheduled after the failure
+    assert attempted == ["0", "2"]
+
+
+def test_write_async_consumes_documents_lazily_until_the_failure():
+    consumed = 0
+
+    def documents():
+        nonlocal consumed
+        for i in range(1000):
+            consumed += 1
+            yield {"_id": str(i)}
+
+    async def insert(batch):
+        raise ValueError("rejected")
+
+    with pytest.raises(ValueError):
+        asyncio.run(_writer(concurrency=1).write_async(insert, documents(), _is_transient))
+
+    assert consumed <= 4
@@ -0,0 +1,86 @@
+import asyncio
+import time
+
+import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langgraph.checkpoint.memory import MemorySaver
+
+from src.services import chat_service
+from src.services.resources import resources
+from src.services.retrieval_router import Route, RoutingDecision, retrieval_router
+
+ANSWER = "a heap keeps the smallest key at the root"
+
+
+class _SlowFakeChatModel(GenericFakeChatModel):
+    """
+    Streams the answer word by word with a delay, like a provider.
+    """
+    async def _astream(self, *args, **kwargs):
+        async for chunk in super()._astream(*args, **kwargs):
+            await asyncio.sleep(0.02)
+            yield chunk
+
+    def bind_tools(self, tools, **kwargs):
+        return self
+
+
+@pytest.fixture
+def chat(monkeypatch):
+    recorded = []
+
+    async def record_history(thread_id, question, answer, sources):
+        recorded.append({"answer": answer, "sources": sources})
+
+    monkeypatch.setitem(resources._resources, "llm", _SlowFakeChatModel(messages=iter([AIMessage(ANSWER)] * 4)))
+    monkeypatch.setattr(chat_service.graph_manager, "_graph", chat_service.build_graph().compile(checkpointer=MemorySaver()))
+    monkeypatch.setattr(chat_service, "_record_history", record_history)
+    monkeypatch.setattr(chat_service.response_cache, "enabled", False)
+    monkeypatch.setattr(retrieval_router, "shadow_sample_rate", 0)
+    return recorded
+
+
+def _route(monkeypatch, route: Route):
+    monkeypatch.setattr(retrieval_router, "route", lambda question, embedding=None: RoutingDecision(route, "test"))
+
+
+def _ask(question: str):
+    async def run():
+        started_at = time.perf_counter()
+        tokens = []
+        async for token in chat_service.ask_question(question, "thread"):
+            tokens.append((time.perf_counter() - started_at, token))
+        return tokens
+
+    return asyncio.run(run())
+
+
+def test_direct_answers_stream_token_by_token(chat, monkeypatch):
+    _route(monkeypatch, Route.DIRECT)
+
+    tokens = _ask("hello")
+
+    assert "".join(token for _, token in tokens) == ANSWER
+    assert len(tokens) == len(ANSWER.split()) * 2 - 1
+    # The first token arrives long before the last, instead of all at once when the node finishes
+    assert tokens[-1][0] - tokens[0][0] > 0.1
+    assert chat == [{"answer": ANSWER, "sources": []}]
+
+
+def test_retrieval_answers_stream_with_their_sources(chat, monkeypatch):
+    _route(monkeypatch, Route.RETRIEVE)
+
+    async def embed_query(query):
+        return [1.0, 0.0]
+
+    async def search_chunks(embedding):
+        return [{"text": "Heaps are trees.", "source_key": "k", "source_label": "Heaps", "$similarity": 0.9}]
+
+    monkeypatch.setattr(chat_service, "embed_query", embed_query)
+    monkeypatch.setattr(chat_service, "search_chunks", search_chunks)
+
+    tokens = _ask("What is a heap?")
+
+    assert "".join(token for _, token in tokens) == ANSWER
+    assert chat == [{"answer": ANSWER, "sources": [{"source_key": "k", "source_label": "Heaps"}]}]
@@ -0,0 +1,120 @@
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+
+from src.services.checkpoint_retention import CheckpointRetention
+
+
+class _FakeCheckpointRepository:
+    """
+    Threads with a checkpoint count and their latest message time, as kept in conversation_threads.
+    """
+    def __init__(self, threads):
+        self.now = datetime(2024, 1, 31)
+        self.threads = {thread_id: {"checkpoints": checkpoints, "last_message_at": self.now - idle, "compacted_through": None}
+                        for thread_id, (checkpoints, idle) in threads.items()}
+        self.pruned = []
+        self.locked = False
+
+    @asynccontextmanager
+    async def exclusive_run(self):
+        acquired = not self.locked
+        self.locked = True
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                self.locked = False
+
+    def _idle(self, idle_seconds):
+        cutoff = self.now - timedelta(seconds=idle_seconds)
+        return sorted((thread for thread in self.threads.items() if thread[1]["last_message_at"] < cutoff),
+                      key=lambda thread: thread[1]["last_message_at"])
+
+    async def get_idle_threads(self, idle_seconds, limit):
+        return [thread_id for thread_id, _ in self._idle(idle_seconds)][:limit]
+
+    async def get_uncompacted_threads(self, idle_seconds, limit):
+        return [(thread_id, thread["last_message_at"]) for thread_id, thread in self._idle(idle_seconds)
+                if thread["compacted_through"] is None or thread["compacted_through"] < thread["last_message_at"]][:limit]
+
+    async def mark_compacted(self, thread_id, compacted_through):
+        self.threads[thread_id]["compacted_through"] = compacted_through
+
+    async def forget_thread(self, thread_id):
+        del self.threads[thread_id]
+
+    async def delete_thread(self, table, thread_id, batch_size):
+        if table != "checkpoints":
+            return 0, 0
+        rows = min(self.threads[thread_id]["checkpoints"], batch_size)
+        self.threads[thread_id]["checkpoints"] -= rows
+        return rows, rows * 100
+
+    async def prune_checkpoints(self, thread_id, keep, batch_size):
+        rows = min(max(self.threads[thread_id]["checkpoints"] - keep, 0), batch_size)
+        self.threads[thread_id]["checkpoints"] -= rows
+        if rows:
+            self.pruned.append(thread_id)
+        return rows, rows * 100
+
+    async def prune_writes(self, thread_id, batch_size):
+        return 0, 0
+
+    async def prune_blobs(self, thread_id, batch_size):
+        return 0, 0
+
+
+def _retention(repository, threads_per_run=10, idle_ttl_days=30) -> CheckpointRetention:
+    return CheckpointRetention(keep_checkpoints=2, idle_ttl_days=idle_ttl_days, min_idle_seconds=600,
+                               interval_seconds=3600, batch_size=3, repository=repository,
+                               threads_per_run=threads_per_run)
+
+
+def test_run_expires_old_threads_and_compacts_idle_ones():
+    repository = _FakeCheckpointRepository({
+        "expired": (5, timedelta(days=40)),
+        "idle": (10, timedelta(hours=1)),
+        "active": (10, timedelta(seconds=10))
+    })
+
+    reclaimed = asyncio.run(_retention(repository).run_once())
+
+    assert set(repository.threads) == {"idle", "active"}
+    assert repository.threads["idle"]["checkpoints"] == 2
+    assert repository.threads["active"]["checkpoints"] == 10
+    assert reclaimed["checkpoints"] == {"rows": 13, "bytes": 1300}
+
+
+def test_compacted_threads_are_skipped_until_new_messages():
+    repository = _FakeCheckpointRepository({"idle": (10, timedelta(hours=1))})
+    retention = _retention(repository)
+
+    asyncio.run(retention.run_once())
+    asyncio.run(retention.run_once())
+    assert repository.pruned == ["idle"] * 3
+
+    repository.threads["idle"]["checkpoints"] += 2
+    repository.threads["idle"]["last_message_at"] += timedelta(minutes=30)
+    asyncio.run(retention.run_once())
+    assert repository.pruned == ["idle"] * 4
+    assert repository.threads["idle"]["checkpoints"] == 2
+
+
+def test_run_handles_at_most_threads_per_run():
+    repository = _FakeCheckpointRepository({f"thread-{i}": (5, timedelta(hours=i + 1)) for i in range(5)})
+    retention = _retention(repository, threads_per_run=2, idle_ttl_days=0)
+
+    asyncio.run(retention.run_once())
+    assert sorted(repository.pruned) == ["thread-3", "thread-4"]
+
+    asyncio.run(retention.run_once())
+    assert sorted(repository.pruned) == ["thread-1", "thread-2", "thread-3", "thread-4"]
+
+
+def test_run_is_skipped_while_another_worker_holds_the_lock():
+    repository = _FakeCheckpointRepository({"idle": (10, timedelta(hours=1))})
+    repository.locked = True
+
+    assert asyncio.run(_retention(repository).run_once()) == {}
+    assert repository.threads["idle"]["checkpoints"] == 10
@@ -0,0 +1,68 @@
+from langchain_core.documents import Document
+
+from src.services.context_builder import ContextBuilder
+
+
+def _document(text: str, similarity: float, source_key: str = "k", source_label: str = "Heaps") -> Document:
+    return Document(page_content=text, metadata={"source_key": source_key, "source_label": source_label, "similarity": similarity})
+
+
+def _builder(max_tokens: int = 1000) -> ContextBuilder:
+    return ContextBuilder(max_tokens=max_tokens, similarity_margin=0.2, duplicate_similarity=0.8, min_merge_overlap=10)
+
+
+def test_overlapping_chunks_of_a_source_are_merged():
+    first = _document("A binary heap is a complete tree stored in an array.", 0.9)
+    second = _document("stored in an array. Its root holds the smallest key.", 0.85)
+
+    context, included = _builder().build([second, first])
+
+    assert context == "[Heaps]\nA binary heap is a complete tree stored in an array. Its root holds the smallest key."
+    assert len(included) == 2
+
+
+def test_near_duplicates_are_dropped():
+    text = "Dijkstra's algorithm finds shortest paths from a source in graphs with non-negative weights."
+    original = _document(text, 0.9, "a", "Graphs")
+    copy = _document(text + " See also.", 0.88, "b", "Notes")
+
+    context, included = _builder().build([original, copy])
+
+    assert included == [original]
+    assert "[Notes]" not in context
+
+
+def test_hits_far_below_the_best_are_left_out():
+    best = _document("Quicksort partitions around a pivot.", 0.9, "a", "Sorting")
+    weak = _document("Tries store strings by prefix.", 0.5, "b", "Tries")
+
+    _, included = _builder().build([weak, best])
+
+    assert included == [best]
+
+
+def test_passages_are_grouped_by_source_within_the_token_budget():
+    documents = [
+        _document("Merge sort splits the array in halves.", 0.9, "a", "Sorting"),
+        _document("Heaps support insert in logarithmic time.", 0.85, "b", "Heaps"),
+        _document("Heapsort builds a heap, then extracts the maximum.", 0.8, "a", "Sorting"),
+        _document("word " * 200, 0.8, "c", "Long")
+    ]
+
+    context, included = _builder(max_tokens=40).build(documents)
+
+    assert context.startswith("[Sorting]\nMerge sort splits the array in halves.\n\nHeapsort builds a heap")
+    assert "[Heaps]" in context
+    assert "[Long]" not in context
+    assert len(included) == 3
+
+
+def test_the_best_passage_is_truncated_rather_than_dropped():
+    context, included = _builder(max_tokens=5).build([_document("word " * 100, 0.9)])
+
+    assert len(included) == 1
+    assert 0 < len(context) - len("[Heaps]\n") <= 5 * 4
+
+
+def test_no_documents_give_an_empty_context():
+    assert _builder().build([]) == ("", [])
@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from src.config.config import LocalIndexType
+from src.services import document_processor
+from src.services.document_processor import DocumentProcessor
+from src.services.ingestion_queue import JobProgress
+from src.services.local_vector_store import LocalVectorStore
+from src.services.vector_store import hash_chunk
+
+
+class _FakeEmbeddingModel:
+    def __init__(self):
+        self.embedded = []
+
+    def embed_documents(self, texts):
+        self.embedded.extend(texts)
+        return [[float(len(text)), 1.0, float(sum(map(ord, text)) % 7)] for text in texts]
+
+
+class _Recorder:
+    def __init__(self):
+        self.sources = []
+        self.invalidations = 0
+
+    def record_source_from_thread(self, source_key, source_label, type, chunk_count, byte_size,
+                                  vector_sum=None, replace_vector_sum=False):
+        self.sources.append({"chunk_count": chunk_count, "vector_sum": vector_sum, "replace": replace_vector_sum})
+
+    def invalidate(self):
+        self.invalidations += 1
+
+
+@pytest.fixture
+def processor(tmp_path, monkeypatch):
+    recorder = _Recorder()
+    monkeypatch.setattr(document_processor, "embedding_store", None)
+    monkeypatch.setattr(document_processor, "source_catalog", recorder)
+    monkeypatch.setattr(document_processor, "response_cache", recorder)
+    processor = DocumentProcessor.__new__(DocumentProcessor)
+    processor.vector_store = LocalVectorStore(str(tmp_path), LocalIndexType.EXACT)
+    processor.embedding_model = _FakeEmbeddingModel()
+    return processor, recorder
+
+
+def _sync(processor, chunks):
+    processor._sync_chunks(iter(chunks), "key", "Label", "text", JobProgress())
+
+
+def test_resync_embeds_only_changed_chunks_and_deletes_removed_ones(processor):
+    processor, recorder = processor
+    _sync(processor, ["alpha", "beta", "gamma"])
+    _sync(processor, ["alpha", "gamma", "delta"])
+
+    assert processor.embedding_model.embedded == ["alpha", "beta", "gamma", "delta"]
+    assert processor.vector_store.get_chunk_hashes("key") == {hash_chunk(chunk) for chunk in ("alpha", "gamma", "delta")}
+    assert [source["chunk_count"] for source in recorder.sources] == [3, 3]
+    assert recorder.invalidations == 2
+
+
+def test_unchanged_source_is_not_embedded_again(processor):
+    processor, recorder = processor
+    _sync(processor, ["alpha", "beta"])
+    _sync(processor, ["alpha", "beta"])
+
+    assert processor.embedding_model.embedded == ["alpha", "beta"]
+    assert recorder.invalidations == 1
+
+
+def test_duplicate_chunks_are_stored_once(processor):
+    processor, recorder = processor
+    _sync(processor, ["alpha", "alpha", "beta"])
+
+    assert processor.embedding_model.embedded == ["alpha", "beta"]
+    assert recorder.sources[-1]["chunk_count"] == 2
+
+
+def test_recorded_vector_sums_add_up_to_the_stored_vectors(processor):
+    processor, recorder = processor
+    for chunks in (["alpha", "beta", "gamma"], ["alpha", "delta"], ["delta"]):
+        _sync(processor, chunks)
+
+    assert recorder.sources[0]["replace"]
+    assert not any(source["replace"] for source in recorder.sources[1:])
+    total = np.sum([source["vector_sum"] for source in recorder.sources], axis=0)
+    stats = processor.vector_store.get_source_stats()[0]
+    assert np.allclose(total, stats["vector_sum"])
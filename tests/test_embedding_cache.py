@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+
+from src.services.embedding_cache import EmbeddingCacheBackend, QueryEmbeddingCache
+
+
+class _FakeBackend(EmbeddingCacheBackend):
+    def __init__(self):
+        self.entries = {}
+
+    async def get(self, key):
+        return self.entries.get(key)
+
+    async def set(self, key, embedding, ttl_seconds):
+        self.entries[key] = embedding
+
+
+def _embedder():
+    calls = []
+
+    async def embed(query):
+        calls.append(query)
+        await asyncio.sleep(0.01)
+        return [float(len(query))]
+
+    return embed, calls
+
+
+def test_normalized_queries_share_an_entry():
+    cache = QueryEmbeddingCache("model", max_size=10, ttl_seconds=60)
+    embed, calls = _embedder()
+
+    async def run():
+        await cache.get_or_embed("What is a heap?", embed)
+        await cache.get_or_embed("  what is a   HEAP ", embed)
+
+    asyncio.run(run())
+    assert len(calls) == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_concurrent_misses_share_one_provider_call():
+    cache = QueryEmbeddingCache("model", max_size=10, ttl_seconds=60)
+    embed, calls = _embedder()
+
+    async def run():
+        return await asyncio.gather(*(cache.get_or_embed("heap", embed) for _ in range(5)))
+
+    assert asyncio.run(run()) == [[4.0]] * 5
+    assert len(calls) == 1
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = QueryEmbeddingCache("model", max_size=2, ttl_seconds=60)
+    embed, calls = _embedder()
+
+    async def run():
+        for query in ("a", "b", "a", "c", "a", "b"):
+            await cache.get_or_embed(query, embed)
+
+    asyncio.run(run())
+    assert calls == ["a", "b", "c", "b"]
+
+
+def test_expired_entries_are_embedded_again():
+    cache = QueryEmbeddingCache("model", max_size=10, ttl_seconds=-1)
+    embed, calls = _embedder()
+
+    async def run():
+        await cache.get_or_embed("heap", embed)
+        await cache.get_or_embed("heap", embed)
+
+    asyncio.run(run())
+    assert len(calls) == 2
+
+
+def test_shared_backend_serves_other_workers():
+    backend = _FakeBackend()
+    first = QueryEmbeddingCache("model", max_size=10, ttl_seconds=60, backend=backend)
+    second = QueryEmbeddingCache("model", max_size=10, ttl_seconds=60, backend=backend)
+    embed, calls = _embedder()
+
+    async def run():
+        await first.get_or_embed("heap", embed)
+        return await second.get_or_embed("heap", embed)
+
+    assert asyncio.run(run()) == [4.0]
+    assert len(calls) == 1
+    assert second.shared_hits == 1
+
+
+def test_failed_embedding_is_not_cached():
+    cache = QueryEmbeddingCache("model", max_size=10, ttl_seconds=60)
+
+    async def failing(query):
+        raise RuntimeError("provider down")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(cache.get_or_embed("heap", failing))
+    assert cache.stats()["size"] == 0
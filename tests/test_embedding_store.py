@@ -0,0 +1,27 @@
+import os
+
+from src.services.embedding_store import INDEX_FILE, VECTORS_FILE, DiskEmbeddingStore
+
+
+def test_put_many_after_torn_append_keeps_rows_aligned(tmp_path):
+    store = DiskEmbeddingStore(str(tmp_path), "model")
+    store.put_many(["a"], [[1.0, 2.0, 3.0]])
+    # A writer that crashed mid-append leaves part of a row and part of an index line behind
+    with open(os.path.join(tmp_path, VECTORS_FILE), "ab") as vectors_file:
+        vectors_file.write(b"\x00" * 5)
+    with open(os.path.join(tmp_path, INDEX_FILE), "a", encoding="utf-8") as index_file:
+        index_file.write("deadbeef\tmod")
+
+    store.put_many(["b"], [[4.0, 5.0, 6.0]])
+
+    reopened = DiskEmbeddingStore(str(tmp_path), "model")
+    assert reopened.get_many(["a", "b"]) == [[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]]
+
+
+def test_get_many_ignores_rows_missing_from_the_file(tmp_path):
+    store = DiskEmbeddingStore(str(tmp_path), "model")
+    store.put_many(["a"], [[1.0, 2.0, 3.0]])
+    with open(os.path.join(tmp_path, INDEX_FILE), "a", encoding="utf-8") as index_file:
+        index_file.write(f"{store.key('b')}\tmodel\t7\n")
+
+    assert DiskEmbeddingStore(str(tmp_path), "model").get_many(["a", "b"]) == [[1.0, 2.0, 3.0], None]
@@ -0,0 +1,45 @@
+import asyncio
+
+import pytest
+from langgraph.graph import END, MessagesState, StateGraph
+
+from src.services import graph_manager as graph_manager_module
+from src.services.graph_manager import GraphManager
+
+
+def _counting_builder():
+    builds = []
+
+    def build_graph():
+        builds.append(1)
+        graph_builder = StateGraph(MessagesState)
+        graph_builder.add_node("echo", lambda state: {"messages": []})
+        graph_builder.set_entry_point("echo")
+        graph_builder.add_edge("echo", END)
+        return graph_builder
+
+    return build_graph, builds
+
+
+def test_graph_is_compiled_once_and_reused(monkeypatch):
+    monkeypatch.setattr(graph_manager_module, "get_pool", lambda: object())
+    build_graph, builds = _counting_builder()
+    manager = GraphManager(build_graph)
+
+    asyncio.run(manager.start(run_migrations=False))
+
+    assert manager.graph is manager.graph
+    assert len(builds) == 1
+
+
+def test_graph_is_unavailable_outside_the_lifespan(monkeypatch):
+    monkeypatch.setattr(graph_manager_module, "get_pool", lambda: object())
+    build_graph, _ = _counting_builder()
+    manager = GraphManager(build_graph)
+
+    with pytest.raises(RuntimeError):
+        manager.graph
+    asyncio.run(manager.start(run_migrations=False))
+    asyncio.run(manager.stop())
+    with pytest.raises(RuntimeError):
+        manager.graph
@@ -0,0 +1,70 @@
+import asyncio
+import time
+
+from src.services.health_prober import HealthProber
+
+
+async def _up():
+    pass
+
+
+async def _hanging():
+    await asyncio.sleep(10)
+
+
+async def _failing():
+    raise ConnectionError("connection refused")
+
+
+def test_probes_run_concurrently_and_hanging_ones_time_out():
+    prober = HealthProber(interval_seconds=30, timeout_seconds=0.1,
+                          probes={"db": _up, "vector_store": _hanging, "llm_provider": _failing}, probe_intervals={})
+
+    started_at = time.monotonic()
+    asyncio.run(prober.probe_once())
+
+    assert time.monotonic() - started_at < 0.5
+    stats = prober.stats()
+    assert (stats["db"], stats["vector_store"], stats["llm_provider"]) == ("up", "down", "down")
+    assert stats["dependencies"]["vector_store"]["error"] == "Timed out after 0.1s"
+    assert stats["dependencies"]["llm_provider"]["error"] == "connection refused"
+    assert stats["dependencies"]["db"]["latency_ms"] is not None
+
+
+def test_dependencies_are_unknown_until_probed():
+    prober = HealthProber(interval_seconds=30, timeout_seconds=1, probes={"db": _up}, probe_intervals={})
+
+    assert prober.stats()["db"] == "unknown"
+    assert prober.stats()["pool"] is None
+
+
+def test_probes_with_their_own_interval_are_skipped_until_due():
+    calls = []
+
+    async def provider():
+        calls.append("provider")
+
+    async def db():
+        calls.append("db")
+
+    prober = HealthProber(interval_seconds=30, timeout_seconds=1, probes={"db": db, "llm_provider": provider},
+                          probe_intervals={"llm_provider": 3600})
+
+    async def run():
+        await prober.probe_once()
+        await prober.probe_once()
+
+    asyncio.run(run())
+    assert sorted(calls) == ["db", "db", "provider"]
+
+
+def test_background_probing_stops_cleanly():
+    prober = HealthProber(interval_seconds=0.01, timeout_seconds=1, probes={"db": _up}, probe_intervals={})
+
+    async def run():
+        await prober.start()
+        await asyncio.sleep(0.05)
+        await prober.stop()
+
+    asyncio.run(run())
+    assert prober.stats()["db"] == "up"
@@ -0,0 +1,41 @@
+import time
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from src.services.history_manager import HistoryManager
+
+
+def _conversation(turns: int):
+    messages = []
+    for i in range(turns):
+        messages.append(HumanMessage(f"question {i} " + "word " * 40, id=f"q{i}"))
+        messages.append(AIMessage(f"answer {i} " + "word " * 40, id=f"a{i}"))
+    return messages
+
+
+def _wait_for_refresh(manager: HistoryManager):
+    deadline = time.monotonic() + 5
+    while manager._refreshing and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_fit_with_different_reserves_summarizes_only_uncovered_messages():
+    summarized = []
+
+    def summarize(previous, messages):
+        summarized.append([message.id for message in messages])
+        return "summary"
+
+    manager = HistoryManager(max_prompt_tokens=400, summary_refresh_messages=2, max_summaries=10, summarize=summarize)
+    messages = []
+    for turn in range(12):
+        messages += _conversation(turn + 1)[-2:-1]
+        # Routing reserves only the system prompt, generation also the retrieved context
+        for reserved_tokens in (50, 250):
+            manager.fit("thread", messages, reserved_tokens)
+            _wait_for_refresh(manager)
+        messages += _conversation(turn + 1)[-1:]
+
+    summarized_ids = [message_id for batch in summarized for message_id in batch]
+    assert summarized
+    assert len(summarized_ids) == len(set(summarized_ids))
@@ -0,0 +1,144 @@
+import asyncio
+
+import pytest
+
+from src.services.ingestion_queue import IngestionQueue, JobStage, JobStatus, QueueFullError
+
+
+class _FakeJobRepository:
+    def __init__(self):
+        self.jobs = {}
+
+    async def save_job(self, job):
+        self.jobs[job["id"]] = job
+
+    async def get_job(self, job_id):
+        return self.jobs.get(job_id)
+
+    async def delete_finished_jobs(self, finished_before):
+        return 0
+
+
+def _queue(workers: int = 1, repository=None) -> IngestionQueue:
+    return IngestionQueue(workers=workers, max_pending_jobs=10, max_finished_jobs=10, cpu_workers=0,
+                          repository=repository, flush_seconds=0.01)
+
+
+def test_stop_cleans_up_jobs_that_never_started(tmp_path):
+    spooled = tmp_path / "upload.pdf"
+    spooled.write_bytes(b"%PDF")
+
+    async def run():
+        queue = _queue()
+        await queue.start()
+        started = asyncio.Event()
+        release = asyncio.Event()
+
+        async def blocking(progress=None):
+            started.set()
+            await release.wait()
+
+        await queue.submit("text", "running", blocking)
+        job = await queue.submit("pdf", "queued", lambda path, progress=None: None, str(spooled),
+                                 cleanup=spooled.unlink)
+        await started.wait()
+        await queue.stop()
+        return job
+
+    job = asyncio.run(run())
+
+    assert not spooled.exists()
+    assert job.status == JobStatus.FAILED
+    assert job.finished_at is not None
+
+
+def test_job_is_visible_to_other_workers_through_the_repository():
+    repository = _FakeJobRepository()
+
+    async def run():
+        queue, other = _queue(repository=repository), _queue(repository=repository)
+        await queue.start()
+        await other.start()
+        done = asyncio.Event()
+
+        async def ingest(progress=None):
+            done.set()
+
+        job = await queue.submit("text", "title", ingest)
+        submitted = await other.get_job(job.id)
+        await done.wait()
+        await queue.stop()
+        await other.stop()
+        return submitted, await other.get_job(job.id)
+
+    submitted, finished = asyncio.run(run())
+
+    assert submitted.status == JobStatus.QUEUED
+    assert finished.status == JobStatus.COMPLETED
+    assert finished.finished_at is not None
+
+
+def test_submit_fails_fast_when_the_queue_is_full():
+    async def run():
+        queue = IngestionQueue(workers=1, max_pending_jobs=1, max_finished_jobs=10, cpu_workers=0)
+        await queue.start()
+        release = asyncio.Event()
+
+        async def blocking(progress=None):
+            await release.wait()
+
+        await queue.submit("text", "running", blocking)
+        await asyncio.sleep(0.01)
+        await queue.submit("text", "queued", blocking)
+        try:
+            await queue.submit("text", "rejected", blocking)
+        finally:
+            release.set()
+            await queue.stop()
+
+    with pytest.raises(QueueFullError):
+        asyncio.run(run())
+
+
+def test_blocking_jobs_report_progress_and_failures():
+    def ingest(progress=None):
+        progress.begin(JobStage.EMBED, 4)
+        progress.advance(JobStage.EMBED, 4)
+        progress.end(JobStage.EMBED)
+
+    def failing(progress=None):
+        raise ValueError("not a PDF")
+
+    async def run():
+        queue = _queue(workers=2)
+        await queue.start()
+        jobs = [await queue.submit("text", "ok", ingest), await queue.submit("pdf", "bad", failing)]
+        while not all(job.finished_at for job in jobs):
+            await asyncio.sleep(0.01)
+        await queue.stop()
+        return [await queue.get_job(job.id) for job in jobs]
+
+    completed, failed = asyncio.run(run())
+
+    assert completed.status == JobStatus.COMPLETED
+    assert completed.stages[JobStage.EMBED.value].completed == 4
+    assert (failed.status, failed.error) == (JobStatus.FAILED, "not a PDF")
+
+
+def test_only_the_latest_finished_jobs_are_kept():
+    async def ingest(progress=None):
+        pass
+
+    async def run():
+        queue = IngestionQueue(workers=1, max_pending_jobs=10, max_finished_jobs=2, cpu_workers=0)
+        await queue.start()
+        jobs = []
+        for i in range(5):
+            jobs.append(await queue.submit("text", str(i), ingest))
+            while not jobs[-1].finished_at:
+                await asyncio.sleep(0.01)
+        await queue.stop()
+        return [await queue.get_job(job.id) is not None for job in jobs]
+
+    # Eviction runs on submit, so the job submitted last is kept besides the two latest finished ones
+    assert asyncio.run(run()) == [False, False, True, True, True]
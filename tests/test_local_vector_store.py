@@ -0,0 +1,109 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from src.config.config import LocalIndexType
+from src.services import local_vector_store
+from src.services.local_vector_store import LocalVectorStore
+from src.services.vector_store import hash_chunk
+
+
+def _insert(store: LocalVectorStore, count: int, source_key: str = "key", seed: int = 0):
+    vectors = np.random.default_rng(seed).normal(size=(count, 8))
+    store.insert_embeddings([f"{source_key}-{i}" for i in range(count)], vectors, source_key, source_key.upper(), "text")
+    return vectors
+
+
+def _texts(results):
+    return [result["text"] for result in results]
+
+
+def test_writes_are_replayed_from_the_log_by_a_new_instance(tmp_path):
+    store = LocalVectorStore(str(tmp_path), LocalIndexType.EXACT)
+    _insert(store, 20, "a")
+    _insert(store, 10, "b", seed=1)
+    store.delete_chunks("a", [hash_chunk("a-0"), hash_chunk("a-1")])
+    store.delete_embeddings_by_source_label("B")
+
+    reopened = LocalVectorStore(str(tmp_path), LocalIndexType.EXACT)
+    assert reopened.get_chunk_hashes("a") == {hash_chunk(f"a-{i}") for i in range(2, 20)}
+    assert reopened.get_chunk_hashes("b") == set()
+
+
+def test_other_instances_see_appended_writes(tmp_path):
+    writer = LocalVectorStore(str(tmp_path), LocalIndexType.EXACT)
+    reader = LocalVectorStore(str(tmp_path), LocalIndexType.EXACT)
+    vectors = _insert(writer, 5)
+
+    assert _texts(reader.similarity_search(vectors[3], 1)) == ["key-3"]
+
+
+def test_compaction_starts_a_new_generation_with_the_same_contents(tmp_path, monkeypatch):
+    monkeypatch.setattr(local_vector_store, "LOG_COMPACTION_MIN_ROWS", 10)
+    monkeypatch.setattr(local_vector_store, "LOG_COMPACTION_MAX_OPS", 3)
+    store = LocalVectorStore(str(tmp_path), LocalIndexType.EXACT)
+    for seed in range(6):
+        _insert(store, 4, f"s{seed}", seed=seed)
+
+    assert store._generation > 0
+    assert not os.path.exists(os.path.join(tmp_path, f"{local_vector_store.GENERATION_PREFIX}0"))
+    reopened = LocalVectorStore(str(tmp_path), LocalIndexType.EXACT)
+    assert len(reopened._snapshot.documents) == 24
+
+
+def test_torn_log_tail_is_ignored_and_overwritten(tmp_path):
+    store = LocalVectorStore(str(tmp_path), LocalIndexType.EXACT)
+    _insert(store, 3)
+    with open(store._generation_file(local_vector_store.LOG_FILE), "ab") as log:
+        log.write(b'{"op": "ins')
+
+    reopened = LocalVectorStore(str(tmp_path), LocalIndexType.EXACT)
+    assert len(reopened._snapshot.documents) == 3
+    _insert(reopened, 2, "more", seed=1)
+    assert len(LocalVectorStore(str(tmp_path), LocalIndexType.EXACT)._snapshot.documents) == 5
+
+
+def test_index_saved_by_earlier_versions_is_adopted(tmp_path):
+    np.save(tmp_path / local_vector_store.VECTORS_FILE, np.eye(2, dtype=np.float32))
+    with open(tmp_path / local_vector_store.DOCUMENTS_FILE, "w") as documents:
+        for text in ("x", "y"):
+            documents.write(json.dumps({"text": text, "source_key": "old", "source_label": "Old", "type": "text",
+                                        "chunk_hash": hash_chunk(text)}) + "\n")
+
+    store = LocalVectorStore(str(tmp_path), LocalIndexType.EXACT)
+    assert _texts(store.similarity_search([0, 1], 1)) == ["y"]
+
+
+@pytest.mark.parametrize("index_type", [LocalIndexType.EXACT, LocalIndexType.IVF])
+def test_search_returns_the_nearest_vectors(tmp_path, index_type):
+    store = LocalVectorStore(str(tmp_path), index_type, ivf_lists=4, ivf_probes=4)
+    vectors = _insert(store, 200)
+    query = vectors[17] + 0.01
+
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    expected = [f"key-{i}" for i in np.argsort(-(normalized @ (query / np.linalg.norm(query))))[:5]]
+    assert _texts(store.similarity_search(query, 5)) == expected
+
+
+def test_ivf_index_trains_the_configured_lists(tmp_path):
+    store = LocalVectorStore(str(tmp_path), LocalIndexType.IVF, ivf_lists=8, ivf_probes=1)
+    vectors = _insert(store, 400)
+    store.similarity_search(vectors[0], 1)
+
+    snapshot = store._snapshot
+    assert snapshot.centroids is not None and len(snapshot.centroids) == 8
+    assert _texts(store.similarity_search(vectors[0], 1)) == ["key-0"]
+
+
+def test_source_stats_and_chunk_vectors(tmp_path):
+    store = LocalVectorStore(str(tmp_path), LocalIndexType.EXACT)
+    vectors = _insert(store, 4)
+
+    stats = store.get_source_stats()
+    assert [(source["source_key"], source["chunk_count"]) for source in stats] == [("key", 4)]
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    assert np.allclose(stats[0]["vector_sum"], normalized.sum(axis=0))
+    chunk_vectors = store.get_chunk_vectors("key", [hash_chunk("key-1")])
+    assert np.allclose(chunk_vectors, normalized[1:2])
@@ -0,0 +1,74 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from src.repositories.conversation_repository import unprojected_history
+from src.services.message_service import MessageService
+
+
+class _FakeMessageRepository:
+    def __init__(self, rows):
+        self.rows = rows
+
+    async def get_thread_ids(self):
+        return ["thread"]
+
+    async def get_checkpoint_messages(self, thread_id):
+        return self.rows
+
+
+class _FakeConversationRepository:
+    """
+    In-memory projection that resolves the overlap like ConversationRepository.backfill_thread.
+    """
+    def __init__(self):
+        self.rows = []
+
+    async def append_exchange(self, thread_id, question, answer, sources):
+        self.rows += [{"role": "user", "content": question}, {"role": "ai", "content": answer}]
+
+    async def backfill_thread(self, thread_id, messages):
+        projected = [(row["role"], row["content"]) for row in self.rows[:len(messages)]]
+        messages = unprojected_history(messages, projected)
+        self.rows[:0] = [{"role": message["role"], "content": message["content"]} for message in messages]
+        return len(messages)
+
+
+def _checkpoint_rows(*exchanges):
+    # Checkpoints are written while the answer streams, before the exchange is projected
+    ts = datetime.now(timezone.utc) - timedelta(seconds=1)
+    rows = []
+    for question, answer in exchanges:
+        rows.append({"content": question, "type": "human", "node": "__start__", "created_at": ts})
+        rows.append({"content": answer, "type": "ai", "node": "direct_response", "created_at": ts})
+    return rows
+
+
+def _service(checkpoint_rows):
+    service = MessageService()
+    service.message_repository = _FakeMessageRepository(checkpoint_rows)
+    service.conversation_repository = _FakeConversationRepository()
+    return service
+
+
+def test_backfill_after_recorded_exchange_inserts_no_duplicates():
+    service = _service(_checkpoint_rows(("hello", "hi")))
+    asyncio.run(service.record_exchange("thread", "hello", "hi", []))
+
+    assert asyncio.run(service.backfill()) == 0
+    assert [row["content"] for row in service.conversation_repository.rows] == ["hello", "hi"]
+
+
+def test_backfill_inserts_only_history_older_than_projection_and_is_idempotent():
+    service = _service(_checkpoint_rows(("first", "one"), ("second", "two")))
+    asyncio.run(service.record_exchange("thread", "second", "two", []))
+
+    assert asyncio.run(service.backfill()) == 2
+    assert asyncio.run(service.backfill()) == 0
+    assert [row["content"] for row in service.conversation_repository.rows] == ["first", "one", "second", "two"]
+
+
+def test_unprojected_history_keeps_all_messages_without_overlap():
+    messages = [{"role": "user", "content": "old"}, {"role": "ai", "content": "answer"}]
+
+    assert unprojected_history(messages, []) == messages
+    assert unprojected_history(messages, [("user", "new")]) == messages
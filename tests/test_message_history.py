@@ -0,0 +1,56 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.controllers import message_controller
+from src.services.message_service import MessageService
+
+
+class _FakeConversationRepository:
+    """
+    Returns pages newest first, like ConversationRepository.get_messages.
+    """
+    def __init__(self, count):
+        self.rows = [
+            {"id": str(step), "thread_id": "user", "step": step, "role": "user" if step % 2 == 0 else "ai",
+             "content": f"message {step}", "sources": []}
+            for step in range(count)
+        ]
+
+    async def get_messages(self, thread_id, before_step=None, limit=50):
+        rows = [row for row in self.rows if row["thread_id"] == thread_id and (before_step is None or row["step"] < before_step)]
+        return sorted(rows, key=lambda row: row["step"], reverse=True)[:limit]
+
+
+def _client(count: int) -> TestClient:
+    service = MessageService()
+    service.conversation_repository = _FakeConversationRepository(count)
+    app = FastAPI()
+    app.include_router(message_controller.router, prefix="/message")
+    app.dependency_overrides[message_controller.get_message_service] = lambda: service
+    return TestClient(app)
+
+
+def _steps(response):
+    assert response.status_code == 200
+    return [message["step"] for message in response.json()]
+
+
+def test_pages_walk_back_from_the_newest_messages():
+    client = _client(7)
+    headers = {"x-user-id": "user"}
+
+    first = _steps(client.get("/message/", params={"limit": 3}, headers=headers))
+    second = _steps(client.get("/message/", params={"limit": 3, "before_step": first[0]}, headers=headers))
+    last = _steps(client.get("/message/", params={"limit": 3, "before_step": second[0]}, headers=headers))
+
+    assert first == [4, 5, 6]
+    assert second == [1, 2, 3]
+    assert last == [0]
+    assert _steps(client.get("/message/", params={"before_step": 0}, headers=headers)) == []
+
+
+def test_page_size_is_bounded():
+    client = _client(1)
+
+    response = client.get("/message/", params={"limit": message_controller.MAX_PAGE_SIZE + 1}, headers={"x-user-id": "user"})
+    assert response.status_code == 422
@@ -0,0 +1,93 @@
+import pytest
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from src.config.config import app_config
+from src.services import document_processor
+from src.services.document_processor import DocumentProcessor
+from src.services.ingestion_queue import JobProgress, JobStage, JobStatus
+from src.services.text_extraction import extract_page_range
+
+
+def _write_pdf(path, pages):
+    """
+    Write a minimal uncompressed PDF with one line of Helvetica text per page.
+    """
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in pages:
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    data = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(data))
+        data += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(data)
+    data += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    data += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    data += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    path.write_bytes(data)
+    return str(path)
+
+
+@pytest.fixture
+def processor(monkeypatch):
+    monkeypatch.setattr(app_config, "chunk_size", 80)
+    monkeypatch.setattr(app_config, "chunk_overlap", 20)
+    processor = DocumentProcessor.__new__(DocumentProcessor)
+    processor.text_splitter = RecursiveCharacterTextSplitter(chunk_size=80, chunk_overlap=20)
+    return processor
+
+
+def test_process_pdf_syncs_the_chunks_and_removes_the_file(tmp_path, processor, monkeypatch):
+    synced = []
+    monkeypatch.setattr(processor, "_sync_chunks", lambda chunks, *args: synced.extend(chunks))
+    path = _write_pdf(tmp_path / "upload.pdf", [f"page {i} about heaps and stacks" for i in range(3)])
+    progress = JobProgress()
+
+    processor.process_pdf(path, "Title", progress)
+
+    assert " ".join(synced).startswith("page 0 about heaps")
+    assert not (tmp_path / "upload.pdf").exists()
+    assert progress.snapshot()[JobStage.SPLIT.value].status == JobStatus.COMPLETED
+
+
+def test_process_pdf_removes_the_file_when_processing_fails(tmp_path, processor, monkeypatch):
+    def fail(chunks, *args):
+        raise RuntimeError("vector store down")
+
+    monkeypatch.setattr(processor, "_sync_chunks", fail)
+    path = _write_pdf(tmp_path / "upload.pdf", ["page"])
+
+    with pytest.raises(RuntimeError):
+        processor.process_pdf(path, "Title")
+    assert not (tmp_path / "upload.pdf").exists()
+
+
+def test_extract_page_range_reads_only_its_pages(tmp_path):
+    path = _write_pdf(tmp_path / "doc.pdf", [f"page{i}" for i in range(4)])
+
+    assert extract_page_range(path, 1, 3, chunk_size=80, chunk_overlap=0) == ["page1 page2"]
+
+
+def test_chunks_are_carried_across_page_range_boundaries(tmp_path, processor, monkeypatch):
+    pages = [f"page {i} " + "word " * 12 for i in range(6)]
+    path = _write_pdf(tmp_path / "doc.pdf", pages)
+
+    def chunks(pages_per_task):
+        monkeypatch.setattr(app_config.ingestion, "pdf_pages_per_task", pages_per_task)
+        return list(processor._extract_pdf_chunks(path, len(pages), JobProgress()))
+
+    single_range = chunks(len(pages))
+    # Pages shorter than a chunk are joined with their neighbours, as in one sequential pass
+    assert chunks(1) == single_range
+    for pages_per_task in (2, 3, 4):
+        ranged = chunks(pages_per_task)
+        assert all(len(chunk) <= 80 for chunk in ranged)
+        text = " ".join(ranged)
+        assert [text.index(f"page {i} ") for i in range(len(pages))] == sorted(text.index(f"page {i} ") for i in range(len(pages)))
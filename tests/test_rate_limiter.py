@@ -0,0 +1,50 @@
+import time
+from types import SimpleNamespace
+
+from src.services.rate_limiter import TokenBucketLimiter, get_retry_after, is_rate_limit_error
+
+
+def _timed_acquire(limiter: TokenBucketLimiter, tokens: int) -> float:
+    started_at = time.monotonic()
+    limiter.acquire(tokens)
+    return time.monotonic() - started_at
+
+
+def test_acquire_within_budget_does_not_wait():
+    limiter = TokenBucketLimiter(tokens_per_minute=6000)
+
+    assert _timed_acquire(limiter, 3000) < 0.05
+    assert _timed_acquire(limiter, 3000) < 0.05
+
+
+def test_acquire_waits_for_the_bucket_to_refill():
+    # 1200 tokens per minute refill at 20 tokens per second
+    limiter = TokenBucketLimiter(tokens_per_minute=1200)
+    limiter.acquire(1200)
+
+    assert 0.15 < _timed_acquire(limiter, 5) < 0.5
+
+
+def test_oversized_requests_wait_for_a_full_bucket_only():
+    limiter = TokenBucketLimiter(tokens_per_minute=6000)
+
+    assert _timed_acquire(limiter, 10 * 6000) < 0.05
+
+
+def test_penalize_honours_retry_after_and_slows_the_refill():
+    limiter = TokenBucketLimiter(tokens_per_minute=60000)
+    limiter.penalize(retry_after=0.2)
+
+    assert _timed_acquire(limiter, 1) >= 0.19
+    assert limiter._rate_factor == 0.5
+    limiter.reward()
+    assert limiter._rate_factor == 0.55
+
+
+def test_rate_limit_errors_are_read_from_the_response():
+    error = SimpleNamespace(response=SimpleNamespace(status_code=429, headers={"retry-after": "1.5"}))
+
+    assert is_rate_limit_error(error)
+    assert get_retry_after(error) == 1.5
+    assert not is_rate_limit_error(SimpleNamespace(status_code=500))
+    assert get_retry_after(SimpleNamespace(headers={"retry-after": "soon"})) is None
@@ -0,0 +1,71 @@
+import asyncio
+import threading
+import time
+
+from src.services.resources import ResourceRegistry
+
+
+def test_clients_are_created_once_under_concurrent_first_use():
+    registry = ResourceRegistry()
+    created = []
+
+    def create():
+        time.sleep(0.05)
+        created.append(object())
+        return created[-1]
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry._get("client", create))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(created) == 1
+    assert all(result is created[0] for result in results)
+
+
+def test_a_slow_client_does_not_block_the_others():
+    registry = ResourceRegistry()
+    release = threading.Event()
+    slow = threading.Thread(target=lambda: registry._get("slow", lambda: release.wait(5) and object()))
+    slow.start()
+    time.sleep(0.02)
+
+    started_at = time.monotonic()
+    registry._get("fast", object)
+    assert time.monotonic() - started_at < 1
+
+    release.set()
+    slow.join()
+
+
+def test_close_runs_every_closer_and_forgets_the_clients():
+    registry = ResourceRegistry()
+    closed = []
+
+    async def close():
+        closed.append(True)
+
+    async def failing_close():
+        raise RuntimeError("already closed")
+
+    registry._get("client", object)
+    registry._add_closer(failing_close)
+    registry._add_closer(close)
+    asyncio.run(registry.close())
+
+    assert closed == [True]
+    assert registry._resources == {}
+
+
+def test_warm_up_survives_failing_clients(monkeypatch):
+    registry = ResourceRegistry()
+
+    def fail():
+        raise RuntimeError("no credentials")
+
+    for name in ("async_vector_store", "vector_store", "embedding_model", "llm"):
+        monkeypatch.setattr(registry, name, fail)
+
+    registry.warm_up()
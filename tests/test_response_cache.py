@@ -0,0 +1,69 @@
+import asyncio
+
+from src.services.response_cache import SemanticResponseCache
+
+
+class _FakeGenerationRepository:
+    def __init__(self):
+        self.generation = 0
+
+    async def get_generation(self):
+        return self.generation
+
+    async def bump_generation(self):
+        self.generation += 1
+        return self.generation
+
+
+def _cache(repository=None) -> SemanticResponseCache:
+    return SemanticResponseCache(similarity_threshold=0.9, max_entries=4, ttl_seconds=60, sync_seconds=0,
+                                 repository=repository)
+
+
+def test_lookup_serves_near_duplicates_only():
+    cache = _cache()
+    cache.store([1.0, 0.0], "answer", [])
+
+    assert cache.lookup([0.99, 0.05]).answer == "answer"
+    assert cache.lookup([0.0, 1.0]) is None
+
+
+def test_store_ignores_blank_answers():
+    cache = _cache()
+    cache.store([1.0, 0.0], "  ", [])
+
+    assert cache.lookup([1.0, 0.0]) is None
+
+
+def test_invalidate_in_one_worker_clears_the_others():
+    repository = _FakeGenerationRepository()
+
+    async def run():
+        invalidating, other = _cache(repository), _cache(repository)
+        await invalidating.start()
+        await other.start()
+        other.store([1.0, 0.0], "answer", [])
+
+        invalidating.invalidate()
+        await invalidating.stop()
+        await other.sync()
+        return other.lookup([1.0, 0.0])
+
+    assert asyncio.run(run()) is None
+    assert repository.generation == 1
+
+
+def test_invalidate_from_a_thread_publishes_on_the_loop():
+    repository = _FakeGenerationRepository()
+
+    async def run():
+        cache = _cache(repository)
+        await cache.start()
+        await asyncio.to_thread(cache.invalidate)
+        for _ in range(100):
+            if repository.generation:
+                break
+            await asyncio.sleep(0.01)
+
+    asyncio.run(run())
+    assert repository.generation == 1
@@ -0,0 +1,72 @@
+import asyncio
+
+import numpy as np
+
+from src.services.retrieval_router import RetrievalRouter, Route, RoutingDecision
+from src.services.source_catalog import SourceCatalog
+
+
+class _FakeCatalogRepository:
+    async def get_vector_sums(self):
+        # Sums of three and two normalized chunk vectors
+        return [
+            {"source_key": "a", "source_label": "Sorting", "chunk_count": 3, "vector_sum": [3.0, 0.0, 0.0]},
+            {"source_key": "b", "source_label": "Graphs", "chunk_count": 2, "vector_sum": [0.0, 2.0, 0.0]}
+        ]
+
+
+def _router(enabled: bool = True) -> RetrievalRouter:
+    catalog = SourceCatalog(cache_ttl_seconds=60, repository=_FakeCatalogRepository())
+    router = RetrievalRouter(enabled=enabled, retrieve_threshold=0.8, direct_threshold=0.4, shadow_sample_rate=0,
+                             refresh_seconds=300, get_source_centroids=catalog.get_source_centroids)
+    asyncio.run(router.refresh_centroids())
+    return router
+
+
+def test_catalog_centroids_are_mean_chunk_vectors():
+    catalog = SourceCatalog(cache_ttl_seconds=60, repository=_FakeCatalogRepository())
+
+    centroids = asyncio.run(catalog.get_source_centroids())
+    assert [source["source_label"] for source in centroids] == ["Sorting", "Graphs"]
+    assert np.allclose(centroids[0]["centroid"], [1.0, 0.0, 0.0])
+    assert [source["count"] for source in centroids] == [3, 2]
+
+
+def test_questions_close_to_a_source_retrieve():
+    decision = _router().route("How does quicksort partition?", [0.95, 0.1, 0.1])
+
+    assert (decision.route, decision.reason, decision.source_label) == (Route.RETRIEVE, "similar_source", "Sorting")
+
+
+def test_off_topic_questions_are_answered_directly():
+    decision = _router().route("What is the capital of France?", [0.1, 0.1, 1.0])
+
+    assert (decision.route, decision.reason) == (Route.DIRECT, "off_topic")
+
+
+def test_topic_keywords_decide_the_ambiguous_band():
+    router = _router()
+    embedding = [0.7, 0.0, 0.6]
+
+    assert router.route("Explain heaps", embedding).route == Route.RETRIEVE
+    assert router.route("Explain the weather", embedding).route == Route.LLM
+
+
+def test_questions_routed_without_an_embedding():
+    router = _router()
+
+    assert router.route("thanks!").route == Route.DIRECT
+    assert router.route("Can you explain that again?").reason == "follow_up"
+    assert not router.needs_embedding("hello")
+    assert router.needs_embedding("What is a trie?")
+    assert _router(enabled=False).route("What is a trie?").reason == "disabled"
+
+
+def test_agreement_with_the_llm_is_counted():
+    router = _router()
+    router.record_llm_decision(RoutingDecision(Route.RETRIEVE, "similar_source", 0.9), Route.RETRIEVE)
+    router.record_llm_decision(RoutingDecision(Route.LLM, "ambiguous", 0.5), Route.RETRIEVE)
+    router.record_llm_decision(RoutingDecision(Route.LLM, "follow_up"), Route.DIRECT)
+
+    assert router.stats()["compared"] == 2
+    assert router.stats()["agreement_rate"] == 0.5
@@ -0,0 +1,129 @@
+import asyncio
+import threading
+
+import pytest
+
+from src.services.resources import resources
+from src.services.source_catalog import SourceCatalog
+
+
+class _FakeCatalogRepository:
+    def __init__(self, sources=None):
+        self.sources = dict(sources or {})
+        self.label_reads = 0
+
+    async def has_sources(self):
+        return bool(self.sources)
+
+    async def save_sources(self, sources):
+        for source in sources:
+            self.sources[source["source_key"]] = source
+
+    async def save_source(self, source_key, source_label, type, chunk_count, byte_size, vector_sum, replace_vector_sum):
+        self.sources[source_key] = {"source_key": source_key, "source_label": source_label, "chunk_count": chunk_count}
+
+    async def delete_source(self, source_key):
+        self.sources.pop(source_key, None)
+
+    async def get_source_labels(self):
+        self.label_reads += 1
+        return sorted({source["source_label"] for source in self.sources.values()})
+
+
+class _FakeVectorStore:
+    """
+    Blocking and async vector store; the scan blocks until released to observe the backfill in progress.
+    """
+    def __init__(self):
+        self.release = None
+
+    def get_source_stats(self):
+        self.release.wait(5)
+        return [{"source_key": "k", "source_label": "Heaps", "type": "text", "chunk_count": 2, "byte_size": 10}]
+
+    async def get_distinct_sources(self):
+        return ["Heaps (from the vector store)"]
+
+
+@pytest.fixture
+def vector_store(monkeypatch):
+    store = _FakeVectorStore()
+    monkeypatch.setitem(resources._resources, "vector_store", store)
+    monkeypatch.setitem(resources._resources, "async_vector_store", store)
+    return store
+
+
+def test_empty_catalog_is_backfilled_at_startup(vector_store):
+    vector_store.release = threading.Event()
+    repository = _FakeCatalogRepository()
+    catalog = SourceCatalog(cache_ttl_seconds=60, repository=repository)
+
+    async def run():
+        await catalog.start()
+        during = await catalog.get_source_labels()
+        vector_store.release.set()
+        await catalog._backfill_task
+        after = await catalog.get_source_labels()
+        await catalog.stop()
+        return during, after
+
+    during, after = asyncio.run(run())
+
+    assert during == ["Heaps (from the vector store)"]
+    assert after == ["Heaps"]
+    assert not catalog.backfilling
+
+
+def test_filled_catalog_is_not_backfilled(vector_store):
+    catalog = SourceCatalog(cache_ttl_seconds=60, repository=_FakeCatalogRepository({"k": {"source_label": "Heaps"}}))
+
+    async def run():
+        await catalog.start()
+        started_backfill = catalog._backfill_task is not None
+        await catalog.stop()
+        return started_backfill
+
+    assert not asyncio.run(run())
+
+
+def test_labels_are_cached_until_a_change_in_this_process():
+    repository = _FakeCatalogRepository({"k": {"source_label": "Heaps"}})
+    catalog = SourceCatalog(cache_ttl_seconds=60, repository=repository)
+
+    async def run():
+        await catalog.get_source_labels()
+        await catalog.get_source_labels()
+        await catalog.record_source("s", "Stacks", "text", 3, 30)
+        return await catalog.get_source_labels()
+
+    assert asyncio.run(run()) == ["Heaps", "Stacks"]
+    assert repository.label_reads == 2
+
+
+def test_sources_left_without_chunks_are_removed():
+    repository = _FakeCatalogRepository({"k": {"source_label": "Heaps"}})
+    catalog = SourceCatalog(cache_ttl_seconds=60, repository=repository)
+
+    asyncio.run(catalog.record_source("k", "Heaps", "text", 0, 0))
+
+    assert repository.sources == {}
+
+
+def test_ingestion_threads_record_on_the_catalog_loop():
+    repository = _FakeCatalogRepository({"k": {"source_label": "Heaps"}})
+    catalog = SourceCatalog(cache_ttl_seconds=60, repository=repository)
+
+    async def run():
+        await catalog.start()
+        await asyncio.to_thread(catalog.record_source_from_thread, "s", "Stacks", "text", 3, 30)
+        await catalog.stop()
+
+    asyncio.run(run())
+    assert set(repository.sources) == {"k", "s"}
+
+
+def test_recording_from_a_thread_before_start_fails():
+    catalog = SourceCatalog(cache_ttl_seconds=60, repository=_FakeCatalogRepository())
+
+    with pytest.raises(RuntimeError):
+        catalog.record_source_from_thread("s", "Stacks", "text", 3, 30)
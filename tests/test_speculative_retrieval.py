@@ -0,0 +1,88 @@
+import asyncio
+
+from src.services.speculative_retrieval import SpeculativeRetriever
+
+
+async def _embed(text):
+    return [1.0, 0.0] if "heap" in text else [0.0, 1.0]
+
+
+async def _search(embedding):
+    return [{"text": "rows"}]
+
+
+def _retriever() -> SpeculativeRetriever:
+    return SpeculativeRetriever(enabled=True, match_similarity=0.9)
+
+
+def test_rows_are_used_for_a_matching_tool_query():
+    retriever = _retriever()
+
+    async def run():
+        speculation = retriever.start("what is a heap", _embed, _search)
+        rows = await retriever.resolve(speculation, [0.99, 0.05])
+        retriever.finish(speculation)
+        return rows
+
+    assert asyncio.run(run()) == [{"text": "rows"}]
+    assert retriever.stats()["used"] == 1
+    assert retriever.stats()["waste_rate"] == 0.0
+
+
+def test_rows_are_discarded_for_a_different_tool_query():
+    retriever = _retriever()
+
+    async def run():
+        speculation = retriever.start("what is a heap", _embed, _search)
+        rows = await retriever.resolve(speculation, [0.0, 1.0])
+        retriever.finish(speculation)
+        return rows
+
+    assert asyncio.run(run()) is None
+    assert retriever.stats()["mismatched"] == 1
+
+
+def test_unneeded_speculation_is_cancelled():
+    retriever = _retriever()
+    cancelled = asyncio.Event()
+
+    async def slow_search(embedding):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    async def run():
+        speculation = retriever.start("hello", _embed, slow_search)
+        await asyncio.sleep(0.01)
+        retriever.finish(speculation)
+        await asyncio.wait_for(cancelled.wait(), 1)
+
+    asyncio.run(run())
+    assert retriever.stats()["unneeded"] == 1
+    assert retriever.stats()["waste_rate"] == 1.0
+
+
+def test_failed_speculation_falls_back_to_a_normal_search():
+    retriever = _retriever()
+
+    async def failing_search(embedding):
+        raise RuntimeError("vector store down")
+
+    async def run():
+        speculation = retriever.start("what is a heap", _embed, failing_search)
+        rows = await retriever.resolve(speculation, [1.0, 0.0])
+        retriever.finish(speculation)
+        return rows
+
+    assert asyncio.run(run()) is None
+    assert retriever.stats()["failed"] == 1
+
+
+def test_disabled_retriever_does_not_speculate():
+    retriever = SpeculativeRetriever(enabled=False, match_similarity=0.9)
+
+    assert retriever.start("what is a heap", _embed, _search) is None
+    retriever.finish(None)
+    assert retriever.stats()["started"] == 0
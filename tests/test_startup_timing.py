@@ -0,0 +1,55 @@
+import importlib
+import logging
+import sys
+
+import pytest
+
+from src.startup_timing import StartupTimer
+
+
+@pytest.fixture
+def package(tmp_path, monkeypatch):
+    root = tmp_path / "timedpkg"
+    root.mkdir()
+    (root / "__init__.py").write_text("")
+    (root / "outer.py").write_text("import time\nimport timedpkg.inner\ntime.sleep(0.05)\n")
+    (root / "inner.py").write_text("import time\ntime.sleep(0.1)\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield "timedpkg"
+    for name in [name for name in sys.modules if name.startswith("timedpkg")]:
+        del sys.modules[name]
+
+
+def test_each_module_is_charged_its_own_import_time(package):
+    timer = StartupTimer(package, budget_seconds=10, report_modules=5)
+    timer.install()
+    try:
+        importlib.import_module(f"{package}.outer")
+    finally:
+        timer.uninstall()
+
+    assert 0.04 < timer.imports[f"{package}.outer"] < 0.09
+    assert timer.imports[f"{package}.inner"] >= 0.1
+
+
+def test_report_warns_over_budget(package, caplog):
+    timer = StartupTimer(package, budget_seconds=0, report_modules=5)
+    with timer.measure("database pool"):
+        pass
+
+    with caplog.at_level(logging.INFO, logger="src.startup_timing"):
+        total = timer.report()
+
+    assert total > 0
+    assert "database pool" in caplog.text
+    assert "over the budget" in caplog.text
+
+
+def test_importing_the_application_creates_no_clients():
+    from src.main import app
+    from src.services.resources import resources
+    from src.startup_timing import startup_timer
+
+    startup_timer.uninstall()
+    assert app.router.routes
+    assert resources._resources == {}
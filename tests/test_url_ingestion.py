@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.services.ingestion_queue import JobProgress
+from src.services.url_ingestion import UrlIngestionEngine
+
+
+class _FakeFetchRepository:
+    def __init__(self):
+        self.states = {}
+
+    async def get_fetch_states(self, source_keys):
+        return {key: state for key, state in self.states.items() if key in source_keys}
+
+    async def save_fetch_state(self, source_key, url, etag, last_modified, content_hash):
+        self.states[source_key] = {"etag": etag, "last_modified": last_modified, "content_hash": content_hash}
+
+
+class _Site:
+    """
+    Pages served with an ETag, honouring If-None-Match, and a record of the request headers.
+    """
+    def __init__(self):
+        self.pages = {"/a": ("<p>heaps</p>", '"v1"'), "/b": ("<p>stacks</p>", None)}
+        self.requests = []
+
+    async def handle(self, request):
+        body, etag = self.pages.get(request.path, (None, None))
+        self.requests.append((request.path, request.headers.get("If-None-Match")))
+        if body is None:
+            raise web.HTTPNotFound()
+        if etag is not None and request.headers.get("If-None-Match") == etag:
+            return web.Response(status=304)
+        headers = {"ETag": etag} if etag else {}
+        return web.Response(text=body, content_type="text/html", headers=headers)
+
+
+def _ingest(site, repository, paths):
+    processed = []
+
+    async def run():
+        app = web.Application()
+        app.router.add_get("/{page}", site.handle)
+        async with TestServer(app) as server:
+            engine = UrlIngestionEngine(max_connections=4, max_connections_per_host=2, timeout_seconds=5,
+                                        process_concurrency=2, user_agent="test", repository=repository)
+            await engine.start()
+            try:
+                sources = {path: str(server.make_url(path)) for path in paths}
+                await engine.ingest(sources, lambda text, source_key, url: processed.append(source_key), JobProgress())
+            finally:
+                await engine.stop()
+
+    asyncio.run(run())
+    return processed
+
+
+def test_unchanged_pages_are_not_processed_again():
+    site, repository = _Site(), _FakeFetchRepository()
+
+    assert sorted(_ingest(site, repository, ["/a", "/b"])) == ["/a", "/b"]
+    site.requests.clear()
+    assert _ingest(site, repository, ["/a", "/b"]) == []
+    # The page with an ETag is revalidated; the other is fetched and matched by content hash
+    assert sorted(site.requests) == [("/a", '"v1"'), ("/b", None)]
+
+
+def test_changed_pages_are_processed():
+    site, repository = _Site(), _FakeFetchRepository()
+    _ingest(site, repository, ["/a", "/b"])
+
+    site.pages["/a"] = ("<p>heaps v2</p>", '"v2"')
+    site.pages["/b"] = ("<p>stacks v2</p>", None)
+    assert sorted(_ingest(site, repository, ["/a", "/b"])) == ["/a", "/b"]
+
+
+def test_failed_pages_fail_the_job_after_the_others_are_ingested():
+    site, repository = _Site(), _FakeFetchRepository()
+
+    with pytest.raises(RuntimeError, match="1 of 2"):
+        _ingest(site, repository, ["/a", "/missing"])
+    assert set(repository.states) == {"/a"}
@@ -0,0 +1,162 @@
+import asyncio
+
+from astrapy.exceptions import DataAPITimeoutException, InsertManyException
+from astrapy.results import InsertManyResult
+
+from src.services import vector_store
+from src.services.bulk_writer import bulk_writer
+from src.services.vector_store import AstraVectorStore, AsyncAstraVectorStore, hash_chunk
+
+
+class _AsyncCursor:
+    def __init__(self, documents):
+        self.documents = documents
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for document in self.documents:
+            await asyncio.sleep(0)
+            yield document
+
+
+class _FakeAsyncCollection:
+    """
+    In-memory stand-in for astrapy's AsyncCollection, supporting the filters the store uses.
+    """
+    def __init__(self):
+        self.documents = {}
+        self.deletes = []
+
+    @staticmethod
+    def _matches(document, filter):
+        for field, condition in filter.items():
+            if isinstance(condition, dict) and "$in" in condition:
+                if document.get(field) not in condition["$in"]:
+                    return False
+            elif isinstance(condition, dict) and "$exists" in condition:
+                if (field in document) != condition["$exists"]:
+                    return False
+            elif document.get(field) != condition:
+                return False
+        return True
+
+    async def insert_many(self, documents, **kwargs):
+        await asyncio.sleep(0)
+        for document in documents:
+            self.documents[document["_id"]] = document
+
+    async def delete_many(self, filter):
+        self.deletes.append(filter)
+        self.documents = {key: document for key, document in self.documents.items() if not self._matches(document, filter)}
+
+    def find(self, filter, projection=None, sort=None, limit=None, include_similarity=False):
+        return _AsyncCursor([document for document in self.documents.values() if self._matches(document, filter)][:limit])
+
+    async def distinct(self, key):
+        return sorted({document[key] for document in self.documents.values()})
+
+    async def find_one(self):
+        return next(iter(self.documents.values()), None)
+
+
+def _store() -> AsyncAstraVectorStore:
+    store = AsyncAstraVectorStore.__new__(AsyncAstraVectorStore)
+    store.collection = _FakeAsyncCollection()
+    return store
+
+
+def test_async_store_round_trip():
+    store = _store()
+
+    async def run():
+        await store.insert_embeddings(["alpha", "beta"], [[1.0, 0.0], [0.0, 1.0]], "k", "Heaps", "text")
+        await store.insert_embeddings(["gamma"], [[1.0, 1.0]], "s", "Stacks", "text")
+        hashes = await store.get_chunk_hashes("k")
+        await store.delete_embeddings_by_source_label("Stacks")
+        return hashes, await store.get_distinct_sources()
+
+    hashes, labels = asyncio.run(run())
+    assert hashes == {hash_chunk("alpha"), hash_chunk("beta")}
+    assert labels == ["Heaps"]
+
+
+def test_reinserting_chunks_does_not_duplicate_them():
+    store = _store()
+
+    async def run():
+        for _ in range(2):
+            await store.insert_embeddings(["alpha", "beta"], [[1.0, 0.0], [0.0, 1.0]], "k", "Heaps", "text")
+
+    asyncio.run(run())
+    assert len(store.collection.documents) == 2
+
+
+def test_chunk_deletes_are_batched_and_cover_unhashed_chunks(monkeypatch):
+    monkeypatch.setattr(vector_store, "MAX_IN_FILTER_VALUES", 2)
+    store = _store()
+    chunks = [f"chunk {i}" for i in range(5)]
+
+    async def run():
+        await store.insert_embeddings(chunks, [[1.0, float(i)] for i in range(5)], "k", "Heaps", "text")
+        store.collection.documents["legacy"] = {"_id": "legacy", "source_key": "k", "source_label": "Heaps"}
+        await store.delete_chunks("k", [hash_chunk(chunk) for chunk in chunks[:4]] + [None])
+        return await store.get_chunk_hashes("k")
+
+    assert asyncio.run(run()) == {hash_chunk("chunk 4")}
+    assert len(store.collection.deletes) == 3
+
+
+def test_searches_do_not_block_the_event_loop():
+    store = _store()
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0)
+
+    async def run():
+        await store.insert_embeddings([f"chunk {i}" for i in range(50)], [[1.0, 0.0]] * 50, "k", "Heaps", "text")
+        task = asyncio.create_task(ticker())
+        rows = await store.similarity_search([1.0, 0.0], limit=50)
+        task.cancel()
+        return rows
+
+    assert len(asyncio.run(run())) == 50
+    assert ticks > 0
+
+
+class _FlakyCollection:
+    """
+    Blocking collection whose first insert stores half the batch and then times out, as Astra can.
+    """
+    def __init__(self):
+        self.documents = {}
+        self.calls = 0
+
+    def insert_many(self, documents, **kwargs):
+        self.calls += 1
+        existing = [document for document in documents if document["_id"] in self.documents]
+        stored = documents[:len(documents) // 2] if self.calls == 1 else documents
+        for document in stored:
+            self.documents.setdefault(document["_id"], document)
+        if self.calls == 1:
+            raise DataAPITimeoutException("timed out", timeout_type="read", endpoint=None, raw_payload=None)
+        if existing:
+            errors = [{"errorCode": "DOCUMENT_ALREADY_EXISTS", "message": "exists"} for _ in existing]
+            raise InsertManyException.from_responses(commands=[None], raw_responses=[{"errors": errors}],
+                                                     partial_result=InsertManyResult(raw_results=[], inserted_ids=[]))
+
+
+def test_retried_partial_batches_are_not_duplicated(monkeypatch):
+    monkeypatch.setattr(bulk_writer, "retry_backoff_seconds", 0)
+    store = AstraVectorStore.__new__(AstraVectorStore)
+    store.collection = _FlakyCollection()
+
+    store.insert_embeddings(["alpha", "beta", "gamma", "delta"], [[1.0, float(i)] for i in range(4)], "k", "Heaps", "text")
+
+    assert store.collection.calls == 2
+    assert sorted(document["text"] for document in store.collection.documents.values()) == ["alpha", "beta", "delta", "gamma"]